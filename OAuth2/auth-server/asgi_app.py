@@ -0,0 +1,134 @@
+"""
+OAuth2 Authorization Server + Resource Server - ASGI 버전 (Quart)
+
+app.py(Flask/WSGI)와 같은 endpoints.py 핸들러를 async 뷰로 감싸 제공
+- 메모리 백엔드: dict 조회는 수 µs이므로 이벤트 루프에서 바로 실행 (스레드 전환 비용이 더 큼)
+- SQLite / shared 백엔드, 로그인(scrypt), 관리용 전체 폐기: 전용 스레드 풀에서 실행
+- 연결 하나가 스레드 하나를 점유하지 않으므로 keep-alive 연결이 수천 개여도 이벤트 루프 하나로 처리
+
+실행:
+    hypercorn asgi_app:app --bind 0.0.0.0:5000 --workers 4
+    python asgi_app.py
+"""
+from quart import Quart, request, render_template, session, g
+import asyncio
+import functools
+import secrets
+import time
+import os
+import sys
+
+# config 모듈 import
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import config
+from metrics import HTTP_REQUESTS, HTTP_LATENCY
+import database
+from database import start_token_sweeper
+from endpoints import ROUTES, Request, Template
+
+# 블로킹 핸들러를 실행할 스레드 수 (이벤트 루프 하나당)
+ASYNC_DB_THREADS = int(os.environ.get('ASYNC_DB_THREADS', '32'))
+
+# 저장소가 모두 메모리이면 핸들러를 이벤트 루프에서 바로 실행
+INLINE_HANDLERS = not database.data_db and database.TOKEN_BACKEND == 'memory'
+
+app = Quart(__name__)
+app.secret_key = secrets.token_hex(32)
+
+# 세션 설정 (개발 환경용)
+app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+app.config['SESSION_COOKIE_SECURE'] = False  # HTTPS가 아니므로 False
+app.config['SESSION_COOKIE_HTTPONLY'] = True
+app.config['PERMANENT_SESSION_LIFETIME'] = 3600  # 1시간
+
+_executor = None
+
+
+def _get_executor():
+    # hypercorn 워커마다 자기 스레드 풀을 갖도록 처음 사용할 때 생성
+    global _executor
+    if _executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _executor = ThreadPoolExecutor(max_workers=ASYNC_DB_THREADS, thread_name_prefix="async-db")
+    return _executor
+
+
+@app.before_serving
+async def startup():
+    # 만료된 code/token을 주기적으로 정리
+    start_token_sweeper()
+
+
+@app.before_request
+async def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+async def record_metrics(response):
+    """라우트별 요청 수 / 지연 시간 기록"""
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        HTTP_LATENCY.observe(time.perf_counter() - start, (route, request.method))
+        HTTP_REQUESTS.inc((route, request.method, response.status_code))
+    return response
+
+
+# CORS 허용 (개발용)
+@app.after_request
+async def after_request(response):
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+    response.headers.add('Access-Control-Allow-Methods', 'GET,POST,OPTIONS')
+    return response
+
+
+# ====================================
+# endpoints.py 핸들러 등록
+# ====================================
+
+def endpoint_view(route):
+    """endpoints 핸들러 → Quart async 뷰 함수"""
+    handler = route.handler
+    inline = INLINE_HANDLERS and not route.blocking
+
+    async def view(**kwargs):
+        # 스레드 풀에서는 요청 컨텍스트가 없으므로 프록시가 아닌 세션 객체를 넘김
+        req = Request(request.method, request.args, await request.form, await request.get_json(silent=True),
+                      request.headers, request.remote_addr, session._get_current_object(),
+                      request.if_none_match)
+        if inline:
+            result = handler(req, **kwargs)
+        else:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(_get_executor(), functools.partial(handler, req, **kwargs))
+
+        if isinstance(result, Template):
+            return await render_template(result.name, **result.context)
+        return app.response_class(result.body, status=result.status, headers=result.headers,
+                                  content_type=result.content_type)
+    return view
+
+
+for route in ROUTES:
+    app.add_url_rule(route.rule, route.handler.__name__, endpoint_view(route), methods=route.methods)
+
+
+if __name__ == '__main__':
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    print("\n" + "="*60)
+    print("🚀 OAuth2 Authorization Server 시작 (ASGI)")
+    print("="*60)
+    print(f"\n🌐 HOST IP: {config.HOST_IP}")
+    print(f"   - http://{config.HOST_IP}:5000/authorize")
+    print(f"   - http://{config.HOST_IP}:5000/token")
+    print(f"   - http://{config.HOST_IP}:5000/userinfo")
+    print("\n" + "="*60 + "\n")
+
+    server_config = Config()
+    server_config.bind = ["0.0.0.0:5000"]
+    server_config.backlog = 4096  # 동시 연결 수천 개를 받을 수 있도록
+    asyncio.run(serve(app, server_config))
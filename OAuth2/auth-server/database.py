@@ -5,56 +5,145 @@
 import secrets
 import os
 import sys
-from datetime import datetime, timedelta
+import tempfile
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime
 
 # config 모듈 import를 위한 경로 추가
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-from config import HOST_IP
+import config
 
-# 사용자 데이터베이스
-USERS = {
-    "user1": {
-        "password": "pass1",
-        "name": "홍길동",
-        "email": "user1@example.com",
-        "profile_image": "data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='150' height='150'%3E%3Crect width='150' height='150' fill='%234a90e2'/%3E%3Ctext x='50%25' y='50%25' dominant-baseline='middle' text-anchor='middle' font-family='sans-serif' font-size='60' fill='white'%3E홍%3C/text%3E%3C/svg%3E"
-    },
-    "user2": {
-        "password": "pass2",
-        "name": "김철수",
-        "email": "user2@example.com",
-        "profile_image": "data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='150' height='150'%3E%3Crect width='150' height='150' fill='%2350c878'/%3E%3Ctext x='50%25' y='50%25' dominant-baseline='middle' text-anchor='middle' font-family='sans-serif' font-size='60' fill='white'%3E김%3C/text%3E%3C/svg%3E"
-    }
-}
+from token_store import TokenStore, TokenSweeper
+from token_records import AccessToken, RefreshToken, AuthorizationCode, TokenFamily, AuthorizationRequest
+from scopes import SCOPES
+from sqlite_backend import SqliteDatabase, SqliteTokenStore
+from passwords import verify_password, verify_dummy_password
+from registry import RegistryFile, Client
+from profile_images import ImageStore
+from metrics import REGISTRY, TOKENS_ISSUED, TOKENS_VERIFIED, TOKENS_REVOKED, CLIENTS_REGISTERED
 
-# 등록된 클라이언트 애플리케이션
-CLIENTS = {
-    "client_backend": {
-        "client_secret": "secret_backend",
-        "client_type": "confidential",  # Confidential Client
-        "redirect_uris": [f"http://{HOST_IP}:8080/callback"],
-        "name": "Backend Web App",
-        "scopes": ["profile", "email"]
-    },
-    "client_spa": {
-        "client_secret": None,  # Public Client는 secret 없음
-        "client_type": "public",  # Public Client
-        "redirect_uris": [f"http://{HOST_IP}:8081/callback.html"],
-        "name": "SPA Application",
-        "scopes": ["profile", "email"]
-    }
-}
+# 저장소 백엔드: memory (기본, 재시작하면 사라짐) | sqlite (파일에 영속 저장)
+DB_BACKEND = os.environ.get('AUTH_DB_BACKEND', 'memory')
+DB_PATH = os.environ.get('AUTH_DB_PATH', os.path.join(os.path.dirname(__file__), 'oauth2.db'))
+
+# code/token 저장소 백엔드: 기본은 DB_BACKEND와 같음
+# shared로 설정하면 mmap 공유 테이블 사용 (prefork 멀티 워커용, serve_prefork.py 참고)
+TOKEN_BACKEND = os.environ.get('AUTH_TOKEN_BACKEND', DB_BACKEND)
+SHARED_TABLE_DIR = os.environ.get(
+    'SHARED_TABLE_DIR',
+    '/dev/shm/oauth2' if os.path.isdir('/dev/shm') else os.path.join(tempfile.gettempdir(), 'oauth2')
+)
+# 공유 테이블 크기: 버킷 수 * 버킷당 슬롯 수 = 슬롯 수 (two-choice 배치로 85% 정도까지 채울 수 있음)
+# 수명이 짧은 요청/code/Access Token은 SHARED_TABLE_BUCKETS (4096 * 16 = 65536 슬롯),
+# 30일 동안 남는 Refresh Token / 패밀리는 SHARED_TABLE_LONG_BUCKETS (32768 * 16 = 524288 슬롯, 파일 256MB)
+# 파일은 sparse라 실제로 쓰인 페이지만 메모리를 차지함
+SHARED_TABLE_BUCKETS = int(os.environ.get('SHARED_TABLE_BUCKETS', '4096'))
+SHARED_TABLE_LONG_BUCKETS = int(os.environ.get('SHARED_TABLE_LONG_BUCKETS', '32768'))
+SHARED_TABLE_SLOTS = int(os.environ.get('SHARED_TABLE_SLOTS', '16'))
+
+# Access Token 형식: opaque (저장소 조회) | jwt (서명 검증만, 저장소 없음)
+ACCESS_TOKEN_FORMAT = os.environ.get('ACCESS_TOKEN_FORMAT', 'opaque')
+ACCESS_TOKEN_LIFETIME = 3600  # 1시간
+REFRESH_TOKEN_LIFETIME = 30 * 24 * 3600  # 30일
+# PAR request_uri 유효 시간 (RFC 9126 권장: 짧게), 로그인/동의 화면에서 기다리는 시간
+PAR_REQUEST_LIFETIME = int(os.environ.get('PAR_REQUEST_LIFETIME', '60'))
+AUTH_REQUEST_LIFETIME = 600  # 10분
+MAX_STATE_LENGTH = 256  # 요청을 서버에 저장하므로 클라이언트가 보내는 state 길이 제한
+# 요청 검증 시점에는 로그인할 사용자를 모르므로 Authorization Code 크기는 이 길이의 user_id로 계산
+MAX_USER_ID_LENGTH = 64
+REQUEST_URI_PREFIX = "urn:ietf:params:oauth:request_uri:"
+
+# 만료 토큰 스위퍼 설정
+TOKEN_SWEEP_INTERVAL = float(os.environ.get('TOKEN_SWEEP_INTERVAL', '5'))  # 초
+TOKEN_SWEEP_BATCH_SIZE = int(os.environ.get('TOKEN_SWEEP_BATCH_SIZE', '1000'))
+
+# 사용자 / 클라이언트 레지스트리 파일 (registry.py 참고, 바뀌면 재시작 없이 다시 읽음)
+# 사용자 password: scrypt 해시 (초기 데이터는 평문 → 첫 로그인 때 해시로 교체됨)
+REGISTRY_FILE = os.environ.get('AUTH_REGISTRY_FILE', os.path.join(os.path.dirname(__file__), 'registry.json'))
+REGISTRY_CHECK_INTERVAL = float(os.environ.get('AUTH_REGISTRY_CHECK_INTERVAL', '1'))  # 초
+
+# SQLite 백엔드 (AUTH_DB_BACKEND 또는 AUTH_TOKEN_BACKEND가 sqlite일 때만 사용)
+sql_db = SqliteDatabase(DB_PATH) if 'sqlite' in (DB_BACKEND, TOKEN_BACKEND) else None
+# 사용자/클라이언트/게시물/설정을 SQLite에서 읽는지 여부
+data_db = sql_db if DB_BACKEND == 'sqlite' else None
+
+
+TOKEN_OWNER_FIELDS = ("user_id", "client_id")
+
+
+def _token_store(name, resolution=1, shared_buckets=SHARED_TABLE_BUCKETS):
+    """백엔드 설정에 맞는 토큰 저장소 생성"""
+    if TOKEN_BACKEND == 'shared':
+        from shared_token_table import SharedTokenTable
+        os.makedirs(SHARED_TABLE_DIR, exist_ok=True)
+        return SharedTokenTable(
+            os.path.join(SHARED_TABLE_DIR, f"{name}.tbl"), name=name,
+            buckets=shared_buckets, slots_per_bucket=SHARED_TABLE_SLOTS
+        )
+    if TOKEN_BACKEND == 'sqlite':
+        return SqliteTokenStore(sql_db, name)
+    # 사용자/클라이언트 단위 폐기용 보조 인덱스
+    return TokenStore(name, resolution=resolution, index_fields=TOKEN_OWNER_FIELDS)
+
+
+# 검증을 마친 Authorization 요청 (PAR request_uri / 로그인 중인 세션의 핸들)
+# 구조: {handle: AuthorizationRequest}
+# 쿠키 세션에는 핸들만 저장 → 요청 파라미터가 매 왕복마다 쿠키로 오가지 않음
+authorization_requests = _token_store("authorization_requests")
 
 # Authorization Code 저장소 (임시)
-# 구조: {code: {client_id, user_id, redirect_uri, expires_at, code_challenge, code_challenge_method}}
-authorization_codes = {}
+# 구조: {code: AuthorizationCode} (token_records.py)
+authorization_codes = _token_store("authorization_codes")
 
 # Access Token 저장소
-# 구조: {token: {user_id, client_id, scopes, expires_at}}
-access_tokens = {}
+# 구조: {token: AccessToken}
+access_tokens = _token_store("access_tokens")
 
-# Refresh Token 저장소
-refresh_tokens = {}
+# Refresh Token 저장소 (30일짜리라 버킷을 1분 단위로 묶음)
+# 구조: {token: RefreshToken}
+refresh_tokens = _token_store("refresh_tokens", resolution=60, shared_buckets=SHARED_TABLE_LONG_BUCKETS)
+
+# Refresh Token 패밀리 (하나의 로그인에서 회전으로 이어진 refresh token 묶음)
+# 구조: {family_id: TokenFamily}
+# 이미 사용된(회전된) refresh token이 다시 오면 패밀리 전체를 폐기
+token_families = _token_store("token_families", resolution=60, shared_buckets=SHARED_TABLE_LONG_BUCKETS)
+
+TOKEN_STORES = [authorization_requests, authorization_codes, access_tokens, refresh_tokens, token_families]
+
+REGISTRY.gauge(
+    "oauth2_token_store_size", "Live entries per token store", ("store",),
+    lambda: [((store.name,), len(store)) for store in TOKEN_STORES]
+)
+REGISTRY.gauge(
+    "oauth2_token_store_evicted_total", "Expired entries evicted per token store", ("store",),
+    lambda: [((store.name,), store.evicted) for store in TOKEN_STORES], kind="counter"
+)
+
+# 만료 토큰 백그라운드 스위퍼 (start_token_sweeper()로 시작)
+_token_sweeper = None
+
+# JWT 발급기 (ACCESS_TOKEN_FORMAT=jwt일 때만 사용, 서명 라이브러리도 이때만 import)
+# 서명 키를 유도할 마스터 비밀값은 JWT_KEY_SECRET이 없으면 워커들이 함께 보는 위치
+# (shared 테이블 디렉터리 / SQLite 파일 옆)의 파일에 한 번 만들어 공유, 메모리 백엔드는 프로세스 하나라 파일 없음
+if TOKEN_BACKEND == 'shared':
+    _default_key_secret_file = os.path.join(SHARED_TABLE_DIR, 'jwt_key.secret')
+elif 'sqlite' in (DB_BACKEND, TOKEN_BACKEND):
+    _default_key_secret_file = f"{DB_PATH}.jwt_key"
+else:
+    _default_key_secret_file = None
+JWT_KEY_SECRET_FILE = os.environ.get('JWT_KEY_SECRET_FILE', _default_key_secret_file)
+
+if ACCESS_TOKEN_FORMAT == 'jwt':
+    from jwt_tokens import JWTAccessTokens, looks_like_jwt, load_key_secret
+    jwt_access_tokens = JWTAccessTokens(
+        issuer=config.AUTHORIZATION_SERVER, lifetime=ACCESS_TOKEN_LIFETIME,
+        secret=load_key_secret(JWT_KEY_SECRET_FILE)
+    )
+else:
+    jwt_access_tokens = None
 
 # 사용자별 게시물 (예시 데이터)
 user_posts = {
@@ -81,136 +170,673 @@ user_settings = {
     }
 }
 
+# 사용자별 게시물 id 인덱스 (user_posts[user_id]와 같은 순서, 커서 위치를 bisect로 찾음)
+# id는 작성 순서대로 증가하므로 id 순서 = 작성 시각(created_at) 순서
+_post_ids = {user_id: [p["id"] for p in posts] for user_id, posts in user_posts.items()}
+# 사용자별 마지막 게시물 id (삭제가 생겨도 id를 재사용하지 않도록 len() 대신 시퀀스 사용)
+_post_id_seq = {user_id: max(ids, default=0) for user_id, ids in _post_ids.items()}
+_posts_lock = threading.Lock()
+
+# 사용자별 리소스 버전 (ETag 계산용) {user_id: {resource: version}}
+# 게시물 작성, 설정 변경, 로그인 때마다 해당 리소스 버전을 올림
+resource_versions = {}
+_instance_id = secrets.token_hex(8)
+
+if data_db:
+    data_db.seed(user_posts, user_settings)
+
+
+# 프로필 이미지 (콘텐츠 주소, /images/<hash>.<ext>로 제공)
+profile_images = ImageStore()
+
+
+# /userinfo로 나가는 사용자 필드 (레지스트리에서 바뀌면 "profile" 리소스 버전을 올려 ETag 무효화)
+PROFILE_FIELDS = ("name", "email", "profile_image")
+# 이 서버에서 로그인한 적이 없을 때의 last_login (레지스트리 파일, 바뀌면 "login" 버전을 올림)
+INITIAL_LAST_LOGIN_FIELD = "initial_last_login"
+REGISTRY_WATCH = ((PROFILE_FIELDS, "profile"), ((INITIAL_LAST_LOGIN_FIELD,), "login"))
+
+
+def _on_registry_load(snapshot):
+    """레지스트리 파일을 읽을 때마다: 프로필 이미지 등록, SQLite 백엔드면 파일 내용 반영"""
+    for user in snapshot.users.values():
+        profile_images.add_data_uri(user["profile_image"])
+    if data_db:
+        # 프로필 / 로그인 버전은 데이터와 같은 트랜잭션에서 올림
+        data_db.sync_registry(snapshot.users, {cid: c.dump() for cid, c in snapshot.clients.items()},
+                              watch=REGISTRY_WATCH)
+
+
+def _on_registry_swap(snapshot, previous):
+    """메모리 백엔드: 응답에 나가는 필드가 바뀌거나 삭제된 사용자의 리소스 버전을 올림 (새 스냅샷으로 교체한 뒤)"""
+    if data_db or previous is None:
+        return
+    for username, old in previous.users.items():
+        user = snapshot.users.get(username)
+        for fields, resource in REGISTRY_WATCH:
+            if user is None or any(old.get(field) != user.get(field) for field in fields):
+                _bump_resource_version(username, resource)
+
+
+# 처음 조회할 때 파일을 읽음 (import 시점에는 읽지 않음)
+registry = RegistryFile(REGISTRY_FILE, check_interval=REGISTRY_CHECK_INTERVAL,
+                        on_load=_on_registry_load, on_swap=_on_registry_swap)
+REGISTRY.gauge(
+    "oauth2_registry_reloads_total", "Registry file loads (including the first)", (),
+    lambda: [((), registry.reloads)], kind="counter"
+)
+REGISTRY.gauge(
+    "oauth2_profile_images", "Content-addressed profile images held in memory", (),
+    lambda: [((), len(profile_images))]
+)
+REGISTRY.gauge(
+    "oauth2_registry_errors_total", "Registry file loads that failed (previous contents kept)", (),
+    lambda: [((), registry.errors)], kind="counter"
+)
+
+# 동적 등록 클라이언트 (RFC 7591) {client_id: Client}
+# 메모리 백엔드만 사용 (워커별), SQLite 백엔드는 clients 테이블에 저장해서 워커 간 공유
+registered_clients = {}
+# 메모리 백엔드에 보관하는 동적 등록 클라이언트 수 상한 (열린 /register로 메모리가 끝없이 늘지 않도록)
+MAX_REGISTERED_CLIENTS = int(os.environ.get('MAX_REGISTERED_CLIENTS', '10000'))
+# SQLite 백엔드: 조회한 동적 등록 클라이언트 LRU (등록 후 바뀌지 않으므로 무효화 불필요)
+CLIENT_CACHE_SIZE = int(os.environ.get('CLIENT_CACHE_SIZE', '10000'))
+_client_cache = OrderedDict()
+_client_cache_lock = threading.Lock()
+REGISTRY.gauge(
+    "oauth2_registered_clients", "Dynamically registered clients held in memory", (),
+    lambda: [((), len(registered_clients))]
+)
+
+
+def _find_user(username):
+    if data_db:
+        registry.snapshot()  # 파일이 바뀌었으면 SQLite에 반영
+        return data_db.get_user(username)
+    return registry.users.get(username)
+
+
+def _find_client(client_id):
+    # 파일 클라이언트는 스냅샷에 미리 만든 Client 레코드 (SQLite에도 같은 내용이 있음)
+    client = registry.clients.get(client_id)
+    if client is not None:
+        return client
+    if data_db:
+        return _find_registered_client(client_id)
+    return registered_clients.get(client_id)
+
+
+def _find_registered_client(client_id):
+    with _client_cache_lock:
+        client = _client_cache.get(client_id)
+        if client is not None:
+            _client_cache.move_to_end(client_id)
+            return client
+    
+    data = data_db.get_client(client_id)
+    if not data:
+        return None
+    client = Client(client_id, **data)
+    with _client_cache_lock:
+        _client_cache[client_id] = client
+        while len(_client_cache) > CLIENT_CACHE_SIZE:
+            _client_cache.popitem(last=False)
+    return client
+
 
 def verify_user(username, password):
     """사용자 인증"""
-    user = USERS.get(username)
-    if user and user["password"] == password:
-        return username
-    return None
+    user = _find_user(username)
+    if not user:
+        # 있는 사용자와 같은 scrypt 비용을 들여 실패 (응답 시간으로 사용자 이름을 알아낼 수 없게)
+        verify_dummy_password(password)
+        return None
+    
+    ok, new_hash = verify_password(password, user["password"])
+    if not ok:
+        return None
+    
+    # 평문/약한 해시는 로그인 성공 시 현재 설정의 해시로 업그레이드
+    if new_hash:
+        if data_db:
+            data_db.update_user_password(username, new_hash)
+        else:
+            user["password"] = new_hash
+    
+    last_login = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if data_db:
+        data_db.update_user_last_login(username, last_login)
+    else:
+        user["last_login"] = last_login
+    _bump_resource_version(username, "login")
+    
+    return username
 
 
 def get_user(username):
     """사용자 정보 조회"""
-    user = USERS.get(username)
+    user = _find_user(username)
     if user:
         return {
             "username": username,
             "name": user["name"],
             "email": user["email"],
-            "profile_image": user["profile_image"]
+            "profile_image": profile_image_url(user["profile_image"])
         }
     return None
 
 
-def verify_client(client_id, client_secret=None):
-    """클라이언트 검증"""
-    client = CLIENTS.get(client_id)
+def profile_image_url(value):
+    """저장된 프로필 이미지(data URI) → 콘텐츠 주소 URL (data URI가 아니면 그대로)"""
+    name = profile_images.add_data_uri(value) if value.startswith("data:") else None
+    if name is None:
+        return value
+    return f"{config.AUTHORIZATION_SERVER}/images/{name}"
+
+
+def get_profile_image(name):
+    """/images/<name> 이미지 (없으면 None)"""
+    registry.snapshot()  # 이 워커가 아직 레지스트리를 읽지 않았으면 읽으면서 이미지 등록
+    return profile_images.get(name)
+
+
+def get_last_login(username):
+    """
+    마지막 로그인 시각
+    이 서버에서 로그인한 적이 없으면 레지스트리 파일의 initial_last_login (메모리 백엔드 재시작 후 등)
+    """
+    user = _find_user(username)
+    if not user:
+        return None
+    return user.get("last_login") or user.get(INITIAL_LAST_LOGIN_FIELD)
+
+
+def verify_client(client, client_secret=None):
+    """클라이언트 검증 (get_client로 조회한 Client)"""
     if not client:
         return False
     
-    # Public Client는 secret 검증 안 함
-    if client["client_type"] == "public":
-        return True
-    
-    # Confidential Client는 secret 검증 필수
-    return client.get("client_secret") == client_secret
+    # Public Client는 secret 검증 안 함, Confidential Client는 secret 검증 필수
+    return client.verify_secret(client_secret)
 
 
 def get_client(client_id):
-    """클라이언트 정보 조회"""
-    return CLIENTS.get(client_id)
+    """클라이언트 정보 조회 (Client 레코드, 없으면 None) - 요청당 한 번 조회해서 재사용"""
+    if not client_id:
+        return None
+    return _find_client(client_id)
 
 
-def verify_redirect_uri(client_id, redirect_uri):
-    """Redirect URI 검증 - 보안상 중요!"""
-    client = CLIENTS.get(client_id)
+def verify_redirect_uri(client, redirect_uri):
+    """Redirect URI 검증 - 보안상 중요! (미리 만든 정확히 일치 / 접두사 매처)"""
     if not client:
         return False
-    return redirect_uri in client["redirect_uris"]
+    return client.match_redirect_uri(redirect_uri)
+
+
+def register_client(metadata):
+    """
+    동적 클라이언트 등록 (RFC 7591)
+    metadata: registry.validate_client_metadata로 검증한 값
+    반환값: Client (Confidential이면 client_secret 발급), 메모리 백엔드 상한에 닿았으면 None
+    """
+    if not data_db and len(registered_clients) >= MAX_REGISTERED_CLIENTS:
+        return None
+    client_type = "public" if metadata["token_endpoint_auth_method"] == "none" else "confidential"
+    client = Client(
+        client_id=f"dyn_{secrets.token_urlsafe(16)}",
+        client_type=client_type,
+        client_secret=secrets.token_urlsafe(32) if client_type == "confidential" else None,
+        redirect_uris=metadata["redirect_uris"],
+        name=metadata["client_name"],
+        scopes=metadata["scope"].split(),
+        issued_at=int(time.time())
+    )
+    if data_db:
+        data_db.add_client(client.client_id, client.dump())
+    else:
+        registered_clients[client.client_id] = client
+    CLIENTS_REGISTERED.inc((client_type,))
+    return client
+
+
+def get_user_posts(user_id):
+    """사용자 게시물 목록"""
+    if data_db:
+        return data_db.get_posts(user_id)
+    return user_posts.get(user_id, [])
+
+
+def get_user_posts_page(user_id, limit, after=None, before=None):
+    """
+    id 커서 기반 게시물 페이지 (id 오름차순)
+    - after: 이 id보다 큰 게시물부터 limit개
+    - before: 이 id보다 작은 게시물까지 (before만 주면 바로 앞의 limit개)
+    반환: (게시물 목록, 앞쪽에 게시물이 더 있는지, 뒤쪽에 게시물이 더 있는지)
+    """
+    if data_db:
+        return data_db.get_posts_page(user_id, limit, after, before)
+    
+    posts = user_posts.get(user_id, [])
+    ids = _post_ids.get(user_id, [])
+    total = len(ids)
+    lo = bisect_right(ids, after, 0, total) if after is not None else 0
+    hi = bisect_left(ids, before, 0, total) if before is not None else total
+    if before is not None and after is None:
+        start, end = max(lo, hi - limit), hi
+    else:
+        start, end = lo, min(hi, lo + limit)
+    return posts[start:end], start > 0, end < total
+
+
+def count_user_posts(user_id):
+    """사용자 게시물 수"""
+    if data_db:
+        return data_db.count_posts(user_id)
+    return len(_post_ids.get(user_id, ()))
+
+
+def add_user_post(user_id, title, content):
+    """게시물 추가"""
+    created_at = datetime.now().strftime("%Y-%m-%d")
+    if data_db:
+        new_post = data_db.add_post(user_id, title, content, created_at)
+        _bump_resource_version(user_id, "posts")
+        return new_post
+    
+    with _posts_lock:
+        post_id = _post_id_seq.get(user_id, 0) + 1
+        _post_id_seq[user_id] = post_id
+        new_post = {
+            "id": post_id,
+            "title": title,
+            "content": content,
+            "created_at": created_at
+        }
+        # 게시물 먼저, id 인덱스는 나중에 추가 (잠금 없이 읽는 쪽이 인덱스 범위를 벗어나지 않도록)
+        user_posts.setdefault(user_id, []).append(new_post)
+        _post_ids.setdefault(user_id, []).append(post_id)
+    _bump_resource_version(user_id, "posts")
+    return new_post
+
+
+def get_user_settings(user_id):
+    """사용자 설정 조회"""
+    if data_db:
+        return data_db.get_settings(user_id)
+    return user_settings.get(user_id, {})
+
+
+def update_user_settings(user_id, data):
+    """사용자 설정 업데이트 (변경 후 전체 설정 반환)"""
+    if data_db:
+        settings = data_db.update_settings(user_id, data)
+    else:
+        settings = user_settings.setdefault(user_id, {})
+        settings.update(data)
+    _bump_resource_version(user_id, "settings")
+    return settings
+
+
+def get_resource_versions(user_id):
+    """사용자 리소스 버전 {resource: version} (한 번도 바뀌지 않은 리소스는 없음 = 0)"""
+    # 레지스트리 파일이 바뀌었으면 먼저 반영 ("profile" 버전이 오른 뒤에 ETag 계산)
+    registry.snapshot()
+    if data_db:
+        return data_db.get_versions(user_id)
+    return resource_versions.get(user_id, {})
+
+
+def _bump_resource_version(user_id, resource):
+    # 데이터를 바꾼 뒤에 올린다 (먼저 올리면 옛 데이터가 새 버전으로 캐시될 수 있음)
+    if data_db:
+        data_db.bump_version(user_id, resource)
+        return
+    versions = resource_versions.setdefault(user_id, {})
+    versions[resource] = versions.get(resource, 0) + 1
+
+
+def resource_version_namespace():
+    """
+    버전 번호가 유효한 범위
+    SQLite는 DB 파일 하나를 모든 워커가 공유, 메모리 백엔드는 프로세스마다 데이터가 따로
+    """
+    if data_db:
+        return DB_PATH
+    return f"{_instance_id}:{os.getpid()}"
+
+
+def save_authorization_request(client_id, redirect_uri, scopes, state=None,
+                               code_challenge=None, code_challenge_method=None,
+                               lifetime=AUTH_REQUEST_LIFETIME):
+    """검증을 마친 authorization 요청 저장, 핸들 반환"""
+    handle = secrets.token_urlsafe(24)
+    authorization_requests[handle] = AuthorizationRequest(
+        client_id, redirect_uri, SCOPES.mask(scopes), state,
+        code_challenge, code_challenge_method, time.time() + lifetime
+    )
+    return handle
+
+
+def authorization_request_fits(client_id, redirect_uri, scopes, state=None,
+                               code_challenge=None, code_challenge_method=None):
+    """
+    요청과 이후 발급할 Authorization Code를 토큰 저장소에 저장할 수 있는지
+    shared 백엔드는 슬롯 크기가 고정이므로 저장하기 전에 확인 (긴 state / redirect_uri / code_challenge)
+    """
+    scope_mask = SCOPES.mask(scopes)
+    auth_request = AuthorizationRequest(client_id, redirect_uri, scope_mask, state,
+                                        code_challenge, code_challenge_method, 0)
+    auth_code = AuthorizationCode(client_id, "u" * MAX_USER_ID_LENGTH, redirect_uri, scope_mask,
+                                  code_challenge, code_challenge_method, 0)
+    return authorization_requests.fits(auth_request) and authorization_codes.fits(auth_code)
+
+
+def get_authorization_request(handle):
+    """핸들 → AuthorizationRequest (없거나 만료되면 None)"""
+    auth_request = authorization_requests.get(handle) if handle else None
+    if auth_request is None:
+        return None
+    if time.time() > auth_request.expires_at:
+        authorization_requests.evict(handle)
+        return None
+    return auth_request
+
+
+def delete_authorization_request(handle):
+    if handle:
+        authorization_requests.pop(handle)
+
+
+def push_authorization_request(client_id, redirect_uri, scopes, state=None,
+                               code_challenge=None, code_challenge_method=None):
+    """
+    Pushed Authorization Request 저장 (RFC 9126)
+    반환값: request_uri (urn:ietf:params:oauth:request_uri:<핸들>)
+    """
+    handle = save_authorization_request(client_id, redirect_uri, scopes, state,
+                                        code_challenge, code_challenge_method,
+                                        lifetime=PAR_REQUEST_LIFETIME)
+    return REQUEST_URI_PREFIX + handle
+
+
+def resume_pushed_request(request_uri, client_id):
+    """
+    /authorize?request_uri=... 처리
+    request_uri는 한 번만 사용 가능 → 로그인 화면용 새 핸들(AUTH_REQUEST_LIFETIME)로 옮겨 저장
+    반환값: (AuthorizationRequest, 새 핸들) 또는 (None, None)
+    """
+    if not request_uri or not request_uri.startswith(REQUEST_URI_PREFIX):
+        return None, None
+    handle = request_uri[len(REQUEST_URI_PREFIX):]
+    
+    # 다른 클라이언트가 보낸 request_uri는 소비하지 않고 거부
+    pushed = authorization_requests.get(handle)
+    if pushed is None or pushed.client_id != client_id:
+        return None, None
+    
+    # pop은 저장소 단위로 원자적 → 같은 request_uri로 동시에 와도 하나만 통과
+    pushed = authorization_requests.pop(handle)
+    if pushed is None or time.time() > pushed.expires_at:
+        return None, None
+    
+    pushed.expires_at = int(time.time() + AUTH_REQUEST_LIFETIME)
+    handle = secrets.token_urlsafe(24)
+    authorization_requests[handle] = pushed
+    return pushed, handle
 
 
 def generate_authorization_code(client_id, user_id, redirect_uri, scopes, 
                                 code_challenge=None, code_challenge_method=None):
     """Authorization Code 생성"""
     code = secrets.token_urlsafe(32)
-    authorization_codes[code] = {
-        "client_id": client_id,
-        "user_id": user_id,
-        "redirect_uri": redirect_uri,
-        "scopes": scopes,
-        "expires_at": datetime.now() + timedelta(minutes=10),
-        "code_challenge": code_challenge,
-        "code_challenge_method": code_challenge_method
-    }
+    authorization_codes[code] = AuthorizationCode(
+        client_id, user_id, redirect_uri, SCOPES.mask(scopes),
+        code_challenge, code_challenge_method,
+        time.time() + 600  # 10분
+    )
+    TOKENS_ISSUED.inc(("authorization_code",))
     return code
 
 
 def verify_authorization_code(code, client_id, redirect_uri):
     """Authorization Code 검증"""
-    auth_code = authorization_codes.get(code)
+    # 먼저 꺼내서 점유 (일회용): pop은 저장소 단위로 원자적 → 같은 code로 여러 워커에 동시에 교환해도 하나만 통과
+    auth_code = authorization_codes.pop(code)
     
     if not auth_code:
         return None, "Invalid authorization code"
     
     # 만료 확인
-    if datetime.now() > auth_code["expires_at"]:
-        del authorization_codes[code]
+    if time.time() > auth_code.expires_at:
+        authorization_codes.evicted += 1
         return None, "Authorization code expired"
     
-    # Client ID 확인
-    if auth_code["client_id"] != client_id:
+    # Client ID / Redirect URI가 다르면 정상 클라이언트가 쓸 수 있도록 되돌려 놓음
+    if auth_code.client_id != client_id:
+        authorization_codes[code] = auth_code
         return None, "Client ID mismatch"
     
     # Redirect URI 확인 (보안상 중요!)
-    if auth_code["redirect_uri"] != redirect_uri:
+    if auth_code.redirect_uri != redirect_uri:
+        authorization_codes[code] = auth_code
         return None, "Redirect URI mismatch"
     
-    # 사용된 코드는 삭제 (일회용)
-    del authorization_codes[code]
-    
     return auth_code, None
 
 
-def generate_access_token(user_id, client_id, scopes):
+def create_token_family(user_id, client_id):
+    """새 refresh token 패밀리 생성 (authorization_code 교환 시 1번)"""
+    family_id = secrets.token_urlsafe(16)
+    token_families[family_id] = TokenFamily(
+        user_id, client_id, False, time.time() + REFRESH_TOKEN_LIFETIME
+    )
+    return family_id
+
+
+def _family_revoked(family_id):
+    family = token_families.get(family_id)
+    return not family or family.revoked
+
+
+def revoke_token_family(family_id):
+    """패밀리 폐기: 소속된 refresh token과 access token이 모두 무효가 됨"""
+    family = token_families.get(family_id)
+    if family and not family.revoked:
+        family.revoked = True
+        token_families[family_id] = family
+
+
+def revoke_token(token, client_id, token_type_hint=None):
+    """
+    토큰 하나 폐기 (RFC 7009)
+    - refresh token: 패밀리 전체 폐기 → 같은 grant로 발급된 access token도 무효
+    - access token (opaque): 해당 토큰만 삭제
+    - 모르는 토큰은 이미 무효이므로 성공으로 처리
+    반환값: (폐기한 토큰 종류 또는 None, error)
+    """
+    if jwt_access_tokens and looks_like_jwt(token):
+        # 자체 검증 토큰은 저장소에 없으므로 만료 전에는 폐기할 수 없음
+        return None, "unsupported_token_type"
+    
+    stores = [(refresh_tokens, "refresh_token"), (access_tokens, "access_token")]
+    if token_type_hint == "access_token":
+        stores.reverse()
+    
+    for store, kind in stores:
+        token_data = store.get(token)
+        if token_data is None:
+            continue
+        # 다른 클라이언트에 발급된 토큰은 폐기할 수 없음
+        if token_data.client_id != client_id:
+            return None, "unauthorized_client"
+        store.pop(token)
+        if kind == "refresh_token":
+            revoke_token_family(token_data.family_id)
+        TOKENS_REVOKED.inc((store.name, "revoke"))
+        return kind, None
+    
+    return None, None
+
+
+def _revoke_by(field, value):
+    """field 값이 value인 code / token / 패밀리 모두 삭제, 저장소별 삭제 수 반환"""
+    removed = {}
+    for store in TOKEN_STORES:
+        count = store.remove_by(field, value)
+        if count:
+            TOKENS_REVOKED.inc((store.name, field), count)
+        removed[store.name] = count
+    return removed
+
+
+def revoke_user_tokens(user_id):
+    """사용자의 모든 code / token 폐기 (로그아웃, 계정 정지 등)"""
+    return _revoke_by("user_id", user_id)
+
+
+def revoke_client_tokens(client_id):
+    """클라이언트에 발급된 모든 code / token 폐기 (클라이언트 비활성화 등)"""
+    return _revoke_by("client_id", client_id)
+
+
+def generate_access_token(user_id, client_id, scopes, family_id=None):
     """Access Token 생성"""
+    TOKENS_ISSUED.inc(("access_token",))
+    if jwt_access_tokens:
+        # 자체 검증 토큰은 저장하지 않음
+        return jwt_access_tokens.issue(user_id, client_id, scopes)
+    
     token = secrets.token_urlsafe(32)
-    access_tokens[token] = {
-        "user_id": user_id,
-        "client_id": client_id,
-        "scopes": scopes,
-        "expires_at": datetime.now() + timedelta(hours=1)
-    }
+    access_tokens[token] = AccessToken(
+        user_id, client_id, SCOPES.mask(scopes), family_id, time.time() + ACCESS_TOKEN_LIFETIME
+    )
     return token
 
 
-def generate_refresh_token(user_id, client_id, scopes):
+def generate_refresh_token(user_id, client_id, scopes, family_id=None):
     """Refresh Token 생성"""
+    if family_id is None:
+        family_id = create_token_family(user_id, client_id)
+    
     token = secrets.token_urlsafe(32)
-    refresh_tokens[token] = {
-        "user_id": user_id,
-        "client_id": client_id,
-        "scopes": scopes,
-        "expires_at": datetime.now() + timedelta(days=30)
-    }
+    refresh_tokens[token] = RefreshToken(
+        user_id, client_id, SCOPES.mask(scopes), family_id, False, time.time() + REFRESH_TOKEN_LIFETIME
+    )
+    TOKENS_ISSUED.inc(("refresh_token",))
     return token
 
 
+def rotate_refresh_token(refresh_token, client_id, scopes=None):
+    """
+    Refresh Token 회전
+    사용된 refresh token은 'rotated' 표시 후 만료 때까지 남겨 재사용을 감지한다
+    반환값: ({access_token, refresh_token, scopes}, None) 또는 (None, error)
+    """
+    # pop은 저장소 단위로 원자적 → 같은 토큰으로 동시에 요청해도 하나만 통과
+    token_data = refresh_tokens.pop(refresh_token)
+    
+    if not token_data:
+        return None, "Invalid refresh token"
+    
+    if time.time() > token_data.expires_at:
+        return None, "Refresh token expired"
+    
+    if token_data.client_id != client_id:
+        refresh_tokens[refresh_token] = token_data
+        return None, "Client ID mismatch"
+    
+    family_id = token_data.family_id
+    
+    # 이미 회전된 토큰 재사용 → 탈취 가능성, 패밀리 전체 폐기
+    if token_data.rotated:
+        refresh_tokens[refresh_token] = token_data
+        revoke_token_family(family_id)
+        return None, "Refresh token reuse detected"
+    
+    token_data.rotated = True
+    refresh_tokens[refresh_token] = token_data
+    
+    if _family_revoked(family_id):
+        return None, "Refresh token revoked"
+    
+    # scope 축소만 허용 (RFC 6749 Section 6): 요청 비트가 원래 grant 비트의 부분집합
+    if scopes is None:
+        scopes = token_data.scopes
+    elif SCOPES.unknown(scopes) or SCOPES.mask(scopes) & ~token_data.scope_mask:
+        return None, "Requested scope exceeds original grant"
+    
+    # 패밀리 만료 시간 연장
+    family = token_families.get(family_id)
+    family.expires_at = int(time.time() + REFRESH_TOKEN_LIFETIME)
+    token_families[family_id] = family
+    
+    user_id = token_data.user_id
+    return {
+        "access_token": generate_access_token(user_id, client_id, scopes, family_id=family_id),
+        # 새 refresh token은 원래 grant의 scope를 유지
+        "refresh_token": generate_refresh_token(user_id, client_id, token_data.scopes, family_id=family_id),
+        "scopes": scopes
+    }, None
+
+
+# verify 에러 메시지 → 메트릭 라벨
+_VERIFY_RESULTS = {None: "valid", "Token expired": "expired", "Token revoked": "revoked"}
+
+
 def verify_access_token(token):
     """Access Token 검증"""
+    token_data, error = _check_access_token(token)
+    TOKENS_VERIFIED.inc((_VERIFY_RESULTS.get(error, "invalid"),))
+    return token_data, error
+
+
+def _check_access_token(token):
+    if jwt_access_tokens and looks_like_jwt(token):
+        return jwt_access_tokens.verify(token)
+    
     token_data = access_tokens.get(token)
     
     if not token_data:
         return None, "Invalid token"
     
-    # 만료 확인
-    if datetime.now() > token_data["expires_at"]:
-        del access_tokens[token]
+    # 만료 확인 (정수 epoch 비교)
+    if time.time() > token_data.expires_at:
+        access_tokens.evict(token)
         return None, "Token expired"
     
+    # refresh token 재사용으로 폐기된 패밀리의 토큰
+    if token_data.family_id and _family_revoked(token_data.family_id):
+        return None, "Token revoked"
+    
     return token_data, None
 
 
+def start_token_sweeper(interval=None, batch_size=None):
+    """만료 토큰 백그라운드 스위퍼 시작 (이미 실행 중이면 그대로 반환)"""
+    global _token_sweeper
+    if _token_sweeper is None or not _token_sweeper.is_alive():
+        _token_sweeper = TokenSweeper(
+            TOKEN_STORES,
+            interval=interval or TOKEN_SWEEP_INTERVAL,
+            batch_size=batch_size or TOKEN_SWEEP_BATCH_SIZE
+        )
+        _token_sweeper.start()
+    return _token_sweeper
+
+
+def get_token_store_stats():
+    """토큰 저장소별 live / evicted 개수"""
+    return [store.stats() for store in TOKEN_STORES]
+
+
+def get_jwks():
+    """JWT 검증용 공개키 (JWKS)"""
+    if not jwt_access_tokens:
+        return {"keys": []}
+    return jwt_access_tokens.keys.jwks()
+
+
 def verify_code_challenge(code_verifier, code_challenge, method="S256"):
     """PKCE Code Challenge 검증"""
     import hashlib
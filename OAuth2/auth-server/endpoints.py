@@ -0,0 +1,1092 @@
+"""
+OAuth2 Authorization Server + Resource Server 엔드포인트 (프레임워크 공통)
+
+파라미터 검증, 저장소 호출, 응답 본문 생성은 모두 여기에 한 번만 구현
+- app.py (Flask/WSGI)와 asgi_app.py (Quart/ASGI)는 요청을 Request로 바꿔 핸들러를 호출하고
+  결과(Response / Template)를 프레임워크 응답으로 바꾸는 어댑터만 가짐
+- 핸들러는 동기 함수: ASGI 어댑터는 저장소가 블로킹이면 (SQLite / shared, 로그인의 scrypt 등) 스레드 풀에서 실행
+- 라우트는 @route로 ROUTES에 등록 → 두 앱이 같은 목록으로 URL 규칙을 만듦
+"""
+import json
+import math
+import os
+import secrets
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from jsonlog import get_logger
+from metrics import REGISTRY, PKCE_FAILURES
+from etag_cache import response_cache, CACHE_CONTROL
+from profile_images import IMMUTABLE_CACHE_CONTROL, IMAGE_CSP
+import rate_limit
+from scopes import SCOPES, USERINFO_CLAIMS
+from registry import validate_client_metadata, ClientMetadataError
+from token_store import TokenStoreFull
+
+from database import (
+    verify_user, get_user, verify_client, get_client,
+    verify_redirect_uri, generate_authorization_code,
+    verify_authorization_code, generate_access_token,
+    generate_refresh_token, verify_access_token,
+    save_authorization_request, get_authorization_request, delete_authorization_request,
+    push_authorization_request, resume_pushed_request, PAR_REQUEST_LIFETIME, MAX_STATE_LENGTH,
+    authorization_request_fits,
+    verify_code_challenge, get_jwks, ACCESS_TOKEN_LIFETIME,
+    get_user_posts_page, count_user_posts, add_user_post, get_user_settings, update_user_settings,
+    create_token_family, rotate_refresh_token,
+    revoke_token, revoke_user_tokens, revoke_client_tokens, register_client,
+    get_last_login, get_resource_versions, resource_version_namespace, get_profile_image,
+    TOKEN_SWEEP_INTERVAL
+)
+
+log = get_logger("auth-server")
+
+# Batch Introspection 설정
+INTROSPECT_BATCH_MAX = int(os.environ.get('INTROSPECT_BATCH_MAX', '100'))
+INTROSPECT_CACHE_TTL = int(os.environ.get('INTROSPECT_CACHE_TTL', '60'))  # 초
+
+# /api/posts 페이지 크기
+POSTS_PAGE_SIZE = int(os.environ.get('POSTS_PAGE_SIZE', '20'))
+POSTS_PAGE_MAX = int(os.environ.get('POSTS_PAGE_MAX', '100'))
+
+# 관리 API (/admin/*) Bearer 토큰, 설정하지 않으면 관리 API 비활성화
+ADMIN_API_TOKEN = os.environ.get('ADMIN_API_TOKEN')
+# 동적 클라이언트 등록(/register) 초기 액세스 토큰 (RFC 7591 Section 3), 설정하지 않으면 /register 비활성화
+CLIENT_REGISTRATION_TOKEN = os.environ.get('CLIENT_REGISTRATION_TOKEN')
+# 토큰 없이 누구나 등록 (개발용, 메모리 백엔드는 MAX_REGISTERED_CLIENTS까지)
+CLIENT_REGISTRATION_OPEN = os.environ.get('CLIENT_REGISTRATION_OPEN', '0') != '0'
+
+JSON_MIMETYPE = 'application/json'
+METRICS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+# ====================================
+# 요청 / 응답 (어댑터와 주고받는 값)
+# ====================================
+
+class Request:
+    """어댑터가 프레임워크 요청에서 뽑아 넘기는 값"""
+    __slots__ = ("method", "args", "form", "json", "headers", "remote_addr", "session", "if_none_match")
+
+    def __init__(self, method, args, form, json, headers, remote_addr, session, if_none_match):
+        self.method = method
+        self.args = args
+        self.form = form
+        self.json = json  # JSON 본문 (없거나 잘못된 JSON이면 None)
+        self.headers = headers
+        self.remote_addr = remote_addr
+        self.session = session  # 쿠키 세션 (dict처럼 사용, permanent 속성)
+        self.if_none_match = if_none_match  # werkzeug ETags
+
+
+class Response:
+    __slots__ = ("body", "status", "headers", "content_type")
+
+    def __init__(self, body=b"", status=200, headers=None, content_type=None):
+        self.body = body
+        self.status = status
+        self.headers = headers or {}
+        self.content_type = content_type
+
+
+class Template:
+    """어댑터가 렌더링할 템플릿 (templates/)"""
+    __slots__ = ("name", "context")
+
+    def __init__(self, name, **context):
+        self.name = name
+        self.context = context
+
+
+def encode_json(data):
+    """Flask jsonify와 같은 바이트 (키 정렬, 공백 없음, 끝에 줄바꿈)"""
+    return json.dumps(data, ensure_ascii=True, sort_keys=True, separators=(",", ":")).encode() + b"\n"
+
+
+def json_response(data, status=200, headers=None):
+    return Response(encode_json(data), status, headers, JSON_MIMETYPE)
+
+
+def redirect_to(url):
+    return Response(b"", 302, {'Location': url})
+
+
+# ====================================
+# 라우트 목록
+# ====================================
+
+class Route:
+    __slots__ = ("rule", "methods", "handler", "blocking")
+
+    def __init__(self, rule, methods, handler, blocking):
+        self.rule = rule
+        self.methods = methods
+        self.handler = handler
+        self.blocking = blocking
+
+
+ROUTES = []
+
+
+def route(rule, methods=('GET',), blocking=False):
+    """
+    핸들러 등록 (handler(request, **URL 변수) → Response / Template)
+    blocking: 저장소 백엔드와 관계없이 오래 걸리는 핸들러 (ASGI에서 항상 스레드 풀로 실행)
+    """
+    def decorator(handler):
+        ROUTES.append(Route(rule, tuple(methods), store_full_as_503(handler), blocking))
+        return handler
+    return decorator
+
+
+def store_full_as_503(handler):
+    """
+    고정 크기 토큰 저장소(공유 테이블)가 가득 차면 500 대신 503 + Retry-After
+    만료 항목은 스위퍼가 비우므로 스윕 주기 뒤에 다시 시도하면 성공할 수 있음
+    """
+    @wraps(handler)
+    def wrapper(req, **kwargs):
+        try:
+            return handler(req, **kwargs)
+        except TokenStoreFull as e:
+            log.error("token_store_full", route=handler.__name__, error=str(e))
+            return json_response({
+                "error": "temporarily_unavailable",
+                "error_description": "Token storage is full. Retry later."
+            }, 503, {'Retry-After': str(max(1, math.ceil(TOKEN_SWEEP_INTERVAL)))})
+    return wrapper
+
+
+@route('/')
+def index(req):
+    """서버 상태 확인"""
+    return json_response({
+        "service": "OAuth2 Authorization Server",
+        "status": "running",
+        "endpoints": {
+            "authorize": "/authorize",
+            "par": "/par",
+            "token": "/token",
+            "revoke": "/revoke",
+            "userinfo": "/userinfo",
+            "jwks": "/.well-known/jwks.json",
+            "metrics": "/metrics"
+        }
+    })
+
+
+@route('/metrics')
+def metrics(req):
+    """Prometheus 메트릭 (워커 프로세스별 값)"""
+    return Response(REGISTRY.render(), 200, None, METRICS_MIMETYPE)
+
+
+@route('/.well-known/jwks.json')
+def jwks(req):
+    """
+    JWKS Endpoint
+    JWT Access Token(ES256) 서명 검증용 공개키 목록
+    """
+    return json_response(get_jwks())
+
+
+# ====================================
+# 요청 수 제한 (Token Bucket)
+# ====================================
+
+def rate_limited(*checks):
+    """
+    checks: (limiter, key) 또는 (limiter, key, cost)
+    하나라도 한도를 넘으면 429 응답 (Retry-After 포함), 모두 통과하면 None
+    """
+    if not rate_limit.RATE_LIMIT_ENABLED:
+        return None
+    for limiter, key, *cost in checks:
+        if not key:
+            continue
+        retry_after = limiter.hit(key, *cost)
+        if retry_after:
+            log.warning("rate_limited", limiter=limiter.name, key=key, retry_after=round(retry_after, 1))
+            return json_response({
+                "error": "too_many_requests",
+                "error_description": "Rate limit exceeded. Retry later."
+            }, 429, {'Retry-After': str(math.ceil(retry_after))})
+    return None
+
+
+# ====================================
+# Authorization Server
+# ====================================
+
+def validate_authorization_request(client_id, redirect_uri, response_type, scope, state, code_challenge,
+                                   code_challenge_method='S256'):
+    """
+    /authorize와 /par 공통 파라미터 검증
+    반환값: (client, None) 또는 (None, 에러 응답)
+    """
+    # 필수 파라미터 검증
+    if not client_id or not redirect_uri:
+        return None, json_response({"error": "invalid_request", "error_description": "Missing required parameters"}, 400)
+
+    # 클라이언트 검증
+    client = get_client(client_id)
+    if not client:
+        return None, json_response({"error": "invalid_client", "error_description": "Unknown client"}, 401)
+
+    # Redirect URI 검증 (보안상 매우 중요!)
+    if not verify_redirect_uri(client, redirect_uri):
+        return None, json_response({"error": "invalid_request", "error_description": "Invalid redirect_uri"}, 400)
+
+    # Response type 검증 (현재는 code만 지원)
+    if response_type != 'code':
+        return None, json_response({"error": "unsupported_response_type"}, 400)
+
+    # 등록되지 않은 scope 거부 (토큰에는 비트마스크로 저장하므로 모르는 scope는 표현 불가)
+    unknown_scopes = SCOPES.unknown(scope.split())
+    if unknown_scopes:
+        return None, json_response({"error": "invalid_scope",
+                                    "error_description": f"Unknown scope: {' '.join(unknown_scopes)}"}, 400)
+
+    # 클라이언트에 등록된 scope만 요청 가능 (등록 때 profile만 받은 클라이언트는 email 요청 불가)
+    disallowed_scopes = [s for s in scope.split() if s not in client.scopes]
+    if disallowed_scopes:
+        return None, json_response({"error": "invalid_scope",
+                                    "error_description": f"Scope not allowed for client: {' '.join(disallowed_scopes)}"}, 400)
+
+    # Public Client는 PKCE 필수
+    if client.is_public and not code_challenge:
+        return None, json_response({"error": "invalid_request",
+                                    "error_description": "PKCE required for public clients"}, 400)
+
+    # 요청은 서버에 저장되므로 길이 제한
+    if state and len(state) > MAX_STATE_LENGTH:
+        return None, json_response({"error": "invalid_request", "error_description": "state is too long"}, 400)
+
+    # shared 저장소 슬롯에 들어가지 않는 요청은 저장 전에 거부 (긴 redirect_uri / 한글 state 등)
+    if not authorization_request_fits(client_id, redirect_uri, scope.split(), state,
+                                      code_challenge, code_challenge_method):
+        return None, json_response({"error": "invalid_request",
+                                    "error_description": "Authorization request is too large"}, 400)
+
+    return client, None
+
+
+@route('/par', methods=['POST'])
+def pushed_authorization_request(req):
+    """
+    Pushed Authorization Request Endpoint (RFC 9126)
+    클라이언트가 authorization 요청 파라미터를 미리 POST하고 짧은 request_uri를 받음
+    → /authorize?client_id=...&request_uri=... 로 리다이렉트 URL이 짧아지고,
+      파라미터가 브라우저를 거치지 않으므로 변조할 수 없음
+    """
+    form = req.form
+    client_id = form.get('client_id')
+    limited = rate_limited((rate_limit.token_ip, req.remote_addr),
+                           (rate_limit.token_client, client_id))
+    if limited:
+        return limited
+
+    # request_uri를 다시 push할 수는 없음 (RFC 9126 Section 2.1)
+    if 'request_uri' in form:
+        return json_response({"error": "invalid_request", "error_description": "request_uri is not allowed"}, 400)
+
+    redirect_uri = form.get('redirect_uri')
+    scope = form.get('scope', 'profile email')
+    code_challenge = form.get('code_challenge')
+    code_challenge_method = form.get('code_challenge_method', 'S256')
+
+    client, error = validate_authorization_request(
+        client_id, redirect_uri, form.get('response_type', 'code'), scope,
+        form.get('state'), code_challenge, code_challenge_method
+    )
+    if error:
+        return error
+
+    # Confidential Client는 /token과 같이 client_secret으로 인증
+    if not verify_client(client, form.get('client_secret')):
+        return json_response({"error": "invalid_client", "error_description": "Invalid client credentials"}, 401)
+
+    request_uri = push_authorization_request(
+        client_id, redirect_uri, scope.split(),
+        state=form.get('state'),
+        code_challenge=code_challenge,
+        code_challenge_method=code_challenge_method
+    )
+    log.info("authorization_request_pushed", client=client_id)
+
+    return json_response({"request_uri": request_uri, "expires_in": PAR_REQUEST_LIFETIME}, 201)
+
+
+@route('/register', methods=['POST'])
+def register(req):
+    """
+    Dynamic Client Registration Endpoint (RFC 7591)
+    요청: JSON 클라이언트 메타데이터 (redirect_uris 필수)
+    응답: 201 + client_id (Confidential이면 client_secret) + 등록된 메타데이터
+    """
+    limited = rate_limited((rate_limit.register_ip, req.remote_addr))
+    if limited:
+        return limited
+
+    if CLIENT_REGISTRATION_TOKEN:
+        auth_header = req.headers.get('Authorization', '')
+        if not secrets.compare_digest(auth_header, f"Bearer {CLIENT_REGISTRATION_TOKEN}"):
+            return json_response({"error": "invalid_token"}, 401)
+    elif not CLIENT_REGISTRATION_OPEN:
+        return json_response({"error": "access_denied",
+                              "error_description": "Client registration requires an initial access token"}, 403)
+
+    try:
+        metadata = validate_client_metadata(req.json, SCOPES, 'profile email')
+    except ClientMetadataError as e:
+        return json_response({"error": e.error, "error_description": e.description}, 400)
+
+    client = register_client(metadata)
+    if client is None:
+        return json_response({"error": "access_denied",
+                              "error_description": "Client registration limit reached"}, 403)
+    log.info("client_registered",
+             client=client.client_id,
+             client_type=client.client_type,
+             redirect_uris=len(client.redirect_uris))
+
+    response = {"client_id": client.client_id, "client_id_issued_at": client.issued_at, **metadata}
+    if client.client_secret:
+        response["client_secret"] = client.client_secret
+        response["client_secret_expires_at"] = 0  # 만료 없음
+    return json_response(response, 201, {'Cache-Control': 'no-store'})
+
+
+def current_authorization_request(session):
+    """세션의 핸들로 진행 중인 authorization 요청 조회 (없으면 None)"""
+    return get_authorization_request(session.get('auth_request_id'))
+
+
+def end_authorization_request(session):
+    delete_authorization_request(session.pop('auth_request_id', None))
+    session.pop('user_id', None)
+
+
+@route('/authorize', methods=['GET'])
+def authorize(req):
+    """
+    Authorization Endpoint
+    1. 클라이언트가 사용자를 이 엔드포인트로 리다이렉트
+    2. 요청을 검증해 서버에 저장하고 로그인 화면 표시
+    (로그인은 POST /authorize → login, 동의는 POST /consent)
+    """
+    limited = rate_limited((rate_limit.authorize_ip, req.remote_addr))
+    if limited:
+        return limited
+
+    args = req.args
+    client_id = args.get('client_id')
+    request_uri = args.get('request_uri')
+
+    if request_uri:
+        # PAR: /par에서 이미 검증한 요청을 request_uri로 조회
+        auth_request, handle = resume_pushed_request(request_uri, client_id)
+        if not auth_request:
+            return json_response({"error": "invalid_request_uri",
+                                  "error_description": "Unknown, expired or already used request_uri"}, 400)
+        client = get_client(client_id)
+    else:
+        # Step 1: 클라이언트로부터 받은 파라미터 검증
+        redirect_uri = args.get('redirect_uri')
+        scope = args.get('scope', 'profile email')
+
+        # PKCE 파라미터 (Public Client용)
+        code_challenge = args.get('code_challenge')
+        code_challenge_method = args.get('code_challenge_method', 'S256')
+
+        client, error = validate_authorization_request(
+            client_id, redirect_uri, args.get('response_type', 'code'), scope,
+            args.get('state'), code_challenge, code_challenge_method
+        )
+        if error:
+            return error
+
+        handle = save_authorization_request(
+            client_id, redirect_uri, scope.split(),
+            state=args.get('state'),  # CSRF 방지용
+            code_challenge=code_challenge,
+            code_challenge_method=code_challenge_method
+        )
+
+    # 세션에는 서버에 저장한 요청의 핸들만 저장 (이전에 진행하던 요청은 정리)
+    session = req.session
+    delete_authorization_request(session.get('auth_request_id'))
+    session['auth_request_id'] = handle
+    session.permanent = True  # 세션을 영구적으로 설정
+
+    # 로그인 화면 표시
+    return Template('login.html', client=client)
+
+
+@route('/authorize', methods=['POST'], blocking=True)
+def login(req):
+    """Step 2: 로그인 처리 (비밀번호 검증은 scrypt 프로세스 풀을 기다리므로 blocking)"""
+    username = req.form.get('username')
+    password = req.form.get('password')
+
+    # 로그인 대입 공격 방지 (IP별 + 사용자 이름별)
+    limited = rate_limited((rate_limit.login_ip, req.remote_addr),
+                           (rate_limit.login_user, username))
+    if limited:
+        return limited
+
+    # 세션 확인
+    auth_request = current_authorization_request(req.session)
+    if not auth_request:
+        return json_response({
+            "error": "invalid_request",
+            "error_description": "Session expired. Please restart the authorization flow."
+        }, 400)
+
+    client = get_client(auth_request.client_id)
+
+    # 사용자 인증
+    user_id = verify_user(username, password)
+    if not user_id:
+        return Template('login.html',
+                        client=client,
+                        error="아이디 또는 비밀번호가 잘못되었습니다.")
+
+    # 로그인 성공 - 세션에 사용자 정보 저장
+    req.session['user_id'] = user_id
+
+    # 권한 동의 화면으로 이동
+    return Template('consent.html',
+                    client=client,
+                    scopes=auth_request.scopes,
+                    user=get_user(user_id))
+
+
+@route('/consent', methods=['POST'])
+def consent(req):
+    """
+    권한 동의 처리
+    사용자가 권한을 승인하면 Authorization Code 발급
+    """
+    session = req.session
+    action = req.form.get('action')
+    auth_request = current_authorization_request(session)
+
+    if not auth_request:
+        return json_response({"error": "invalid_session"}, 400)
+
+    if action != 'approve':
+        # 사용자가 거부함
+        end_authorization_request(session)
+
+        params = {
+            'error': 'access_denied',
+            'error_description': 'User denied access'
+        }
+        if auth_request.state:
+            params['state'] = auth_request.state
+
+        return redirect_to(f"{auth_request.redirect_uri}?{urlencode(params)}")
+
+    # 사용자가 승인함 - Authorization Code 발급
+    user_id = session.get('user_id')
+
+    if not user_id:
+        return json_response({"error": "invalid_session"}, 400)
+
+    # Authorization Code 생성
+    code = generate_authorization_code(
+        client_id=auth_request.client_id,
+        user_id=user_id,
+        redirect_uri=auth_request.redirect_uri,
+        scopes=auth_request.scopes,
+        code_challenge=auth_request.code_challenge,
+        code_challenge_method=auth_request.code_challenge_method
+    )
+
+    # 클라이언트로 리다이렉트 (Authorization Code 전달)
+    params = {'code': code}
+    if auth_request.state:
+        params['state'] = auth_request.state
+
+    redirect_url = f"{auth_request.redirect_uri}?{urlencode(params)}"
+
+    # 세션 정리
+    end_authorization_request(session)
+
+    log.info("authorization_code_issued",
+             user=user_id,
+             client=auth_request.client_id,
+             code=code[:8],
+             pkce=bool(auth_request.code_challenge),
+             redirect_uri=auth_request.redirect_uri)
+
+    return redirect_to(redirect_url)
+
+
+@route('/token', methods=['POST'])
+def token(req):
+    """
+    Token Endpoint
+    - authorization_code: Authorization Code를 Access Token으로 교환
+    - refresh_token: Refresh Token으로 새 Access Token 발급 (Refresh Token 회전)
+    """
+    form = req.form
+    limited = rate_limited((rate_limit.token_ip, req.remote_addr),
+                           (rate_limit.token_client, form.get('client_id')))
+    if limited:
+        return limited
+
+    grant_type = form.get('grant_type')
+
+    if grant_type == 'refresh_token':
+        return refresh_token_grant(form)
+
+    if grant_type != 'authorization_code':
+        return json_response({
+            "error": "unsupported_grant_type",
+            "error_description": "Only authorization_code and refresh_token are supported"
+        }, 400)
+
+    # 파라미터 추출
+    code = form.get('code')
+    redirect_uri = form.get('redirect_uri')
+    client_id = form.get('client_id')
+    client_secret = form.get('client_secret')
+    code_verifier = form.get('code_verifier')  # PKCE
+
+    if not code or not redirect_uri or not client_id:
+        return json_response({
+            "error": "invalid_request",
+            "error_description": "Missing required parameters"
+        }, 400)
+
+    # 클라이언트 검증
+    client = get_client(client_id)
+    if not client:
+        return json_response({"error": "invalid_client"}, 401)
+
+    # Confidential Client는 client_secret 필수
+    if not verify_client(client, client_secret):
+        return json_response({"error": "invalid_client", "error_description": "Invalid client credentials"}, 401)
+
+    # Authorization Code 검증
+    auth_code, error = verify_authorization_code(code, client_id, redirect_uri)
+    if error:
+        return json_response({"error": "invalid_grant", "error_description": error}, 400)
+
+    # PKCE 검증 (Public Client)
+    if auth_code.code_challenge:
+        if not code_verifier:
+            PKCE_FAILURES.inc()
+            return json_response({
+                "error": "invalid_request",
+                "error_description": "code_verifier required"
+            }, 400)
+
+        if not verify_code_challenge(
+            code_verifier,
+            auth_code.code_challenge,
+            auth_code.code_challenge_method or 'S256'
+        ):
+            PKCE_FAILURES.inc()
+            log.warning("pkce_failed", client=client_id, user=auth_code.user_id)
+            return json_response({
+                "error": "invalid_grant",
+                "error_description": "PKCE verification failed"
+            }, 400)
+
+        log.info("pkce_verified", client=client_id, method=auth_code.code_challenge_method)
+
+    # 이번 로그인에서 이어질 Refresh Token 패밀리
+    family_id = create_token_family(auth_code.user_id, client_id)
+
+    # Access Token 생성
+    access_token = generate_access_token(
+        user_id=auth_code.user_id,
+        client_id=client_id,
+        scopes=auth_code.scopes,
+        family_id=family_id
+    )
+
+    # Refresh Token 생성
+    refresh_token = generate_refresh_token(
+        user_id=auth_code.user_id,
+        client_id=client_id,
+        scopes=auth_code.scopes,
+        family_id=family_id
+    )
+
+    log.info("access_token_issued",
+             grant_type="authorization_code",
+             user=auth_code.user_id,
+             client=client_id,
+             scopes=auth_code.scopes)
+
+    # OAuth2 표준 응답
+    return json_response({
+        "access_token": access_token,
+        "token_type": "Bearer",
+        "expires_in": ACCESS_TOKEN_LIFETIME,  # 1시간
+        "refresh_token": refresh_token,
+        "scope": " ".join(auth_code.scopes)
+    })
+
+
+def refresh_token_grant(form):
+    """
+    grant_type=refresh_token 처리
+    사용된 refresh token은 폐기하고 새 refresh token 발급 (회전)
+    이미 사용된 refresh token이 다시 오면 같은 패밀리의 토큰을 모두 폐기
+    """
+    refresh_token = form.get('refresh_token')
+    client_id = form.get('client_id')
+    client_secret = form.get('client_secret')
+    scope = form.get('scope')
+
+    if not refresh_token or not client_id:
+        return json_response({
+            "error": "invalid_request",
+            "error_description": "Missing required parameters"
+        }, 400)
+
+    # 클라이언트 검증
+    client = get_client(client_id)
+    if not client:
+        return json_response({"error": "invalid_client"}, 401)
+
+    if not verify_client(client, client_secret):
+        return json_response({"error": "invalid_client", "error_description": "Invalid client credentials"}, 401)
+
+    tokens, error = rotate_refresh_token(
+        refresh_token, client_id,
+        scopes=scope.split() if scope else None
+    )
+    if error:
+        log.warning("refresh_token_rejected", client=client_id, reason=error)
+        return json_response({"error": "invalid_grant", "error_description": error}, 400)
+
+    log.info("access_token_issued",
+             grant_type="refresh_token",
+             client=client_id,
+             scopes=tokens['scopes'])
+
+    return json_response({
+        "access_token": tokens['access_token'],
+        "token_type": "Bearer",
+        "expires_in": ACCESS_TOKEN_LIFETIME,
+        "refresh_token": tokens['refresh_token'],
+        "scope": " ".join(tokens['scopes'])
+    })
+
+
+@route('/introspect', methods=['POST'])
+def introspect(req):
+    """
+    Token Introspection Endpoint (RFC 7662)
+    토큰의 유효성과 메타데이터 확인
+    """
+    limited = rate_limited((rate_limit.introspect_ip, req.remote_addr))
+    if limited:
+        return limited
+
+    token = req.form.get('token')
+    if not token:
+        return json_response({"active": False}, 400)
+
+    result, _ = introspection_result(token)
+    return json_response(result)
+
+
+@route('/introspect/batch', methods=['POST'])
+def introspect_batch(req):
+    """
+    Batch Token Introspection
+    토큰 여러 개를 한 번에 검증 (요청 순서대로 RFC 7662 결과 반환)
+
+    요청: {"tokens": ["...", "..."]}
+    응답: {"results": [{"active": true, ..., "cache_ttl": 60}, {"active": false, "cache_ttl": 60}]}
+
+    cache_ttl: 호출자가 결과를 캐시해도 되는 시간(초)
+    - active 토큰: 남은 수명과 INTROSPECT_CACHE_TTL 중 작은 값
+    - inactive 토큰: INTROSPECT_CACHE_TTL (무효인 토큰이 다시 유효해지지는 않음)
+    """
+    data = req.json if isinstance(req.json, dict) else {}
+    tokens = data.get('tokens')
+
+    # 토큰 수만큼 버킷 사용 (batch로 한도를 우회하지 못하도록)
+    cost = len(tokens) if isinstance(tokens, list) and tokens else 1
+    limited = rate_limited((rate_limit.introspect_ip, req.remote_addr, cost))
+    if limited:
+        return limited
+
+    if not isinstance(tokens, list) or not tokens:
+        return json_response({"error": "invalid_request", "error_description": "tokens must be a non-empty list"}, 400)
+
+    if len(tokens) > INTROSPECT_BATCH_MAX:
+        return json_response({
+            "error": "invalid_request",
+            "error_description": f"At most {INTROSPECT_BATCH_MAX} tokens per request"
+        }, 400)
+
+    now = time.time()
+    results = []
+    for token in tokens:
+        if not isinstance(token, str) or not token:
+            result, exp = {"active": False}, None
+        else:
+            result, exp = introspection_result(token)
+
+        ttl = INTROSPECT_CACHE_TTL if exp is None else min(INTROSPECT_CACHE_TTL, int(exp - now))
+        result["cache_ttl"] = max(ttl, 0)
+        results.append(result)
+
+    return json_response({"results": results})
+
+
+def introspection_result(token):
+    """토큰 하나의 RFC 7662 응답과 만료 시각(epoch, inactive면 None)"""
+    token_data, error = verify_access_token(token)
+    if error:
+        return {"active": False}, None
+
+    exp = token_data.expires_at
+    return {
+        "active": True,
+        "scope": " ".join(token_data.scopes),
+        "client_id": token_data.client_id,
+        "username": token_data.user_id,
+        "exp": exp
+    }, exp
+
+
+@route('/revoke', methods=['POST'])
+def revoke(req):
+    """
+    Token Revocation Endpoint (RFC 7009)
+    refresh token을 폐기하면 같은 grant로 발급된 access token도 함께 무효가 됨
+    이미 무효이거나 모르는 토큰도 200 (토큰 존재 여부를 알려주지 않음)
+    """
+    form = req.form
+    client_id = form.get('client_id')
+    limited = rate_limited((rate_limit.token_ip, req.remote_addr),
+                           (rate_limit.token_client, client_id))
+    if limited:
+        return limited
+
+    token = form.get('token')
+    if not token or not client_id:
+        return json_response({
+            "error": "invalid_request",
+            "error_description": "Missing required parameters"
+        }, 400)
+
+    # 클라이언트 검증 (/token과 같은 방식)
+    client = get_client(client_id)
+    if not client:
+        return json_response({"error": "invalid_client"}, 401)
+
+    if not verify_client(client, form.get('client_secret')):
+        return json_response({"error": "invalid_client", "error_description": "Invalid client credentials"}, 401)
+
+    revoked, error = revoke_token(token, client_id, form.get('token_type_hint'))
+    if error:
+        log.warning("token_revocation_rejected", client=client_id, reason=error)
+        return json_response({"error": error}, 400)
+
+    if revoked:
+        log.info("token_revoked", client=client_id, token_type=revoked)
+    return Response(b"", 200)
+
+
+@route('/admin/revoke', methods=['POST'], blocking=True)
+def admin_revoke(req):
+    """
+    사용자 또는 클라이언트의 모든 code / token 폐기 (관리용)
+    요청: {"user_id": "user1"} 또는 {"client_id": "client_spa"}
+    응답: {"revoked": {저장소 이름: 삭제 수}}
+    """
+    if not ADMIN_API_TOKEN:
+        return json_response({"error": "not_found"}, 404)
+
+    auth_header = req.headers.get('Authorization', '')
+    if not secrets.compare_digest(auth_header, f"Bearer {ADMIN_API_TOKEN}"):
+        return json_response({"error": "unauthorized"}, 401)
+
+    data = req.json if isinstance(req.json, dict) else {}
+    user_id = data.get('user_id')
+    client_id = data.get('client_id')
+    if user_id:
+        removed = revoke_user_tokens(user_id)
+    elif client_id:
+        removed = revoke_client_tokens(client_id)
+    else:
+        return json_response({"error": "invalid_request", "error_description": "user_id or client_id required"}, 400)
+
+    log.info("tokens_revoked", user=user_id, client=client_id, revoked=removed)
+    return json_response({"revoked": removed})
+
+
+# ====================================
+# 조건부 GET (ETag / If-None-Match)
+# ====================================
+
+def resource_etag(endpoint, token_data, resources, *extra):
+    """
+    본문을 만들지 않고 리소스 버전만으로 ETag 계산
+    같은 버전이라도 scope에 따라 응답이 다르므로 scope도 키에 포함
+    """
+    user_id = token_data.user_id
+    versions = get_resource_versions(user_id)
+    return response_cache.etag(
+        resource_version_namespace(), endpoint, user_id,
+        tuple(versions.get(r, 0) for r in resources),
+        token_data.scope_mask,
+        *extra
+    )
+
+
+def conditional_json(req, etag, build):
+    """
+    If-None-Match가 일치하면 304, 아니면 캐시된 본문 (없으면 build() 결과를 직렬화해 캐시)
+    build()가 dict가 아닌 응답(에러)을 반환하면 캐시하지 않고 그대로 반환
+    """
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': CACHE_CONTROL}
+    if req.if_none_match.contains_weak(etag):
+        return Response(b"", 304, headers)
+
+    body = response_cache.get(etag)
+    if body is None:
+        result = build()
+        if not isinstance(result, dict):
+            return result
+        body = encode_json(result)
+        response_cache.put(etag, body)
+    return Response(body, 200, headers, JSON_MIMETYPE)
+
+
+# ====================================
+# Resource Server
+# ====================================
+
+def bearer_token(req):
+    """Authorization: Bearer <token> → 토큰 (없으면 None)"""
+    auth_header = req.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    return auth_header[7:]  # "Bearer " 제거
+
+
+@route('/userinfo')
+def userinfo(req):
+    """
+    Resource Server - UserInfo Endpoint
+    Access Token으로 사용자 정보 조회
+    """
+    token = bearer_token(req)
+    if not token:
+        return json_response({"error": "invalid_token", "error_description": "Missing or invalid Authorization header"}, 401)
+
+    # 토큰 검증
+    token_data, error = verify_access_token(token)
+    if error:
+        return json_response({"error": "invalid_token", "error_description": error}, 401)
+
+    # scope에 따라 반환할 정보 필터링
+    scopes = token_data.scopes
+    claims = USERINFO_CLAIMS.allowed(token_data.scope_mask)
+    etag = resource_etag("userinfo", token_data, ("profile",))
+
+    def build():
+        # 사용자 정보 조회
+        user = get_user(token_data.user_id)
+        if not user:
+            return json_response({"error": "user_not_found"}, 404)
+
+        # 토큰 scope 마스크로 미리 계산된 claim 목록만 복사
+        response = {claim: user[claim] for claim in claims}
+        response['sub'] = user['username']  # subject (사용자 고유 ID)
+        return response
+
+    log.info("userinfo_request", user=token_data.user_id, scopes=scopes)
+
+    return conditional_json(req, etag, build)
+
+
+@route('/images/<name>')
+def profile_image(req, name):
+    """
+    프로필 이미지 (콘텐츠 주소)
+    URL의 해시가 본문 해시이므로 같은 URL의 내용은 바뀌지 않음 → immutable 캐시
+    """
+    image = get_profile_image(name)
+    if not image:
+        return json_response({"error": "not_found"}, 404)
+
+    headers = {
+        'ETag': f'"{image.etag}"',
+        'Cache-Control': IMMUTABLE_CACHE_CONTROL,
+        'Content-Security-Policy': IMAGE_CSP,
+        'X-Content-Type-Options': 'nosniff'
+    }
+    if req.if_none_match.contains_weak(image.etag):
+        return Response(b"", 304, headers)
+
+    return Response(image.body, 200, headers, image.content_type)
+
+
+def require_token(requirement=None, required_scopes=None):
+    """
+    Access Token 검증 데코레이터 (핸들러는 handler(req, token_data, ...)로 호출됨)
+    requirement: SCOPES.all_of(...) / SCOPES.any_of(...) (&로 조합 가능)
+    required_scopes: 이전 형식 (scope 이름 목록, 하나라도 있으면 통과 = any_of)
+    """
+    if requirement is None and required_scopes:
+        requirement = SCOPES.any_of(*required_scopes)
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(req, *args, **kwargs):
+            token = bearer_token(req)
+            if not token:
+                return json_response({"error": "unauthorized", "message": "Access token required"}, 401)
+
+            token_data, error = verify_access_token(token)
+            if error:
+                return json_response({"error": "invalid_token", "message": error}, 401)
+
+            # Scope 검증 (데코레이터 생성 시 컴파일된 마스크와 비트 연산)
+            if requirement is not None and not requirement.allows(token_data.scope_mask):
+                return json_response({"error": "insufficient_scope",
+                                      "message": f"Required scopes: {requirement}"}, 403)
+
+            # 함수에 token_data 전달
+            return f(req, token_data, *args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+@route('/api/posts')
+@require_token(SCOPES.all_of('profile'))
+def get_posts(req, token_data):
+    """
+    사용자 게시물 조회 API (id 커서 페이지네이션)
+    Scope: profile 필요
+
+    쿼리: limit (기본 POSTS_PAGE_SIZE, 최대 POSTS_PAGE_MAX), after / before (게시물 id)
+    응답의 paging.next_cursor를 after로, paging.prev_cursor를 before로 넘기면 다음 / 이전 페이지
+    """
+    user_id = token_data.user_id
+    cursor, error = parse_posts_cursor(req.args)
+    if error:
+        return json_response({"error": "invalid_request", "message": error}, 400)
+    limit, after, before = cursor
+
+    def build():
+        posts, has_before, has_after = get_user_posts_page(user_id, limit, after, before)
+        log.info("posts_listed", user=user_id, count=len(posts))
+        return {
+            "user": user_id,
+            "total": count_user_posts(user_id),
+            "posts": posts,
+            "paging": {
+                "limit": limit,
+                "prev_cursor": posts[0]["id"] if posts and has_before else None,
+                "next_cursor": posts[-1]["id"] if posts and has_after else None
+            }
+        }
+
+    return conditional_json(req, resource_etag("posts", token_data, ("posts",), cursor), build)
+
+
+def parse_posts_cursor(args):
+    """limit / after / before 쿼리 파라미터 → ((limit, after, before), 에러 메시지)"""
+    values = {}
+    for name in ('limit', 'after', 'before'):
+        raw = args.get(name)
+        try:
+            values[name] = int(raw) if raw is not None else None
+        except ValueError:
+            return None, f"{name} must be an integer"
+
+    limit = values['limit'] if values['limit'] is not None else POSTS_PAGE_SIZE
+    if not 1 <= limit <= POSTS_PAGE_MAX:
+        return None, f"limit must be between 1 and {POSTS_PAGE_MAX}"
+    return (limit, values['after'], values['before']), None
+
+
+@route('/api/posts', methods=['POST'])
+@require_token(SCOPES.all_of('profile'))
+def create_post(req, token_data):
+    """
+    게시물 작성 API
+    Scope: profile 필요
+    """
+    user_id = token_data.user_id
+    data = req.json
+
+    if not isinstance(data, dict) or 'title' not in data or 'content' not in data:
+        return json_response({"error": "invalid_request", "message": "title and content required"}, 400)
+
+    # 새 게시물 생성
+    new_post = add_user_post(user_id, data['title'], data['content'])
+
+    log.info("post_created", user=user_id, post_id=new_post['id'])
+
+    return json_response(new_post, 201)
+
+
+@route('/api/settings')
+@require_token(SCOPES.all_of('profile'))
+def get_settings(req, token_data):
+    """
+    사용자 설정 조회 API
+    Scope: profile 필요
+    """
+    user_id = token_data.user_id
+
+    return conditional_json(req, resource_etag("settings", token_data, ("settings",)),
+                            lambda: dict(get_user_settings(user_id)))
+
+
+@route('/api/settings', methods=['PUT'])
+@require_token(SCOPES.all_of('profile'))
+def update_settings(req, token_data):
+    """
+    사용자 설정 업데이트 API
+    Scope: profile 필요
+    """
+    user_id = token_data.user_id
+    data = req.json
+
+    if not isinstance(data, dict):
+        return json_response({"error": "invalid_request", "message": "JSON object required"}, 400)
+
+    settings = update_user_settings(user_id, data)
+
+    log.info("settings_updated", user=user_id, keys=sorted(data))
+
+    return json_response(settings)
+
+
+@route('/api/stats')
+@require_token(SCOPES.all_of('profile'))
+def get_stats(req, token_data):
+    """
+    사용자 통계 API
+    Scope: profile 필요
+    """
+    user_id = token_data.user_id
+
+    def build():
+        return {
+            "user": user_id,
+            "total_posts": count_user_posts(user_id),
+            "account_created": "2024-10-24",
+            "last_login": get_last_login(user_id),
+            "scopes": token_data.scopes
+        }
+
+    # 게시물 수와 마지막 로그인 시각이 바뀔 때만 ETag가 바뀜
+    return conditional_json(req, resource_etag("stats", token_data, ("posts", "login")), build)
@@ -0,0 +1,67 @@
+"""
+조건부 GET (ETag / If-None-Match)
+
+- ETag는 응답 본문이 아니라 (리소스 버전, 사용자, scope ...) 키로 계산
+  → If-None-Match가 일치하면 데이터 조회와 JSON 직렬화 없이 304
+- 직렬화된 본문은 ETag별로 LRU 캐시 → 같은 버전을 다시 요청하면 재직렬화하지 않음
+- 리소스가 바뀌면(게시물 작성, 설정 변경 등) database.py에서 버전을 올리므로 ETag도 바뀜
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from metrics import REGISTRY
+
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', '10000'))
+
+# 개인 데이터이므로 공유 캐시 금지, 사용할 때마다 재검증
+CACHE_CONTROL = "private, no-cache"
+
+
+class ResponseCache:
+    """ETag → 직렬화된 응답 본문 (LRU)"""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._bodies = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def etag(*key):
+        """키 → strong ETag 값 (따옴표 제외)"""
+        return hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest()
+
+    def get(self, etag):
+        with self._lock:
+            body = self._bodies.get(etag)
+            if body is None:
+                self.misses += 1
+                return None
+            self._bodies.move_to_end(etag)
+            self.hits += 1
+            return body
+
+    def put(self, etag, body):
+        with self._lock:
+            self._bodies[etag] = body
+            self._bodies.move_to_end(etag)
+            while len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+
+    def __len__(self):
+        return len(self._bodies)
+
+
+response_cache = ResponseCache()
+
+REGISTRY.gauge(
+    "oauth2_response_cache_entries", "Serialized response bodies cached by ETag", (),
+    lambda: [((), len(response_cache))]
+)
+REGISTRY.gauge(
+    "oauth2_response_cache_lookups_total", "Response body cache lookups by result", ("result",),
+    lambda: [(("hit",), response_cache.hits), (("miss",), response_cache.misses)], kind="counter"
+)
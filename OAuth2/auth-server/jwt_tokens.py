@@ -0,0 +1,293 @@
+"""
+자체 검증 가능한 Access Token (JWT)
+서명 + 만료만 확인하면 되므로 토큰 저장소 조회 없이 어느 워커/노드에서든 검증 가능
+
+- HS256: 대칭키 (JWT_HS256_SECRET 환경 변수로 노드 간 공유)
+- ES256: P-256 비대칭키, 공개키는 JWKS 엔드포인트로 배포
+- 키 교체: 교체 구간(JWT_KEY_ROTATION_INTERVAL)마다 마스터 비밀값에서 새 키를 유도하고,
+  이전 구간의 키는 발급된 토큰이 만료될 때까지 검증용으로 유지
+  → 같은 마스터 비밀값을 가진 모든 워커/노드가 같은 시각에 같은 kid/키를 씀 (프로세스 간 조정 불필요)
+"""
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+
+from scopes import SCOPES
+from token_records import AccessToken
+
+JWT_ALGORITHM = os.environ.get('JWT_ALGORITHM', 'HS256')
+JWT_VERIFY_CACHE_SIZE = int(os.environ.get('JWT_VERIFY_CACHE_SIZE', '10000'))
+# 자동 키 교체 주기 (초). 키를 환경 변수로 주입하면 기본적으로 자동 교체 안 함
+JWT_KEY_ROTATION_INTERVAL = int(os.environ.get(
+    'JWT_KEY_ROTATION_INTERVAL',
+    '0' if os.environ.get('JWT_HS256_SECRET') or os.environ.get('JWT_ES256_PRIVATE_KEY_FILE') else '86400'
+))
+# 서명 키를 유도할 마스터 비밀값 (여러 노드가 같은 키를 쓰려면 같은 값으로 설정)
+JWT_KEY_SECRET = os.environ.get('JWT_KEY_SECRET')
+
+SUPPORTED_ALGORITHMS = ('HS256', 'ES256')
+# P-256 곡선의 위수 (유도한 값을 유효한 개인키 범위 [1, n-1]로 맞출 때 사용)
+P256_ORDER = 0xFFFFFFFF00000000FFFFFFFFFFFFFFFFBCE6FAADA7179E84F3B9CAC2FC632551
+
+
+def load_key_secret(path=None):
+    """
+    마스터 비밀값: JWT_KEY_SECRET → path 파일 → 이 프로세스만 쓰는 랜덤 값 순서
+    path 파일이 없으면 만들어 둠 → 같은 파일을 보는 워커들이 모두 같은 값을 씀
+    (임시 파일을 다 쓴 뒤 link로 올리므로 동시에 시작한 워커가 반쯤 쓴 파일을 읽지 않고, 먼저 올린 값이 이김)
+    """
+    if JWT_KEY_SECRET:
+        return JWT_KEY_SECRET.encode()
+    if not path:
+        return secrets.token_bytes(32)
+
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.write(fd, secrets.token_bytes(32))
+        finally:
+            os.close(fd)
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp)
+
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class SigningKeys:
+    """
+    서명 키 모음 (현재 키 + 검증용으로 남겨둔 이전 키)
+
+    - 환경 변수로 주입한 키: 그 키 하나만 사용 (kid는 키 지문이라 모든 프로세스에서 같음)
+    - 그 외: 교체 구간 번호(epoch = 현재 시각 // rotation_interval)와 마스터 비밀값으로 키를 유도
+      kid = "{epoch}-{태그}" → 검증할 때 kid의 구간 번호로 같은 키를 다시 유도
+      rotation_interval이 0이면 구간 0의 키 하나만 사용
+    """
+
+    def __init__(self, algorithm, retain_seconds, rotation_interval=0, secret=None):
+        if algorithm not in SUPPORTED_ALGORITHMS:
+            raise ValueError(f"Unsupported JWT algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.retain_seconds = retain_seconds      # 교체된 키로 서명한 토큰을 검증하는 시간
+        self._keys = OrderedDict()                # {kid: {signing, verifying}}
+        self._lock = threading.Lock()
+
+        configured = self._load_configured_key()
+        if configured is not None:
+            self._secret = None
+            self.rotation_interval = 0
+            verifying_key = configured if algorithm == 'HS256' else configured.public_key()
+            self.current_kid = self._fingerprint(verifying_key)
+            self._keys[self.current_kid] = {'signing': configured, 'verifying': verifying_key}
+        else:
+            self._secret = secret if secret is not None else secrets.token_bytes(32)
+            self.rotation_interval = rotation_interval
+
+    def _load_configured_key(self):
+        """환경 변수로 주입된 키 (없으면 None → 마스터 비밀값에서 유도)"""
+        if self.algorithm == 'HS256':
+            secret = os.environ.get('JWT_HS256_SECRET')
+            return secret.encode() if secret else None
+
+        path = os.environ.get('JWT_ES256_PRIVATE_KEY_FILE')
+        if not path:
+            return None
+        from cryptography.hazmat.primitives.serialization import load_pem_private_key
+        with open(path, 'rb') as f:
+            return load_pem_private_key(f.read(), password=None)
+
+    def _fingerprint(self, verifying_key):
+        """주입된 키의 kid (HS256 비밀키는 해시만 노출)"""
+        if self.algorithm == 'HS256':
+            material = verifying_key
+        else:
+            from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+            material = verifying_key.public_bytes(Encoding.DER, PublicFormat.SubjectPublicKeyInfo)
+        return base64.urlsafe_b64encode(hashlib.sha256(material).digest()[:9]).decode()
+
+    def _derive(self, label):
+        return hmac.new(self._secret, f"{self.algorithm}:{label}".encode(), hashlib.sha256).digest()
+
+    # ----- 교체 구간 -----
+
+    def _epoch(self, now=None):
+        if not self.rotation_interval:
+            return 0
+        return int((time.time() if now is None else now) // self.rotation_interval)
+
+    def _usable_epochs(self, now=None):
+        """
+        검증에 쓸 수 있는 구간 번호 범위 [oldest, newest]
+        구간이 끝난 뒤에도 retain_seconds 동안은 그 키로 서명한 토큰이 남아 있음
+        다음 구간 키도 허용: 시계가 조금 빠른 워커가 먼저 새 키로 서명할 수 있음
+        """
+        if not self.rotation_interval:
+            return 0, 0
+        now = time.time() if now is None else now
+        oldest = self._epoch(now - self.retain_seconds)
+        return oldest, self._epoch(now) + 1
+
+    def _epoch_key(self, epoch):
+        """구간 번호 → (kid, {signing, verifying}) (유도 결과는 보관 기간 동안 캐시)"""
+        tag = base64.urlsafe_b64encode(self._derive(f"kid:{epoch}")[:6]).decode()
+        kid = f"{epoch}-{tag}"
+        key = self._keys.get(kid)
+        if key is not None:
+            return kid, key
+
+        material = self._derive(f"key:{epoch}")
+        if self.algorithm == 'HS256':
+            signing_key = verifying_key = material
+        else:
+            from cryptography.hazmat.primitives.asymmetric import ec
+            private_value = int.from_bytes(material, "big") % (P256_ORDER - 1) + 1
+            signing_key = ec.derive_private_key(private_value, ec.SECP256R1())
+            verifying_key = signing_key.public_key()
+
+        with self._lock:
+            key = self._keys.setdefault(kid, {'signing': signing_key, 'verifying': verifying_key})
+            # 보관 기간이 지난 구간의 키 제거
+            oldest, _ = self._usable_epochs()
+            for old_kid in [k for k in self._keys if int(k.split("-", 1)[0]) < oldest]:
+                del self._keys[old_kid]
+        return kid, key
+
+    # ----- 서명 / 검증 -----
+
+    def signing_key(self):
+        """현재 구간의 (kid, 서명 키)"""
+        if self._secret is None:
+            return self.current_kid, self._keys[self.current_kid]['signing']
+        kid, key = self._epoch_key(self._epoch())
+        return kid, key['signing']
+
+    def verifying_key(self, kid):
+        if self._secret is None:
+            key = self._keys.get(kid)
+            return key['verifying'] if key else None
+
+        epoch, _, _ = (kid or "").partition("-")
+        if not epoch.isdigit():
+            return None
+        oldest, newest = self._usable_epochs()
+        if not oldest <= int(epoch) <= newest:
+            return None
+        expected_kid, key = self._epoch_key(int(epoch))
+        return key['verifying'] if hmac.compare_digest(expected_kid, kid) else None
+
+    def jwks(self):
+        """
+        JWKS (공개키 목록). HS256 비밀키는 절대 공개하지 않음
+        다음 구간 키도 미리 공개 → 리소스 서버가 교체 직후 새 kid를 처음 볼 때 JWKS를 다시 받지 않아도 됨
+        """
+        if self.algorithm == 'HS256':
+            return {"keys": []}
+
+        if self._secret is None:
+            keys = list(self._keys.items())
+        else:
+            oldest, newest = self._usable_epochs()
+            keys = [self._epoch_key(epoch) for epoch in range(oldest, newest + 1)]
+
+        jwks = []
+        for kid, key in keys:
+            jwk = jwt.algorithms.ECAlgorithm.to_jwk(key['verifying'], as_dict=True)
+            jwk.update({"kid": kid, "use": "sig", "alg": self.algorithm})
+            jwks.append(jwk)
+        return {"keys": jwks}
+
+
+class JWTAccessTokens:
+    """JWT Access Token 발급 / 로컬 검증"""
+
+    def __init__(self, issuer, lifetime, algorithm=JWT_ALGORITHM,
+                 cache_size=JWT_VERIFY_CACHE_SIZE, rotation_interval=JWT_KEY_ROTATION_INTERVAL, secret=None):
+        self.issuer = issuer
+        self.lifetime = lifetime
+        self.keys = SigningKeys(algorithm, retain_seconds=lifetime + 60,
+                                rotation_interval=rotation_interval, secret=secret)
+        self.cache_size = cache_size
+        # 검증 결과 캐시: {sha256(token): AccessToken}
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def issue(self, user_id, client_id, scopes):
+        """서명된 Access Token 발급"""
+        now = int(time.time())
+        kid, key = self.keys.signing_key()
+        claims = {
+            "iss": self.issuer,
+            "sub": user_id,
+            "client_id": client_id,
+            "scope": " ".join(scopes),
+            "iat": now,
+            "exp": now + self.lifetime,
+            "jti": secrets.token_urlsafe(16)
+        }
+        return jwt.encode(claims, key, algorithm=self.keys.algorithm, headers={"kid": kid})
+
+    def verify(self, token):
+        """
+        서명과 만료만 확인 (저장소 조회 없음)
+        반환값: (token_data, error) - verify_access_token과 같은 형식
+        """
+        cache_key = hashlib.sha256(token.encode()).digest()
+
+        token_data = self._cache.get(cache_key)
+        if token_data is None:
+            token_data, error = self._decode(token)
+            if error:
+                return None, error
+            with self._cache_lock:
+                self._cache[cache_key] = token_data
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        # 캐시된 결과도 만료는 매번 확인 (정수 epoch 비교)
+        if time.time() > token_data.expires_at:
+            with self._cache_lock:
+                self._cache.pop(cache_key, None)
+            return None, "Token expired"
+
+        return token_data, None
+
+    def _decode(self, token):
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            key = self.keys.verifying_key(kid)
+            if key is None:
+                return None, "Invalid token"
+            claims = jwt.decode(
+                token, key,
+                algorithms=[self.keys.algorithm],
+                issuer=self.issuer,
+                options={"require": ["exp", "sub", "client_id"]}
+            )
+        except jwt.ExpiredSignatureError:
+            return None, "Token expired"
+        except jwt.InvalidTokenError:
+            return None, "Invalid token"
+
+        # 자체 검증 토큰은 refresh token 패밀리와 연결하지 않음
+        return AccessToken(
+            claims["sub"], claims["client_id"], SCOPES.mask(claims.get("scope", "").split()),
+            None, claims["exp"]
+        ), None
+
+
+def looks_like_jwt(token):
+    """opaque 토큰(token_urlsafe)에는 '.'이 없다"""
+    return token.count('.') == 2
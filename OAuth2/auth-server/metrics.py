@@ -0,0 +1,129 @@
+"""
+Prometheus 호환 메트릭 (/metrics)
+
+- Counter / Histogram: 라벨 튜플별 값을 dict와 리스트에 누적
+- 기록 비용을 1µs 미만으로 유지하기 위해 잠금 없이 GIL에 의존
+  (스레드가 동시에 같은 값을 올리면 드물게 1이 빠질 수 있음 - 메트릭 용도로는 허용)
+- Gauge: 스크레이프 시점에 콜백으로 값 계산 (저장소 크기 등)
+"""
+from bisect import bisect_left
+
+# 요청 지연 시간 버킷 (초)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values = {}
+
+    def inc(self, label_values=(), amount=1):
+        values = self._values
+        values[label_values] = values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # {label_values: [bucket별 개수..., +Inf 개수, 합계]}
+
+    def observe(self, value, label_values=()):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        # 버킷별(비누적) 개수만 올리고 누적은 출력할 때 계산
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labels, label_values, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """
+    스크레이프할 때 callback()이 [(라벨 값 튜플, 값), ...]을 반환
+    다른 곳에서 누적되는 값을 그대로 내보낼 때는 kind="counter"
+    """
+
+    def __init__(self, name, help_text, labels, callback, kind="gauge"):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.callback = callback
+        self.kind = kind
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for label_values, value in self.callback():
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name, help_text, labels, callback, kind="gauge"):
+        return self.register(Gauge(name, help_text, labels, callback, kind))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "oauth2_http_requests_total", "HTTP requests by route, method and status", ("route", "method", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "oauth2_http_request_duration_seconds", "HTTP request latency by route", ("route", "method"))
+TOKENS_ISSUED = REGISTRY.counter(
+    "oauth2_tokens_issued_total", "Issued authorization codes and tokens", ("type",))
+TOKENS_VERIFIED = REGISTRY.counter(
+    "oauth2_tokens_verified_total", "Access token verifications by result", ("result",))
+TOKENS_REVOKED = REGISTRY.counter(
+    "oauth2_tokens_revoked_total", "Revoked codes, tokens and families by store and reason", ("store", "reason"))
+CLIENTS_REGISTERED = REGISTRY.counter(
+    "oauth2_clients_registered_total", "Clients registered through /register", ("client_type",))
+PKCE_FAILURES = REGISTRY.counter(
+    "oauth2_pkce_failures_total", "PKCE verification failures at /token")
@@ -0,0 +1,136 @@
+"""
+비밀번호 해싱 (scrypt)
+
+- 저장 형식: scrypt$N$r$p$salt$hash (base64)
+- 작업량(N)은 PASSWORD_SCRYPT_N 환경 변수로 조정
+- 검증은 프로세스 풀에서 실행 → 로그인 한 번에 수십 ms CPU를 써도 요청 스레드가 막히지 않음
+- 평문(레거시)이거나 작업량이 낮은 해시는 로그인 성공 시 새 해시로 교체 (needs_rehash)
+- 없는 사용자도 더미 해시로 같은 scrypt 검증을 거쳐 실패 → 응답 시간으로 사용자 존재 여부를 알 수 없음
+"""
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+PASSWORD_SCRYPT_N = int(os.environ.get('PASSWORD_SCRYPT_N', str(2 ** 14)))
+PASSWORD_SCRYPT_R = 8
+PASSWORD_SCRYPT_P = 1
+# 0이면 프로세스 풀 없이 요청 스레드에서 직접 계산
+PASSWORD_POOL_SIZE = int(os.environ.get('PASSWORD_POOL_SIZE', str(os.cpu_count() or 1)))
+
+_pool = None
+_pool_size = PASSWORD_POOL_SIZE
+_pool_lock = threading.Lock()
+_dummy_hash = None
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r, dklen=32)
+
+
+def hash_password(password, n=None):
+    """비밀번호 해시 생성"""
+    n = n or PASSWORD_SCRYPT_N
+    salt = os.urandom(16)
+    digest = _scrypt(password, salt, n, PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P)
+    return "$".join([
+        "scrypt", str(n), str(PASSWORD_SCRYPT_R), str(PASSWORD_SCRYPT_P),
+        base64.b64encode(salt).decode(), base64.b64encode(digest).decode()
+    ])
+
+
+def is_hashed(stored):
+    return stored.startswith("scrypt$")
+
+
+def needs_rehash(stored):
+    """평문이거나 현재 설정보다 약한 해시인지"""
+    if not is_hashed(stored):
+        return True
+    _, n, r, p, _, _ = stored.split("$")
+    return (int(n), int(r), int(p)) != (PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P)
+
+
+def check_password(password, stored):
+    """비밀번호 검증 (CPU 사용, 풀 워커에서 실행되는 함수)"""
+    if not is_hashed(stored):
+        # 레거시 평문 (초기 데이터)
+        return hmac.compare_digest(password.encode(), stored.encode())
+
+    _, n, r, p, salt, digest = stored.split("$")
+    computed = _scrypt(password, base64.b64decode(salt), int(n), int(r), int(p))
+    return hmac.compare_digest(computed, base64.b64decode(digest))
+
+
+def configure_pool(size):
+    """검증 프로세스 풀 크기 변경 (0 = 풀 사용 안 함)"""
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool:
+            _pool.shutdown(wait=True)
+        _pool = None
+        _pool_size = size
+
+
+def _get_pool():
+    # fork 기반 멀티 워커에서도 워커마다 자기 풀을 갖도록 처음 사용할 때 생성
+    # 첫 로그인이 동시에 여러 개 와도 풀은 하나만 생성 (잠금 + 다시 확인)
+    global _pool
+    pool = _pool
+    if pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=_pool_size)
+            pool = _pool
+    return pool
+
+
+def _reset_after_fork():
+    # 부모의 풀(워커 프로세스 / 관리 스레드)과 잠금 상태는 자식에서 쓸 수 없으므로 새로 시작
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _run(fn, *args):
+    if _pool_size <= 0:
+        return fn(*args)
+    # 결과를 기다리는 동안 GIL을 놓으므로 다른 요청 스레드는 계속 처리됨
+    return _get_pool().submit(fn, *args).result()
+
+
+def verify_password(password, stored):
+    """
+    비밀번호 검증
+    반환값: (일치 여부, 새 해시 또는 None) - 새 해시가 있으면 저장해서 업그레이드
+    """
+    if not password or not stored:
+        return False, None
+
+    if is_hashed(stored):
+        ok = _run(check_password, password, stored)
+    else:
+        ok = check_password(password, stored)  # 평문 비교는 풀에 보낼 필요 없음
+
+    if ok and needs_rehash(stored):
+        return True, _run(hash_password, password)
+    return ok, None
+
+
+def verify_dummy_password(password):
+    """
+    없는 사용자의 로그인: 현재 설정의 더미 해시로 검증해서 있는 사용자와 같은 시간을 쓰고 항상 실패
+    더미 해시는 처음 호출할 때 한 번 생성 (동시에 여러 번 만들어져도 아무 값이나 써도 됨)
+    """
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = _run(hash_password, secrets.token_urlsafe(16))
+    verify_password(password, _dummy_hash)
+    return False, None
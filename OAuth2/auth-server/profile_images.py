@@ -0,0 +1,85 @@
+"""
+콘텐츠 주소 프로필 이미지 저장소
+
+- 이미지 URL = 본문 해시 (/images/<hash>.<ext>) → 내용이 바뀌면 URL도 바뀌므로 브라우저가 영구 캐시 가능
+  (Cache-Control: public, max-age=31536000, immutable)
+- 사용자 레코드의 data URI는 한 번만 디코딩해서 저장 (이후 같은 URI는 dict 조회)
+- 해시는 본문에서 결정되므로 워커/노드가 달라도 같은 URL
+- /userinfo, 동의 화면, client-backend 세션 쿠키에는 data URI 대신 짧은 URL만 들어감
+"""
+import base64
+import binascii
+import hashlib
+import threading
+from urllib.parse import unquote_to_bytes
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# SVG 안의 스크립트가 실행되지 않도록 (이미지를 직접 열어도)
+IMAGE_CSP = "default-src 'none'; style-src 'unsafe-inline'; sandbox"
+
+EXTENSIONS = {
+    "image/svg+xml": "svg",
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp"
+}
+
+
+class Image:
+    __slots__ = ("body", "content_type", "etag")
+
+    def __init__(self, body, content_type, digest):
+        self.body = body
+        self.content_type = content_type
+        self.etag = digest
+
+
+def parse_data_uri(uri):
+    """data:[<media type>][;base64],<data> → (본문 bytes, content type), 지원하지 않으면 None"""
+    if not uri.startswith("data:") or "," not in uri:
+        return None
+    header, _, data = uri[5:].partition(",")
+    params = header.split(";")
+    content_type = params[0].strip().lower()
+    if content_type not in EXTENSIONS:
+        return None
+    try:
+        body = base64.b64decode(data, validate=True) if "base64" in params[1:] else unquote_to_bytes(data)
+    except (binascii.Error, ValueError):
+        return None
+    return body, content_type
+
+
+class ImageStore:
+    """{<hash>.<ext>: Image}"""
+
+    def __init__(self):
+        self._images = {}
+        self._names = {}  # {data URI: "<hash>.<ext>"} (디코딩 / 해시 계산 생략)
+        self._lock = threading.Lock()
+
+    def add(self, body, content_type):
+        """이미지 저장 → 파일 이름 (<hash>.<ext>)"""
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        name = f"{digest}.{EXTENSIONS[content_type]}"
+        if name not in self._images:
+            with self._lock:
+                self._images.setdefault(name, Image(body, content_type, digest))
+        return name
+
+    def add_data_uri(self, uri):
+        """data URI 저장 → 파일 이름, 이미지 data URI가 아니면 None"""
+        name = self._names.get(uri)
+        if name is None:
+            parsed = parse_data_uri(uri)
+            if parsed is None:
+                return None
+            name = self._names[uri] = self.add(*parsed)
+        return name
+
+    def get(self, name):
+        return self._images.get(name)
+
+    def __len__(self):
+        return len(self._images)
@@ -0,0 +1,85 @@
+"""
+Token Bucket 요청 수 제한 (프로세스 내)
+
+- 키(client_id, IP, username)마다 버킷 하나: burst개까지 연속 허용, 초당 rate개씩 다시 채워짐
+- 검사는 O(1): 마지막 검사 이후 경과 시간만큼 한 번에 채우고 비용을 뺌 (타이머 없음)
+- 추적하는 키 수는 max_keys로 제한 (LRU) → 무작위 IP/사용자 이름을 뿌려도 메모리가 늘지 않음
+  밀려난 키는 다음 요청 때 가득 찬 버킷으로 다시 시작
+- 멀티 워커(prefork)에서는 워커별로 따로 센다
+
+설정: RATE_LIMIT_<이름>="rate:burst" (예: RATE_LIMIT_TOKEN_CLIENT="20:50"), RATE_LIMIT_ENABLED=0이면 끔
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import REGISTRY
+
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') != '0'
+RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', '100000'))
+
+
+class TokenBucketLimiter:
+    def __init__(self, name, rate, burst, max_keys=RATE_LIMIT_MAX_KEYS):
+        self.name = name
+        self.rate = rate  # 초당 채워지는 토큰 수
+        self.burst = burst  # 버킷 크기
+        self.max_keys = max_keys
+        self.limited = 0  # 거부한 요청 수
+        self._buckets = OrderedDict()  # {key: [남은 토큰, 마지막 갱신 시각]}
+        self._lock = threading.Lock()
+
+    def hit(self, key, cost=1):
+        """
+        토큰 cost개 사용
+        반환값: 0이면 허용, 아니면 다시 시도할 수 있을 때까지 남은 시간(초)
+        """
+        cost = min(cost, self.burst)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+                bucket = self._buckets[key] = [self.burst, now]
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return 0
+            self.limited += 1
+            return (cost - bucket[0]) / self.rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+def limiter_from_env(name, default):
+    """RATE_LIMIT_<NAME>="rate:burst" 환경 변수로 limiter 생성"""
+    rate, burst = os.environ.get(f'RATE_LIMIT_{name.upper()}', default).split(':')
+    return TokenBucketLimiter(name, float(rate), float(burst))
+
+
+# 엔드포인트별 limiter (rate는 초당, burst는 연속 허용 횟수)
+authorize_ip = limiter_from_env("authorize_ip", "10:30")
+login_ip = limiter_from_env("login_ip", "1:20")
+login_user = limiter_from_env("login_user", "0.2:10")  # 로그인 대입 공격 방지: 5초에 1번, 연속 10번
+token_client = limiter_from_env("token_client", "20:50")
+token_ip = limiter_from_env("token_ip", "20:50")
+introspect_ip = limiter_from_env("introspect_ip", "200:400")  # batch는 토큰 수만큼 사용
+register_ip = limiter_from_env("register_ip", "1:10")
+
+LIMITERS = [authorize_ip, login_ip, login_user, token_client, token_ip, introspect_ip, register_ip]
+
+REGISTRY.gauge(
+    "oauth2_rate_limit_tracked_keys", "Keys with a live token bucket per limiter", ("limiter",),
+    lambda: [((limiter.name,), len(limiter)) for limiter in LIMITERS]
+)
+REGISTRY.gauge(
+    "oauth2_rate_limited_total", "Requests rejected with 429 per limiter", ("limiter",),
+    lambda: [((limiter.name,), limiter.limited) for limiter in LIMITERS], kind="counter"
+)
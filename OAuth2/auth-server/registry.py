@@ -0,0 +1,360 @@
+"""
+클라이언트 / 사용자 레지스트리 (JSON 파일)
+
+- 처음 조회할 때 파일을 읽음 (import 시점에는 파일도, HOST_IP도 읽지 않음)
+- 문자열 안의 ${HOST_IP}, ${AUTHORIZATION_SERVER} 등은 config 값으로 치환
+- 최대 check_interval초마다 파일 mtime을 확인해서 바뀌었으면 다시 읽음
+  요청을 처리하는 스레드가 확인하므로 prefork 워커도 각자 재시작 없이 반영 (감시 스레드 없음)
+- 새 파일을 끝까지 읽고 검증한 뒤 스냅샷 하나를 통째로 교체
+  → 요청은 항상 이전 또는 새 스냅샷 전체를 보고, 읽기/검증에 실패하면 이전 스냅샷을 유지
+
+파일 형식:
+    {"users": {username: {password, name, email, profile_image}},
+     "clients": {client_id: {client_secret, client_type, redirect_uris, name, scopes}}}
+
+클라이언트는 Client 레코드로 읽음 (redirect URI 매처를 한 번만 만듦)
+redirect_uris 항목이 "/*"로 끝나면 접두사 매칭 (파일로 등록한 클라이언트만, 동적 등록은 정확히 일치만)
+
+파일을 고칠 때는 다른 이름으로 쓴 뒤 rename으로 교체 (쓰는 도중의 파일을 읽지 않도록)
+"""
+import hashlib
+import json
+import os
+import secrets
+import string
+import threading
+import time
+from urllib.parse import urlsplit
+
+import config
+from jsonlog import get_logger
+
+log = get_logger("auth-server")
+
+CLIENT_TYPES = ("public", "confidential")
+USER_FIELDS = ("password", "name", "email", "profile_image")
+CLIENT_FIELDS = ("client_type", "redirect_uris", "name", "scopes")
+PREFIX_WILDCARD = "/*"
+
+
+class RegistryError(ValueError):
+    """레지스트리 파일 형식 오류"""
+
+
+class _ConfigValues(dict):
+    """Template 치환용 매핑 - ${NAME}이 처음 나올 때만 config 값을 계산"""
+
+    def __missing__(self, name):
+        try:
+            value = self[name] = str(getattr(config, name))
+        except AttributeError:
+            raise KeyError(name) from None
+        return value
+
+
+def _expand(value, values):
+    if isinstance(value, str):
+        return string.Template(value).substitute(values) if '$' in value else value
+    if isinstance(value, list):
+        return [_expand(v, values) for v in value]
+    if isinstance(value, dict):
+        return {k: _expand(v, values) for k, v in value.items()}
+    return value
+
+
+class RedirectMatcher:
+    """
+    미리 만들어 둔 redirect URI 매처
+    - 정확히 일치: frozenset 조회
+    - 접두사: str.startswith(튜플) 한 번 (접두사는 "/"로 끝나므로 origin은 고정)
+    """
+    __slots__ = ("exact", "prefixes")
+
+    def __init__(self, uris):
+        self.exact = frozenset(uri for uri in uris if not uri.endswith(PREFIX_WILDCARD))
+        self.prefixes = tuple(uri[:-1] for uri in uris if uri.endswith(PREFIX_WILDCARD))
+
+    def __call__(self, uri):
+        if uri in self.exact:
+            return True
+        if not self.prefixes or not uri.startswith(self.prefixes):
+            return False
+        # 접두사 뒤에서 상위 경로로 빠져나가거나 fragment를 붙이는 것은 거부
+        lowered = uri.lower()
+        return not ('..' in uri or '%2e' in lowered or '\\' in uri or '#' in uri)
+
+
+class Client:
+    """
+    등록된 클라이언트 (파일 또는 동적 등록)
+    redirect URI 매처와 secret 검사를 레코드에 묶어서 요청마다 한 번만 조회
+    """
+    __slots__ = ("client_id", "client_secret", "client_type", "name", "scopes",
+                 "redirect_uris", "match_redirect_uri", "issued_at")
+
+    def __init__(self, client_id, client_type, redirect_uris, name, scopes,
+                 client_secret=None, issued_at=None, **_):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.client_type = client_type
+        self.name = name
+        self.scopes = tuple(scopes)
+        self.redirect_uris = tuple(redirect_uris)
+        self.match_redirect_uri = RedirectMatcher(self.redirect_uris)
+        self.issued_at = issued_at  # 동적 등록 시각 (파일 클라이언트는 None)
+
+    @property
+    def is_public(self):
+        return self.client_type == "public"
+
+    def verify_secret(self, client_secret):
+        """Public Client는 secret 검증 안 함, Confidential Client는 secret 필수"""
+        if self.is_public:
+            return True
+        return bool(client_secret) and secrets.compare_digest(self.client_secret, client_secret)
+
+    def dump(self):
+        """저장용 dict (SQLite clients 테이블)"""
+        data = {
+            "client_secret": self.client_secret,
+            "client_type": self.client_type,
+            "redirect_uris": list(self.redirect_uris),
+            "name": self.name,
+            "scopes": list(self.scopes)
+        }
+        if self.issued_at is not None:
+            data["issued_at"] = self.issued_at
+        return data
+
+    def __repr__(self):
+        return f"Client({self.client_id!r}, {self.client_type!r})"
+
+
+def parse_registry(data):
+    """파싱된 JSON → (users, clients), 형식이 맞지 않으면 RegistryError"""
+    if not isinstance(data, dict):
+        raise RegistryError("registry must be a JSON object")
+
+    try:
+        data = _expand(data, _ConfigValues())
+    except (KeyError, ValueError) as e:
+        raise RegistryError(f"unknown placeholder: {e}") from None
+
+    users = data.get("users", {})
+    clients = data.get("clients", {})
+    if not isinstance(users, dict) or not isinstance(clients, dict):
+        raise RegistryError("'users' and 'clients' must be objects")
+
+    for username, user in users.items():
+        if not isinstance(user, dict):
+            raise RegistryError(f"user {username!r} must be an object")
+        missing = [f for f in USER_FIELDS if f not in user]
+        if missing:
+            raise RegistryError(f"user {username!r}: missing {', '.join(missing)}")
+        # 파일의 password가 바뀌었는지 비교용 (그대로면 로그인 때 업그레이드된 해시를 유지)
+        user["password_source"] = hashlib.sha256(user["password"].encode()).hexdigest()
+
+    for client_id, client in clients.items():
+        if not isinstance(client, dict):
+            raise RegistryError(f"client {client_id!r} must be an object")
+        missing = [f for f in CLIENT_FIELDS if f not in client]
+        if missing:
+            raise RegistryError(f"client {client_id!r}: missing {', '.join(missing)}")
+        if client["client_type"] not in CLIENT_TYPES:
+            raise RegistryError(f"client {client_id!r}: client_type must be one of {CLIENT_TYPES}")
+        if client["client_type"] == "confidential" and not client.get("client_secret"):
+            raise RegistryError(f"client {client_id!r}: confidential client requires client_secret")
+        if not isinstance(client["redirect_uris"], list) or not client["redirect_uris"]:
+            raise RegistryError(f"client {client_id!r}: redirect_uris must be a non-empty list")
+        for uri in client["redirect_uris"]:
+            if not isinstance(uri, str):
+                raise RegistryError(f"client {client_id!r}: redirect_uris must be strings")
+            if uri.endswith("*") and not (uri.endswith(PREFIX_WILDCARD) and urlsplit(uri[:-1]).netloc):
+                raise RegistryError(f"client {client_id!r}: prefix redirect_uri must be 'scheme://host/.../*'")
+        clients[client_id] = Client(client_id, **client)
+
+    return users, clients
+
+
+# 동적 등록 (RFC 7591)
+TOKEN_ENDPOINT_AUTH_METHODS = {"none": "public", "client_secret_post": "confidential"}
+GRANT_TYPES = ("authorization_code", "refresh_token")
+MAX_REDIRECT_URIS = 20
+MAX_REDIRECT_URI_LENGTH = 2000
+MAX_CLIENT_NAME_LENGTH = 100
+
+
+class ClientMetadataError(ValueError):
+    """동적 등록 요청 오류 (error: RFC 7591 Section 3.2.2 에러 코드)"""
+
+    def __init__(self, error, description):
+        super().__init__(description)
+        self.error = error
+        self.description = description
+
+
+def validate_client_metadata(metadata, known_scopes, default_scope):
+    """
+    RFC 7591 클라이언트 메타데이터 검증
+    반환값: 정규화된 메타데이터 (응답에 그대로 사용), 잘못되면 ClientMetadataError
+    redirect URI는 정확히 일치만 허용 (접두사 매칭 없음)
+    """
+    if not isinstance(metadata, dict):
+        raise ClientMetadataError("invalid_client_metadata", "Request body must be a JSON object")
+
+    redirect_uris = metadata.get("redirect_uris")
+    if not isinstance(redirect_uris, list) or not redirect_uris:
+        raise ClientMetadataError("invalid_redirect_uri", "redirect_uris is required")
+    if len(redirect_uris) > MAX_REDIRECT_URIS:
+        raise ClientMetadataError("invalid_redirect_uri", f"At most {MAX_REDIRECT_URIS} redirect_uris")
+    for uri in redirect_uris:
+        if not isinstance(uri, str) or len(uri) > MAX_REDIRECT_URI_LENGTH:
+            raise ClientMetadataError("invalid_redirect_uri", "Invalid redirect_uri")
+        parts = urlsplit(uri)
+        if parts.scheme not in ("https", "http") or not parts.netloc or parts.fragment or '*' in uri:
+            raise ClientMetadataError("invalid_redirect_uri", f"Invalid redirect_uri: {uri}")
+
+    auth_method = metadata.get("token_endpoint_auth_method", "client_secret_post")
+    if auth_method not in TOKEN_ENDPOINT_AUTH_METHODS:
+        raise ClientMetadataError("invalid_client_metadata",
+                                  f"Unsupported token_endpoint_auth_method: {auth_method}")
+
+    grant_types = metadata.get("grant_types", list(GRANT_TYPES))
+    if not isinstance(grant_types, list) or not set(grant_types) <= set(GRANT_TYPES):
+        raise ClientMetadataError("invalid_client_metadata", f"grant_types must be a subset of {GRANT_TYPES}")
+
+    if metadata.get("response_types", ["code"]) != ["code"]:
+        raise ClientMetadataError("invalid_client_metadata", "Only response_types [\"code\"] is supported")
+
+    scope = metadata.get("scope", default_scope)
+    if not isinstance(scope, str) or not scope.split():
+        raise ClientMetadataError("invalid_client_metadata", "Invalid scope")
+    unknown = [s for s in scope.split() if s not in known_scopes]
+    if unknown:
+        raise ClientMetadataError("invalid_client_metadata", f"Unknown scope: {' '.join(unknown)}")
+
+    client_name = metadata.get("client_name", "Unnamed client")
+    if not isinstance(client_name, str) or not client_name.strip() or len(client_name) > MAX_CLIENT_NAME_LENGTH:
+        raise ClientMetadataError("invalid_client_metadata", "Invalid client_name")
+
+    return {
+        "redirect_uris": list(dict.fromkeys(redirect_uris)),
+        "client_name": client_name.strip(),
+        "token_endpoint_auth_method": auth_method,
+        "grant_types": grant_types,
+        "response_types": ["code"],
+        "scope": " ".join(scope.split())
+    }
+
+
+class RegistrySnapshot:
+    """한 시점의 레지스트리 내용 (교체만 하고 수정하지 않음, 실행 중 생긴 사용자 필드는 예외)"""
+    __slots__ = ("users", "clients", "mtime", "loaded_at")
+
+    def __init__(self, users, clients, mtime):
+        self.users = users
+        self.clients = clients
+        self.mtime = mtime
+        self.loaded_at = time.time()
+
+
+class RegistryFile:
+    """
+    파일에서 읽는 레지스트리
+    on_load(snapshot): 새 스냅샷으로 교체하기 직전 호출, 예외가 나면 교체하지 않음 (예: SQLite 동기화)
+    on_swap(snapshot, previous): 교체 직후 호출 (예: 캐시 무효화), 처음 읽을 때 previous는 None
+    """
+
+    def __init__(self, path, check_interval=1.0, on_load=None, on_swap=None):
+        self.path = path
+        self.check_interval = check_interval
+        self.on_load = on_load
+        self.on_swap = on_swap
+        self.reloads = 0   # 처음 읽은 것 포함
+        self.errors = 0    # 읽기/검증 실패 (이전 스냅샷 유지)
+        self._snapshot = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """현재 스냅샷 (확인 주기가 지났으면 파일이 바뀌었는지 확인)"""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() < self._next_check:
+            return snapshot
+
+        if snapshot is None:
+            # 처음 읽을 때는 모든 스레드가 기다림 (읽기에 실패하면 예외)
+            with self._lock:
+                if self._snapshot is None:
+                    self._load(os.stat(self.path).st_mtime_ns)
+                return self._snapshot
+
+        # 다른 스레드가 확인 중이면 기다리지 않고 현재 스냅샷 사용
+        if self._lock.acquire(blocking=False):
+            try:
+                self._check()
+            finally:
+                self._lock.release()
+        return self._snapshot
+
+    @property
+    def users(self):
+        return self.snapshot().users
+
+    @property
+    def clients(self):
+        return self.snapshot().clients
+
+    def reload(self):
+        """파일을 바로 다시 읽음 (성공하면 True)"""
+        with self._lock:
+            try:
+                self._load(os.stat(self.path).st_mtime_ns)
+            except Exception as e:
+                self._failed(e)
+                return False
+        return True
+
+    def _check(self):
+        self._next_check = time.monotonic() + self.check_interval
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime != self._snapshot.mtime:
+                self._load(mtime)
+        except Exception as e:
+            self._failed(e)
+
+    def _failed(self, error):
+        self.errors += 1
+        log.error("registry_reload_failed", path=self.path, error=str(error))
+
+    def _load(self, mtime):
+        with open(self.path, encoding='utf-8') as f:
+            users, clients = parse_registry(json.load(f))
+
+        previous = self._snapshot
+        if previous is not None:
+            # 파일에 없는 필드(last_login 등 실행 중 생긴 값)는 이전 스냅샷에서 이어받음
+            # 파일의 password가 그대로면 업그레이드된 해시도 유지
+            for username, user in users.items():
+                old = previous.users.get(username)
+                if old is None:
+                    continue
+                if old["password_source"] == user["password_source"]:
+                    user["password"] = old["password"]
+                for key, value in old.items():
+                    user.setdefault(key, value)
+
+        snapshot = RegistrySnapshot(users, clients, mtime)
+        if self.on_load:
+            self.on_load(snapshot)  # 실패하면 교체하지 않음
+        self._snapshot = snapshot
+        self._next_check = time.monotonic() + self.check_interval
+        self.reloads += 1
+        if self.on_swap:
+            try:
+                self.on_swap(snapshot, previous)
+            except Exception as e:
+                log.error("registry_swap_hook_failed", path=self.path, error=str(e))
+        log.info("registry_loaded", path=self.path, users=len(users), clients=len(clients),
+                 reload=previous is not None)
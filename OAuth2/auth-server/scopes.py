@@ -0,0 +1,129 @@
+"""
+Scope 레지스트리 (scope 이름 ↔ 비트마스크)
+
+토큰 레코드에는 scope 목록 대신 정수 비트마스크를 저장
+- 포함 여부 / 부분집합 검사는 비트 연산 한 번
+- 비트 번호는 AUTH_SCOPES 순서로 고정 → 여러 워커/프로세스가 저장소를 공유해도 같은 의미
+  (순서를 바꾸면 이미 발급된 토큰의 scope가 바뀌므로 새 scope는 끝에 추가)
+- 라우트의 scope 조건(all_of / any_of)과 claim → scope 매핑은 모듈 로드 시 마스크로 컴파일
+  → 요청마다 이름 비교 없이 정수 AND / 비교만 수행
+"""
+import os
+
+AUTH_SCOPES = os.environ.get('AUTH_SCOPES', 'profile email').split()
+
+# userinfo claim → 필요한 scope (sub는 항상 포함)
+USERINFO_CLAIM_SCOPES = {
+    "name": "profile",
+    "profile_image": "profile",
+    "email": "email"
+}
+
+
+def _describe(mode, names):
+    return names[0] if len(names) == 1 else f"{mode} ({' '.join(names)})"
+
+
+class ScopeRequirement:
+    """
+    컴파일된 scope 조건
+    - all_mask: 모든 비트가 있어야 함
+    - any_masks: 마스크마다 비트가 하나 이상 있어야 함 (any_of를 &로 묶으면 여러 개)
+    """
+    __slots__ = ("all_mask", "any_masks", "description")
+
+    def __init__(self, all_mask=0, any_masks=(), description=""):
+        self.all_mask = all_mask
+        self.any_masks = any_masks
+        self.description = description
+
+    def allows(self, mask):
+        if mask & self.all_mask != self.all_mask:
+            return False
+        for any_mask in self.any_masks:
+            if not mask & any_mask:
+                return False
+        return True
+
+    def __and__(self, other):
+        return ScopeRequirement(
+            self.all_mask | other.all_mask,
+            self.any_masks + other.any_masks,
+            f"{self.description} and {other.description}"
+        )
+
+    def __str__(self):
+        return self.description
+
+
+class ClaimFilter:
+    """claim → scope 매핑을 (claim, 마스크) 쌍으로 컴파일, 토큰 마스크별 허용 claim 튜플을 캐시"""
+
+    def __init__(self, pairs):
+        self._pairs = pairs
+        self._cache = {}  # {mask: (claim, ...)}
+
+    def allowed(self, mask):
+        """토큰 scope 마스크로 반환할 수 있는 claim 튜플 (매핑 순서)"""
+        claims = self._cache.get(mask)
+        if claims is None:
+            claims = tuple(claim for claim, claim_mask in self._pairs if mask & claim_mask)
+            self._cache[mask] = claims
+        return claims
+
+
+class ScopeRegistry:
+    def __init__(self, names):
+        self._bits = {name: 1 << i for i, name in enumerate(names)}
+        self._names_cache = {}  # {mask: (이름, ...)}
+
+    def __contains__(self, name):
+        return name in self._bits
+
+    def unknown(self, scopes):
+        """등록되지 않은 scope 목록"""
+        return [s for s in scopes if s not in self._bits]
+
+    def mask(self, scopes):
+        """scope 이름 목록 → 비트마스크 (등록되지 않은 이름은 무시)"""
+        mask = 0
+        for name in scopes:
+            mask |= self._bits.get(name, 0)
+        return mask
+
+    def names(self, mask):
+        """비트마스크 → scope 이름 튜플 (등록 순서)"""
+        names = self._names_cache.get(mask)
+        if names is None:
+            names = tuple(name for name, bit in self._bits.items() if mask & bit)
+            self._names_cache[mask] = names
+        return names
+
+    def _known_mask(self, names):
+        """조건용 마스크 - 등록되지 않은 scope는 설정 오류 (무시하면 조건이 사라짐)"""
+        unknown = self.unknown(names)
+        if unknown or not names:
+            raise ValueError(f"Unknown scopes in requirement: {unknown or names}")
+        return self.mask(names)
+
+    def all_of(self, *names):
+        """모든 scope 필요 → (mask & all) == all"""
+        return ScopeRequirement(self._known_mask(names), (), _describe("all of", names))
+
+    def any_of(self, *names):
+        """scope 중 하나 이상 필요 → mask & any != 0"""
+        return ScopeRequirement(0, (self._known_mask(names),), _describe("any of", names))
+
+    def claims(self, mapping):
+        """
+        {claim: scope 이름 또는 이름 목록(any-of)} → ClaimFilter
+        등록되지 않은 scope에 매핑된 claim은 발급될 수 없으므로 반환되지 않음 (마스크 0)
+        """
+        pairs = []
+        for claim, scopes in mapping.items():
+            pairs.append((claim, self.mask([scopes] if isinstance(scopes, str) else scopes)))
+        return ClaimFilter(tuple(pairs))
+
+
+SCOPES = ScopeRegistry(AUTH_SCOPES)
+USERINFO_CLAIMS = SCOPES.claims(USERINFO_CLAIM_SCOPES)
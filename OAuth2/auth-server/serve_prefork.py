@@ -0,0 +1,108 @@
+"""
+Authorization Server 멀티 워커(prefork) 실행
+
+부모 프로세스가 app을 import하고 소켓을 연 뒤 워커 N개를 fork
+- 모든 워커가 같은 소켓에서 accept (커널이 연결을 분배)
+- Flask secret_key는 fork 전에 만들어지므로 모든 워커가 공유
+- JWT 서명 키는 공유 디렉터리의 마스터 비밀값(또는 JWT_KEY_SECRET)과 교체 구간 번호로 유도되므로
+  워커들이 따로 교체해도 같은 시각에 같은 키를 씀 (워커끼리 키를 주고받지 않음)
+- code/token은 mmap 공유 테이블(AUTH_TOKEN_BACKEND=shared)에 저장되어 어느 워커에서든 검증 가능
+- 동적 등록(/register) 클라이언트, 게시물, 설정은 SQLite(AUTH_DB_BACKEND=sqlite)에 저장되어 모든 워커가 공유
+- 워커가 죽으면 부모가 다시 띄움
+
+사용법:
+    python serve_prefork.py --workers 4
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+
+# 공유 토큰 테이블과 SQLite 데이터 저장소를 기본으로 사용 (app import 전에 설정해야 함)
+# 메모리 데이터 저장소는 워커마다 따로라서 한 워커에 등록한 클라이언트를 다른 워커가 모름
+os.environ.setdefault('AUTH_TOKEN_BACKEND', 'shared')
+os.environ.setdefault('AUTH_DB_BACKEND', 'sqlite')
+
+from werkzeug.serving import make_server
+
+from app import app
+from database import DB_BACKEND, TOKEN_BACKEND, start_token_sweeper
+
+
+def run_worker(index, sock):
+    """워커 프로세스: 부모가 연 소켓으로 요청 처리"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # 스레드는 fork 후에 시작해야 함. 공유 테이블 스윕은 워커 하나면 충분
+    if index == 0:
+        start_token_sweeper()
+
+    server = make_server(sock.getsockname()[0], sock.getsockname()[1], app,
+                         threaded=True, fd=sock.fileno())
+    server.serve_forever()
+
+
+def spawn(index, sock):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(index, sock)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    args = parser.parse_args()
+
+    if TOKEN_BACKEND == 'memory' and args.workers > 1:
+        print("⚠️ AUTH_TOKEN_BACKEND=memory: 워커마다 토큰 저장소가 달라 다른 워커가 발급한 토큰을 검증할 수 없습니다")
+    if DB_BACKEND == 'memory' and args.workers > 1:
+        print("⚠️ AUTH_DB_BACKEND=memory: 워커마다 데이터 저장소가 달라 /register로 등록한 클라이언트와 "
+              "게시물 / 설정이 다른 워커에 보이지 않습니다")
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+
+    workers = {spawn(i, sock): i for i in range(args.workers)}
+    print(f"\n🚀 Prefork 서버 시작: http://{args.host}:{args.port} "
+          f"(워커 {args.workers}개, 토큰 저장소: {TOKEN_BACKEND}, 데이터 저장소: {DB_BACKEND})\n")
+
+    stopping = False
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    while workers:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        index = workers.pop(pid, None)
+        if not stopping and index is not None:
+            print(f"⚠️ 워커 {index} (pid {pid}) 종료됨 - 다시 시작")
+            workers[spawn(index, sock)] = index
+
+    sock.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
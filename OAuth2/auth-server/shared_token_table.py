@@ -0,0 +1,383 @@
+"""
+멀티 워커 공유 토큰 테이블 (AUTH_TOKEN_BACKEND=shared)
+메모리 맵 파일 위의 고정 슬롯 해시 테이블 → 모든 워커 프로세스가 같은 code/token을 본다
+
+파일 구조:
+    [헤더 64바이트][버킷 0: 슬롯 * N][버킷 1: 슬롯 * N]...
+    슬롯 = 상태(1) + 키 해시(32) + expires_at(8) + 길이(2) + JSON payload (레코드의 dump())
+
+- 키(토큰 원문)의 SHA-256으로 후보 버킷 2개를 고르고, 빈 슬롯이 더 많은 쪽에 저장 (two-choice)
+  조회는 두 버킷의 슬롯을 선형 탐색
+  버킷 하나만 쓰면 어느 한 버킷이 넘치는 순간 저장 실패 → 전체의 10%도 못 채움
+  후보가 2개면 한쪽이 가득 차도 다른 쪽으로 넘치므로 버킷당 16슬롯 기준 85% 이상 채울 수 있음
+- 버킷 단위 잠금: 프로세스 간에는 fcntl 바이트 범위 잠금, 프로세스 안의 스레드 간에는 threading.Lock
+  (fcntl 잠금은 같은 프로세스의 스레드끼리는 서로 막지 않기 때문)
+  저장은 두 후보 버킷을 번호 순서로 함께 잠금 (교착 방지)
+  조회/삭제는 후보 버킷을 하나씩 잠그고 확인 (키는 저장된 버킷에서 옮겨지지 않으므로 한 버킷씩 봐도 됨)
+- POSIX 전용 (fcntl)
+- 파일은 sparse: tmpfs는 mmap으로 빈 영역(hole)을 읽기만 해도 페이지를 할당하므로
+  전체를 훑는 작업(len / remove_by / sweep)은 실제로 쓰인 영역(SEEK_DATA)만 읽거나 pread로 읽음
+  → 메모리는 테이블 크기가 아니라 조회/저장한 버킷 수에 비례
+- 보조 인덱스는 없음: 사용자/클라이언트 단위 폐기(remove_by)는 잠금 없이 파일에서 값을 검색한 뒤
+  값이 나온 버킷만 잠그고 확인 (다른 워커의 토큰 검증을 전체 스캔 동안 막지 않음)
+"""
+import errno
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+from token_records import load_record
+from token_store import TokenStoreFull
+
+MAGIC = b"OA2TOKT1"
+HEADER = struct.Struct("<8sIII")      # magic, 버킷 수, 버킷당 슬롯 수, 슬롯 크기
+HEADER_SIZE = 64
+SLOT = struct.Struct("<B32sdH")       # 상태, 키 해시, expires_at, payload 길이
+
+EMPTY = 0
+USED = 1
+
+LOCK_RETRY_DELAY = 0.001  # fcntl EDEADLK 후 다시 잠그기 전 대기 (초)
+
+
+class SharedTableFull(TokenStoreFull):
+    """두 후보 버킷 모두 빈 슬롯이 없음 (버킷/슬롯 수를 늘려야 함)"""
+
+
+class RecordTooLarge(ValueError):
+    """레코드 JSON이 슬롯 payload 크기를 넘음 (저장 전에 fits()로 확인)"""
+
+
+class SharedTokenTable:
+    """TokenStore와 같은 인터페이스의 프로세스 간 공유 토큰 저장소"""
+
+    def __init__(self, path, name=None, buckets=4096, slots_per_bucket=16, slot_size=512, sweep_buckets=4096):
+        self.name = name or os.path.basename(path)
+        self.path = path
+        self.evicted = 0  # 이 프로세스가 제거한 항목 수
+        self.sweep_buckets = sweep_buckets  # sweep() 한 번에 확인하는 버킷 수
+        self._sweep_cursor = 0
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, HEADER_SIZE, 0)
+        try:
+            self._init_file(buckets, slots_per_bucket, slot_size)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, HEADER_SIZE, 0)
+
+        self._mm = mmap.mmap(self._fd, self._file_size, mmap.MAP_SHARED)
+        self._thread_locks = [threading.Lock() for _ in range(min(self.buckets, 256))]
+
+    def _init_file(self, buckets, slots_per_bucket, slot_size):
+        """같은 구조의 기존 파일이면 재사용, 아니면 새로 초기화"""
+        header = os.pread(self._fd, HEADER.size, 0)
+        if len(header) == HEADER.size and header[:8] == MAGIC:
+            _, buckets, slots_per_bucket, slot_size = HEADER.unpack(header)
+        else:
+            os.ftruncate(self._fd, 0)
+            os.pwrite(self._fd, HEADER.pack(MAGIC, buckets, slots_per_bucket, slot_size), 0)
+
+        self.buckets = buckets
+        self.slots_per_bucket = slots_per_bucket
+        self.slot_size = slot_size
+        self.payload_size = slot_size - SLOT.size
+        self._bucket_bytes = slots_per_bucket * slot_size
+        self._file_size = HEADER_SIZE + buckets * self._bucket_bytes
+        if os.fstat(self._fd).st_size < self._file_size:
+            os.ftruncate(self._fd, self._file_size)  # sparse 파일: 실제 쓰인 페이지만 메모리 사용
+
+    # ----- 잠금 / 슬롯 탐색 -----
+
+    def _buckets_of(self, key_hash):
+        """후보 버킷 2개 (번호 순서, 같으면 1개)"""
+        first = int.from_bytes(key_hash[:8], "little") % self.buckets
+        second = int.from_bytes(key_hash[8:16], "little") % self.buckets
+        return (first,) if first == second else tuple(sorted((first, second)))
+
+    def _bucket_offset(self, bucket):
+        return HEADER_SIZE + bucket * self._bucket_bytes
+
+    def _try_lockf(self, mode, offset):
+        """
+        버킷 fcntl 잠금 (대기). EDEADLK면 False
+        fcntl 잠금은 프로세스 단위라, 다른 스레드가 잡은 잠금까지 묶여 다른 프로세스와 순환으로 보이면
+        커널이 실제 교착이 아니어도 EDEADLK를 반환함 → 호출자가 잡은 잠금을 풀고 다시 시도
+        """
+        try:
+            fcntl.lockf(self._fd, mode, 1, offset)
+            return True
+        except OSError as e:
+            if e.errno != errno.EDEADLK:
+                raise
+            return False
+
+    @contextmanager
+    def _locked(self, bucket, exclusive=True):
+        offset = self._bucket_offset(bucket)
+        with self._thread_locks[bucket % len(self._thread_locks)]:
+            while not self._try_lockf(fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH, offset):
+                time.sleep(LOCK_RETRY_DELAY)
+            try:
+                yield offset
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, offset)
+
+    @contextmanager
+    def _locked_all(self, buckets, exclusive=True):
+        """
+        후보 버킷 모두 잠금
+        스레드 잠금(두 버킷이 같은 잠금일 수 있음)은 번호 순서로 한 번씩, fcntl 잠금은 버킷 번호 순서로 잡아 교착을 피함
+        EDEADLK면 잡은 fcntl 잠금을 모두 풀고 처음부터 다시
+        """
+        locks = [self._thread_locks[i] for i in sorted({b % len(self._thread_locks) for b in buckets})]
+        mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        locked = []
+        for lock in locks:
+            lock.acquire()
+        try:
+            while len(locked) < len(buckets):
+                offset = self._bucket_offset(buckets[len(locked)])
+                if self._try_lockf(mode, offset):
+                    locked.append(buckets[len(locked)])
+                    continue
+                for bucket in reversed(locked):
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, self._bucket_offset(bucket))
+                locked.clear()
+                time.sleep(LOCK_RETRY_DELAY)
+            yield
+        finally:
+            for bucket in reversed(locked):
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, self._bucket_offset(bucket))
+            for lock in reversed(locks):
+                lock.release()
+
+    def _find(self, bucket_offset, key_hash):
+        mm = self._mm
+        for i in range(self.slots_per_bucket):
+            offset = bucket_offset + i * self.slot_size
+            if mm[offset] == USED and mm[offset + 1:offset + 33] == key_hash:
+                return offset
+        return None
+
+    def _read_bucket(self, bucket_offset):
+        """
+        전체를 훑는 작업용 버킷 복사본 (pread: 한 번도 쓰지 않은 버킷의 페이지를 할당하지 않음)
+        키 조회/저장은 후보 버킷 2개만 보므로 mmap으로 직접 읽음
+        """
+        return os.pread(self._fd, self._bucket_bytes, bucket_offset)
+
+    def _used_offsets(self, bucket_offset):
+        """사용 중인 슬롯 offset 목록 (찾은 슬롯만 mmap으로 읽고 씀)"""
+        states = self._read_bucket(bucket_offset)[::self.slot_size]
+        return [bucket_offset + i * self.slot_size for i, state in enumerate(states) if state == USED]
+
+    def _read(self, offset):
+        _, _, expires_at, length = SLOT.unpack_from(self._mm, offset)
+        start = offset + SLOT.size
+        return load_record(json.loads(self._mm[start:start + length]), expires_at)
+
+    # ----- dict 호환 인터페이스 -----
+
+    def get(self, key, default=None):
+        key_hash = hashlib.sha256(key.encode()).digest()
+        for bucket in self._buckets_of(key_hash):
+            with self._locked(bucket, exclusive=False) as bucket_offset:
+                offset = self._find(bucket_offset, key_hash)
+                if offset is not None:
+                    value = self._read(offset)
+                    return default if value is None else value
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def fits(self, value):
+        """
+        value를 슬롯 하나에 저장할 수 있는지
+        payload는 ASCII 이스케이프된 JSON이므로 문자 수가 아니라 직렬화한 바이트 수로 판단
+        (한글 1자 = 6바이트 \\uXXXX)
+        """
+        return len(json.dumps(value.dump()).encode()) <= self.payload_size
+
+    def __setitem__(self, key, value):
+        key_hash = hashlib.sha256(key.encode()).digest()
+        expires_at = value.expires_at
+        payload = json.dumps(value.dump()).encode()
+        if len(payload) > self.payload_size:
+            raise RecordTooLarge(f"Token record too large for slot ({len(payload)} > {self.payload_size})")
+
+        buckets = self._buckets_of(key_hash)
+        with self._locked_all(buckets):
+            offset = None
+            for bucket in buckets:
+                offset = self._find(self._bucket_offset(bucket), key_hash)
+                if offset is not None:
+                    break
+            else:
+                offset = self._free_slot(buckets)
+            SLOT.pack_into(self._mm, offset, USED, key_hash, expires_at, len(payload))
+            start = offset + SLOT.size
+            self._mm[start:start + len(payload)] = payload
+
+    def _slot_states(self, bucket):
+        """버킷 슬롯들의 상태 바이트"""
+        start = self._bucket_offset(bucket)
+        return self._mm[start:start + self._bucket_bytes:self.slot_size]
+
+    def _free_slot(self, buckets):
+        """빈 슬롯이 더 많은 후보 버킷의 빈 슬롯, 둘 다 없으면 만료된 슬롯을 재사용"""
+        mm = self._mm
+        states = {bucket: self._slot_states(bucket) for bucket in buckets}
+        bucket = max(buckets, key=lambda b: states[b].count(EMPTY))
+        i = states[bucket].find(EMPTY)
+        if i != -1:
+            return self._bucket_offset(bucket) + i * self.slot_size
+
+        now = time.time()
+        for bucket in buckets:
+            bucket_offset = self._bucket_offset(bucket)
+            for i in range(self.slots_per_bucket):
+                offset = bucket_offset + i * self.slot_size
+                if SLOT.unpack_from(mm, offset)[2] <= now:
+                    self.evicted += 1
+                    return offset
+        raise SharedTableFull(f"{self.name}: buckets {buckets} full")
+
+    def _remove(self, key):
+        """삭제한 값 반환 (없으면 None)"""
+        key_hash = hashlib.sha256(key.encode()).digest()
+        for bucket in self._buckets_of(key_hash):
+            with self._locked(bucket) as bucket_offset:
+                offset = self._find(bucket_offset, key_hash)
+                if offset is not None:
+                    value = self._read(offset)
+                    self._mm[offset] = EMPTY
+                    return value
+        return None
+
+    def __delitem__(self, key):
+        if self._remove(key) is None:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        # 쓰인 영역에서 슬롯 상태 바이트만 건너뛰며 잘라 C에서 셈 (슬롯이 수십만 개여도 메트릭 수집이 느려지지 않게)
+        mm = self._mm
+        count = 0
+        for start, end in self._data_ranges():
+            first = start + (HEADER_SIZE - start) % self.slot_size  # start 이후 첫 슬롯
+            count += mm[first:end:self.slot_size].count(USED)
+        return count
+
+    def _data_ranges(self):
+        """
+        실제로 쓰인 파일 영역 [(start, end), ...] (SEEK_DATA / SEEK_HOLE, 헤더 제외)
+        지원하지 않는 파일 시스템이면 파일 전체
+        """
+        ranges = []
+        pos = HEADER_SIZE
+        try:
+            while pos < self._file_size:
+                start = os.lseek(self._fd, pos, os.SEEK_DATA)
+                end = min(os.lseek(self._fd, start, os.SEEK_HOLE), self._file_size)
+                ranges.append((max(start, HEADER_SIZE), end))
+                pos = end
+        except OSError as e:
+            if e.errno != errno.ENXIO:  # ENXIO: pos 뒤에는 쓰인 영역이 없음
+                return [(HEADER_SIZE, self._file_size)]
+        return ranges
+
+    def pop(self, key, default=None):
+        value = self._remove(key)
+        return default if value is None else value
+
+    def remove_by(self, field, value):
+        """
+        field(user_id / client_id) 값이 value인 항목 모두 삭제
+        1. 잠금 없이 파일의 쓰인 영역에서 value의 JSON 바이트를 검색 (mmap.find, C 루프) → 후보 버킷
+           (payload는 같은 json.dumps로 쓰므로 value가 들어 있는 슬롯은 반드시 걸림, 빈 슬롯의 옛 값 등은 2에서 거름)
+        2. 후보 버킷만 잠그고 payload를 읽어 비교
+        검색 중에 새로 저장된 항목은 놓칠 수 있음 (버킷을 차례로 잠그던 이전 방식도 이미 지난 버킷은 같음)
+        """
+        needle = json.dumps(value).encode()
+        mm = self._mm
+        candidates = []
+        for start, end in self._data_ranges():
+            pos = mm.find(needle, start, end)
+            while pos != -1:
+                bucket = (pos - HEADER_SIZE) // self._bucket_bytes
+                if not candidates or candidates[-1] != bucket:
+                    candidates.append(bucket)
+                # 같은 버킷의 나머지 슬롯은 잠그고 모두 확인하므로 다음 버킷부터 검색
+                pos = mm.find(needle, self._bucket_offset(bucket + 1), end)
+
+        removed = 0
+        for bucket in candidates:
+            with self._locked(bucket) as bucket_offset:
+                for offset in self._used_offsets(bucket_offset):
+                    record = self._read(offset)
+                    if record is not None and getattr(record, field) == value:
+                        mm[offset] = EMPTY
+                        removed += 1
+        return removed
+
+    # ----- 만료 처리 -----
+
+    def evict(self, key):
+        if self._remove(key) is not None:
+            self.evicted += 1
+
+    def sweep(self, now=None, max_batch=1000):
+        """
+        커서 위치부터 버킷을 돌며 만료 항목을 max_batch개까지 제거 (반환값: 제거한 수)
+        - 잠그지 않고 만료 항목이 있는 버킷을 찾고, 그 버킷만 잠가서 제거 (만료 항목이 없는 버킷은 잠그지 않음)
+        - 한 번에 최대 sweep_buckets개 버킷까지 확인 → 작은 테이블은 호출마다 한 바퀴
+        - max_batch개를 채우면 (버킷 단위라 조금 넘을 수 있음) 멈춤 → 스위퍼가 밀린 것으로 보고 바로 다시 호출
+        """
+        if now is None:
+            now = time.time()
+        evicted = 0
+        mm = self._mm
+
+        for _ in range(min(self.buckets, self.sweep_buckets)):
+            if evicted >= max_batch:
+                break
+            bucket = self._sweep_cursor
+            self._sweep_cursor = (bucket + 1) % self.buckets
+            if not self._has_expired(bucket, now):
+                continue
+            with self._locked(bucket) as bucket_offset:
+                for offset in self._used_offsets(bucket_offset):
+                    if SLOT.unpack_from(mm, offset)[2] <= now:
+                        mm[offset] = EMPTY
+                        evicted += 1
+
+        self.evicted += evicted
+        return evicted
+
+    def _has_expired(self, bucket, now):
+        """잠금 없이 확인 (틀려도 잠근 뒤 다시 확인하므로 무해)"""
+        data = self._read_bucket(self._bucket_offset(bucket))
+        for i, state in enumerate(data[::self.slot_size]):
+            if state == USED and SLOT.unpack_from(data, i * self.slot_size)[2] <= now:
+                return True
+        return False
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "live": len(self),
+            "evicted": self.evicted,
+            "capacity": self.buckets * self.slots_per_bucket
+        }
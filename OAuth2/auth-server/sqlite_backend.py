@@ -0,0 +1,355 @@
+"""
+SQLite 영속 저장소 (AUTH_DB_BACKEND=sqlite)
+database.py의 함수 API는 그대로 두고 데이터만 SQLite 파일에 저장
+
+- WAL 모드: 읽기는 쓰기와 동시에 진행, 여러 워커 프로세스가 같은 파일 공유 가능
+- 스레드별 커넥션 (sqlite3 커넥션은 스레드 간 공유 불가)
+- SQL 문은 모듈 상수로 고정 → 커넥션의 statement 캐시로 재사용 (prepared statement)
+- 토큰은 원문 대신 SHA-256 해시를 키로 저장, expires_at 인덱스로 만료 스윕
+- 토큰 테이블의 user_id / client_id 인덱스로 사용자/클라이언트 단위 일괄 폐기
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from token_records import load_record
+
+TOKEN_TABLES = ("authorization_requests", "authorization_codes", "access_tokens", "refresh_tokens",
+                "token_families")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clients (
+    client_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS posts (
+    user_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, id)
+);
+CREATE TABLE IF NOT EXISTS post_sequences (
+    user_id TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS settings (
+    user_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS resource_versions (
+    user_id TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (user_id, resource)
+);
+""" + "".join(f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    token_hash TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL,
+    data TEXT NOT NULL,
+    user_id TEXT,
+    client_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_{table}_expires_at ON {table} (expires_at);
+""" for table in TOKEN_TABLES)
+
+# 보조 인덱스 컬럼 (이전 버전 파일에는 없으므로 ALTER TABLE로 추가한 뒤 인덱스 생성)
+TOKEN_OWNER_COLUMNS = ("user_id", "client_id")
+
+SELECT_USER = "SELECT data FROM users WHERE username = ?"
+# 파일의 password가 그대로면(password_source 같음) 로그인 때 업그레이드된 해시 유지
+UPSERT_USER = """
+INSERT INTO users (username, data) VALUES (?, ?)
+ON CONFLICT (username) DO UPDATE SET data = CASE
+    WHEN json_extract(users.data, '$.password_source') = json_extract(excluded.data, '$.password_source')
+    THEN json_patch(users.data, json_remove(excluded.data, '$.password'))
+    ELSE json_patch(users.data, excluded.data)
+END
+"""
+UPDATE_USER_PASSWORD = "UPDATE users SET data = json_set(data, '$.password', ?) WHERE username = ?"
+UPDATE_USER_LAST_LOGIN = "UPDATE users SET data = json_set(data, '$.last_login', ?) WHERE username = ?"
+SELECT_CLIENT = "SELECT data FROM clients WHERE client_id = ?"
+UPSERT_CLIENT = "INSERT OR REPLACE INTO clients (client_id, data) VALUES (?, ?)"
+INSERT_CLIENT = "INSERT INTO clients (client_id, data) VALUES (?, ?)"
+SELECT_POSTS = "SELECT id, title, content, created_at FROM posts WHERE user_id = ? ORDER BY id"
+COUNT_POSTS = "SELECT COUNT(*) FROM posts WHERE user_id = ?"
+# (user_id, id) 기본 키 인덱스로 범위 검색 → 게시물 수와 무관하게 O(log n)
+SELECT_POSTS_ASC = """
+SELECT id, title, content, created_at FROM posts
+WHERE user_id = ? AND id > ? AND id < ? ORDER BY id LIMIT ?
+"""
+SELECT_POSTS_DESC = """
+SELECT id, title, content, created_at FROM posts
+WHERE user_id = ? AND id > ? AND id < ? ORDER BY id DESC LIMIT ?
+"""
+EXISTS_POST_BELOW = "SELECT 1 FROM posts WHERE user_id = ? AND id < ? LIMIT 1"
+EXISTS_POST_ABOVE = "SELECT 1 FROM posts WHERE user_id = ? AND id > ? LIMIT 1"
+# 사용자별 게시물 id 시퀀스 (삭제가 생겨도 id를 재사용하지 않음)
+NEXT_POST_ID = """
+INSERT INTO post_sequences (user_id, last_id)
+SELECT ?, COALESCE(MAX(id), 0) + 1 FROM posts WHERE user_id = ?
+ON CONFLICT (user_id) DO UPDATE SET last_id = last_id + 1
+RETURNING last_id
+"""
+INSERT_POST = "INSERT INTO posts (user_id, id, title, content, created_at) VALUES (?, ?, ?, ?, ?)"
+MAX_POST_ID = 2 ** 63 - 1
+SELECT_VERSIONS = "SELECT resource, version FROM resource_versions WHERE user_id = ?"
+BUMP_VERSION = """
+INSERT INTO resource_versions (user_id, resource, version) VALUES (?, ?, 1)
+ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1
+"""
+SELECT_SETTINGS = "SELECT data FROM settings WHERE user_id = ?"
+UPSERT_SETTINGS = """
+INSERT INTO settings (user_id, data) VALUES (?, ?)
+ON CONFLICT (user_id) DO UPDATE SET data = excluded.data
+"""
+
+
+def hash_token(token):
+    """토큰 원문은 저장하지 않고 해시만 저장"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class SqliteDatabase:
+    """SQLite 파일 하나 + 스레드별 커넥션"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self.connection()
+        conn.executescript(SCHEMA)
+        self._migrate_token_tables(conn)
+
+    @staticmethod
+    def _migrate_token_tables(conn):
+        for table in TOKEN_TABLES:
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for column in TOKEN_OWNER_COLUMNS:
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})")
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        # fork 전에 부모가 연 커넥션은 자식에서 쓰지 않음 (prefork 워커)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, isolation_level=None, cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def seed(self, posts, settings):
+        """초기 데이터 입력 (이미 있는 행은 유지)"""
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR IGNORE INTO posts (user_id, id, title, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(user_id, p["id"], p["title"], p["content"], p["created_at"])
+                 for user_id, user_posts in posts.items() for p in user_posts]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO settings (user_id, data) VALUES (?, ?)",
+                [(user_id, json.dumps(data)) for user_id, data in settings.items()]
+            )
+
+    def sync_registry(self, users, clients, watch=None):
+        """
+        레지스트리 파일 내용 반영 (파일에 없는 행은 유지)
+        사용자는 파일의 필드만 덮어씀 → last_login 등 실행 중 생긴 필드는 유지
+        watch: [(필드 목록, 리소스), ...] → 저장된 값과 필드가 달라진 사용자의 리소스 버전을 같은 트랜잭션에서 올림
+               (워커마다 같은 파일을 반영해도 처음 반영한 워커만 올림, 서버가 꺼져 있는 동안 바뀐 파일도 감지)
+        반환값: 버전을 올린 (사용자, 리소스) 목록
+        """
+        changed = []
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if watch:
+                for username, user in users.items():
+                    row = conn.execute(SELECT_USER, (username,)).fetchone()
+                    if row is None:
+                        continue
+                    stored = json.loads(row[0])
+                    for fields, resource in watch:
+                        if any(stored.get(field) != user.get(field) for field in fields):
+                            changed.append((username, resource))
+            conn.executemany(UPSERT_USER, [(username, json.dumps(user)) for username, user in users.items()])
+            conn.executemany(UPSERT_CLIENT, [(client_id, json.dumps(client)) for client_id, client in clients.items()])
+            if changed:
+                conn.executemany(BUMP_VERSION, changed)
+        return changed
+
+    def add_client(self, client_id, data):
+        """동적 등록 클라이언트 저장 (client_id가 이미 있으면 sqlite3.IntegrityError)"""
+        self.connection().execute(INSERT_CLIENT, (client_id, json.dumps(data)))
+
+    def _select_json(self, sql, key):
+        row = self.connection().execute(sql, (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_user(self, username):
+        return self._select_json(SELECT_USER, username)
+
+    def update_user_password(self, username, password_hash):
+        self.connection().execute(UPDATE_USER_PASSWORD, (password_hash, username))
+
+    def update_user_last_login(self, username, last_login):
+        self.connection().execute(UPDATE_USER_LAST_LOGIN, (last_login, username))
+
+    def get_client(self, client_id):
+        return self._select_json(SELECT_CLIENT, client_id)
+
+    def get_posts(self, user_id):
+        rows = self.connection().execute(SELECT_POSTS, (user_id,)).fetchall()
+        return [{"id": r[0], "title": r[1], "content": r[2], "created_at": r[3]} for r in rows]
+
+    def count_posts(self, user_id):
+        return self.connection().execute(COUNT_POSTS, (user_id,)).fetchone()[0]
+
+    def get_posts_page(self, user_id, limit, after=None, before=None):
+        """database.get_user_posts_page 참고"""
+        conn = self.connection()
+        low = after if after is not None else 0
+        high = before if before is not None else MAX_POST_ID
+        if before is not None and after is None:
+            rows = conn.execute(SELECT_POSTS_DESC, (user_id, low, high, limit)).fetchall()[::-1]
+        else:
+            rows = conn.execute(SELECT_POSTS_ASC, (user_id, low, high, limit)).fetchall()
+
+        exists = lambda sql, post_id: conn.execute(sql, (user_id, post_id)).fetchone() is not None
+        if rows:
+            has_before = exists(EXISTS_POST_BELOW, rows[0][0])
+            has_after = exists(EXISTS_POST_ABOVE, rows[-1][0])
+        else:
+            has_before = after is not None and exists(EXISTS_POST_BELOW, after + 1)
+            has_after = before is not None and exists(EXISTS_POST_ABOVE, before - 1)
+
+        posts = [{"id": r[0], "title": r[1], "content": r[2], "created_at": r[3]} for r in rows]
+        return posts, has_before, has_after
+
+    def add_post(self, user_id, title, content, created_at):
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            post_id = conn.execute(NEXT_POST_ID, (user_id, user_id)).fetchone()[0]
+            conn.execute(INSERT_POST, (user_id, post_id, title, content, created_at))
+        return {"id": post_id, "title": title, "content": content, "created_at": created_at}
+
+    def get_versions(self, user_id):
+        return dict(self.connection().execute(SELECT_VERSIONS, (user_id,)).fetchall())
+
+    def bump_version(self, user_id, resource):
+        self.connection().execute(BUMP_VERSION, (user_id, resource))
+
+    def get_settings(self, user_id):
+        return self._select_json(SELECT_SETTINGS, user_id) or {}
+
+    def update_settings(self, user_id, data):
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            settings = self.get_settings(user_id)
+            settings.update(data)
+            conn.execute(UPSERT_SETTINGS, (user_id, json.dumps(settings)))
+        return settings
+
+
+class SqliteTokenStore:
+    """
+    TokenStore와 같은 인터페이스의 SQLite 토큰 저장소
+    레코드는 dump()한 JSON 목록으로, expires_at은 인덱스가 있는 별도 컬럼으로 저장
+    """
+
+    def __init__(self, db, table):
+        if table not in TOKEN_TABLES:
+            raise ValueError(f"Unknown token table: {table}")
+        self.name = table
+        self.db = db
+        self.evicted = 0
+        self._select = f"SELECT data, expires_at FROM {table} WHERE token_hash = ?"
+        self._upsert = (f"INSERT OR REPLACE INTO {table} (token_hash, expires_at, data, user_id, client_id) "
+                        f"VALUES (?, ?, ?, ?, ?)")
+        self._delete = f"DELETE FROM {table} WHERE token_hash = ?"
+        self._count = f"SELECT COUNT(*) FROM {table}"
+        self._sweep = (f"DELETE FROM {table} WHERE rowid IN "
+                       f"(SELECT rowid FROM {table} WHERE expires_at <= ? LIMIT ?)")
+        self._delete_by = {column: f"DELETE FROM {table} WHERE {column} = ?" for column in TOKEN_OWNER_COLUMNS}
+
+    @staticmethod
+    def _decode(row):
+        return load_record(json.loads(row[0]), row[1])
+
+    def get(self, key, default=None):
+        row = self.db.connection().execute(self._select, (hash_token(key),)).fetchone()
+        value = self._decode(row) if row else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.db.connection().execute(
+            self._upsert,
+            (hash_token(key), value.expires_at, json.dumps(value.dump()), value.user_id, value.client_id)
+        )
+
+    def __delitem__(self, key):
+        if self.db.connection().execute(self._delete, (hash_token(key),)).rowcount == 0:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return self.db.connection().execute(self._count).fetchone()[0]
+
+    def pop(self, key, default=None):
+        value = self.get(key)
+        if value is None:
+            return default
+        # 동시에 같은 코드를 사용하는 경우 한 쪽만 삭제에 성공
+        if self.db.connection().execute(self._delete, (hash_token(key),)).rowcount == 0:
+            return default
+        return value
+
+    def fits(self, value):
+        """value를 저장할 수 있는지 (TEXT 컬럼이므로 크기 제한 없음)"""
+        return True
+
+    def remove_by(self, field, value):
+        """field(user_id / client_id) 값이 value인 행 모두 삭제 (인덱스 사용)"""
+        return self.db.connection().execute(self._delete_by[field], (value,)).rowcount
+
+    def evict(self, key):
+        if self.db.connection().execute(self._delete, (hash_token(key),)).rowcount:
+            self.evicted += 1
+
+    def sweep(self, now=None, max_batch=1000):
+        if now is None:
+            now = time.time()
+        evicted = self.db.connection().execute(self._sweep, (now, max_batch)).rowcount
+        self.evicted += evicted
+        return evicted
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "live": len(self),
+            "evicted": self.evicted
+        }
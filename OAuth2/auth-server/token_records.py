@@ -0,0 +1,130 @@
+"""
+토큰 저장소에 들어가는 레코드 타입
+
+dict 대신 __slots__ 클래스를 사용해 토큰 하나당 메모리를 줄임
+- 인스턴스 __dict__ 없음 (dict + datetime 대비 수백 바이트 절약)
+- user_id / client_id는 sys.intern → 같은 사용자/클라이언트의 토큰 수백만 개가 문자열 하나를 공유
+- scope는 목록 대신 비트마스크 (scopes.SCOPES), 만료는 datetime 대신 정수 epoch 초
+  → 검증 경로는 정수 비교만 함
+
+sqlite / shared 저장소는 dump()로 [KIND, 필드...] 목록을 JSON 저장하고
+load_record()로 되살린다 (expires_at은 저장소의 별도 컬럼)
+"""
+import sys
+
+from scopes import SCOPES
+
+
+class TokenRecord:
+    __slots__ = ()
+    KIND = None
+    FIELDS = ()  # expires_at을 제외한 저장 필드 (dump/load 순서)
+
+    @property
+    def scopes(self):
+        """scope 이름 튜플"""
+        return SCOPES.names(self.scope_mask)
+
+    def dump(self):
+        return [self.KIND] + [getattr(self, name) for name in self.FIELDS]
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS + ("expires_at",))
+        return f"{type(self).__name__}({fields})"
+
+
+class AccessToken(TokenRecord):
+    __slots__ = ("user_id", "client_id", "scope_mask", "family_id", "expires_at")
+    KIND = "at"
+    FIELDS = ("user_id", "client_id", "scope_mask", "family_id")
+
+    def __init__(self, user_id, client_id, scope_mask, family_id, expires_at):
+        self.user_id = sys.intern(user_id)
+        self.client_id = sys.intern(client_id)
+        self.scope_mask = scope_mask
+        self.family_id = family_id
+        self.expires_at = int(expires_at)
+
+
+class RefreshToken(TokenRecord):
+    __slots__ = ("user_id", "client_id", "scope_mask", "family_id", "rotated", "expires_at")
+    KIND = "rt"
+    FIELDS = ("user_id", "client_id", "scope_mask", "family_id", "rotated")
+
+    def __init__(self, user_id, client_id, scope_mask, family_id, rotated, expires_at):
+        self.user_id = sys.intern(user_id)
+        self.client_id = sys.intern(client_id)
+        self.scope_mask = scope_mask
+        self.family_id = family_id
+        self.rotated = rotated  # 이미 회전(사용)된 refresh token
+        self.expires_at = int(expires_at)
+
+
+class AuthorizationCode(TokenRecord):
+    __slots__ = ("client_id", "user_id", "redirect_uri", "scope_mask",
+                 "code_challenge", "code_challenge_method", "expires_at")
+    KIND = "ac"
+    FIELDS = ("client_id", "user_id", "redirect_uri", "scope_mask",
+              "code_challenge", "code_challenge_method")
+
+    def __init__(self, client_id, user_id, redirect_uri, scope_mask,
+                 code_challenge, code_challenge_method, expires_at):
+        self.client_id = sys.intern(client_id)
+        self.user_id = sys.intern(user_id)
+        self.redirect_uri = redirect_uri
+        self.scope_mask = scope_mask
+        self.code_challenge = code_challenge
+        self.code_challenge_method = code_challenge_method
+        self.expires_at = int(expires_at)
+
+
+class TokenFamily(TokenRecord):
+    __slots__ = ("user_id", "client_id", "revoked", "expires_at")
+    KIND = "tf"
+    FIELDS = ("user_id", "client_id", "revoked")
+
+    def __init__(self, user_id, client_id, revoked, expires_at):
+        self.user_id = sys.intern(user_id)
+        self.client_id = sys.intern(client_id)
+        self.revoked = revoked
+        self.expires_at = int(expires_at)
+
+
+class AuthorizationRequest(TokenRecord):
+    """
+    검증을 마친 /authorize 요청 (PAR request_uri 또는 로그인 중인 세션의 핸들로 조회)
+    아직 로그인 전이므로 user_id 없음
+    """
+    __slots__ = ("client_id", "redirect_uri", "scope_mask", "state",
+                 "code_challenge", "code_challenge_method", "expires_at")
+    KIND = "ar"
+    FIELDS = ("client_id", "redirect_uri", "scope_mask", "state",
+              "code_challenge", "code_challenge_method")
+    user_id = None
+
+    def __init__(self, client_id, redirect_uri, scope_mask, state,
+                 code_challenge, code_challenge_method, expires_at):
+        self.client_id = sys.intern(client_id)
+        self.redirect_uri = redirect_uri
+        self.scope_mask = scope_mask
+        self.state = state
+        self.code_challenge = code_challenge
+        self.code_challenge_method = code_challenge_method
+        self.expires_at = int(expires_at)
+
+
+RECORD_TYPES = {cls.KIND: cls for cls in (AccessToken, RefreshToken, AuthorizationCode, TokenFamily,
+                                          AuthorizationRequest)}
+
+
+def load_record(payload, expires_at):
+    """
+    dump() 결과 → 레코드
+    이전 버전의 dict 형식 값은 None (다시 로그인하면 새 형식으로 발급됨)
+    """
+    if not isinstance(payload, list):
+        return None
+    cls = RECORD_TYPES.get(payload[0])
+    if cls is None:
+        return None
+    return cls(*payload[1:], expires_at)
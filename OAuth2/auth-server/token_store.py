@@ -0,0 +1,199 @@
+"""
+만료 시간 인덱스를 가진 토큰 저장소
+Authorization Code / Access Token / Refresh Token 저장에 사용
+
+- 조회/저장/삭제는 dict와 같은 O(1)
+- 만료 시간(expires_at)을 tick 단위 버킷(타이밍 휠)으로 인덱싱
+- 백그라운드 스위퍼가 만료된 항목을 정해진 배치 크기만큼씩 제거
+- 선택적 보조 인덱스 (예: user_id, client_id → 키 집합)
+  → 사용자/클라이언트의 토큰 일괄 폐기가 전체 스캔 없이 영향받는 항목 수 k에 비례
+"""
+import heapq
+import threading
+import time
+
+
+class TokenStoreFull(Exception):
+    """저장소에 새 항목을 넣을 자리가 없음 (고정 크기 저장소, 만료 항목이 스윕되면 다시 가능)"""
+
+
+def expiry_epoch(value):
+    """저장된 레코드(token_records)의 만료 시각 (정수 epoch 초)"""
+    return value.expires_at
+
+
+class TokenStore:
+    """
+    만료 인덱스가 있는 토큰 저장소
+
+    값은 token_records의 레코드 (정수 expires_at 속성)
+    만료 버킷에서는 삭제된 키를 바로 지우지 않고, 스윕할 때 건너뛴다 (lazy deletion).
+    보조 인덱스(index_fields)는 항목이 사라질 때 바로 갱신한다.
+    """
+
+    def __init__(self, name, resolution=1, index_fields=()):
+        self.name = name
+        self.resolution = resolution  # 버킷 하나가 담당하는 시간 (초)
+        self.evicted = 0              # 만료로 제거된 항목 수
+        self._data = {}
+        self._buckets = {}            # {tick: [key, ...]}
+        self._ticks = []              # 버킷 tick의 min-heap
+        self._indexes = {field: {} for field in index_fields}  # {field: {값: {key, ...}}}
+        self._lock = threading.Lock()
+
+    # ----- dict 호환 인터페이스 -----
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        tick = int(expiry_epoch(value) // self.resolution)
+        with self._lock:
+            self._data[key] = value
+            bucket = self._buckets.get(tick)
+            if bucket is None:
+                # 새 tick일 때만 heap push (같은 초에 발급된 토큰은 append만)
+                self._buckets[tick] = [key]
+                heapq.heappush(self._ticks, tick)
+            else:
+                bucket.append(key)
+            for field, index in self._indexes.items():
+                index.setdefault(getattr(value, field), set()).add(key)
+
+    def __delitem__(self, key):
+        if self._remove(key) is None:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def pop(self, key, default=None):
+        value = self._remove(key)
+        return default if value is None else value
+
+    def fits(self, value):
+        """value를 저장할 수 있는지 (메모리 저장소는 크기 제한 없음)"""
+        return True
+
+    def _remove(self, key):
+        """항목 삭제 + 보조 인덱스 갱신, 삭제한 값 반환 (없으면 None)"""
+        if not self._indexes:
+            return self._data.pop(key, None)
+        with self._lock:
+            value = self._data.pop(key, None)
+            if value is not None:
+                self._unindex(key, value)
+            return value
+
+    def _unindex(self, key, value):
+        # self._lock을 잡은 상태에서 호출
+        for field, index in self._indexes.items():
+            keys = index.get(getattr(value, field))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[getattr(value, field)]
+
+    # ----- 보조 인덱스 -----
+
+    def keys_by(self, field, value):
+        """field 값이 value인 항목의 키 목록 (인덱스 조회, O(k))"""
+        with self._lock:
+            return list(self._indexes[field].get(value, ()))
+
+    def remove_by(self, field, value):
+        """
+        field 값이 value인 항목 모두 삭제 (사용자/클라이언트 단위 폐기)
+        반환값: 삭제한 항목 수
+        """
+        removed = 0
+        for key in self.keys_by(field, value):
+            if self._remove(key) is not None:
+                removed += 1
+        return removed
+
+    # ----- 만료 처리 -----
+
+    def evict(self, key):
+        """만료된 항목 제거 (조회 시점에 만료를 발견한 경우)"""
+        if self._remove(key) is not None:
+            self.evicted += 1
+
+    def sweep(self, now=None, max_batch=1000):
+        """
+        만료된 항목을 최대 max_batch개까지 확인하고 제거
+        반환값: 이번에 제거한 항목 수
+        """
+        if now is None:
+            now = time.time()
+        # 현재 tick 이전의 버킷은 모두 만료된 항목만 담고 있다
+        due_tick = int(now // self.resolution)
+        processed = 0
+        evicted = 0
+
+        with self._lock:
+            while self._ticks and self._ticks[0] < due_tick and processed < max_batch:
+                tick = self._ticks[0]
+                bucket = self._buckets[tick]
+                take = min(len(bucket), max_batch - processed)
+
+                for key in bucket[:take]:
+                    value = self._data.get(key)
+                    # 이미 삭제됐거나(사용된 코드 등) 다시 저장된 키는 건너뜀
+                    if value is not None and expiry_epoch(value) <= now:
+                        del self._data[key]
+                        self._unindex(key, value)
+                        evicted += 1
+                processed += take
+
+                if take == len(bucket):
+                    heapq.heappop(self._ticks)
+                    del self._buckets[tick]
+                else:
+                    del bucket[:take]
+
+            self.evicted += evicted
+
+        return evicted
+
+    def stats(self):
+        """저장소 상태 (살아있는 항목 수 / 만료로 제거된 항목 수)"""
+        return {
+            "name": self.name,
+            "live": len(self._data),
+            "evicted": self.evicted,
+            "buckets": len(self._buckets)
+        }
+
+
+class TokenSweeper(threading.Thread):
+    """
+    만료 토큰 백그라운드 스위퍼
+    interval초마다 각 저장소를 batch_size 단위로 스윕
+    """
+
+    def __init__(self, stores, interval=5.0, batch_size=1000):
+        super().__init__(name="token-sweeper", daemon=True)
+        self.stores = stores
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            backlog = False
+            for store in self.stores:
+                if store.sweep(max_batch=self.batch_size) >= self.batch_size:
+                    backlog = True
+
+            # 밀린 만료 항목이 있으면 잠깐 양보하고 바로 다음 배치 처리
+            self._stop_event.wait(0.01 if backlog else self.interval)
+
+    def stop(self):
+        self._stop_event.set()
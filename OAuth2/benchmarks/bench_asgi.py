@@ -0,0 +1,168 @@
+"""
+WSGI(app.py / serve_prefork.py) vs ASGI(asgi_app.py) 동시 연결 벤치마크
+
+keep-alive 연결 N개(기본 1000)를 동시에 열어 두고 각 연결이 요청을 계속 보냄
+클라이언트는 asyncio 스트림으로 직접 HTTP/1.1을 구현 (연결 수천 개를 스레드 없이 유지)
+
+사용법:
+    # 서버 두 개를 먼저 실행
+    python ../auth-server/serve_prefork.py                         # WSGI, :5000
+    hypercorn asgi_app:app --bind 0.0.0.0:5001 --workers 4         # ASGI (auth-server 디렉토리에서)
+
+    python bench_asgi.py --target wsgi=http://localhost:5000 --target asgi=http://localhost:5001 \\
+        --connections 1000 --duration 20 --path /userinfo
+"""
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import time
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from config import REDIRECT_URI_BACKEND
+
+CLIENT_ID = "client_backend"
+CLIENT_SECRET = "secret_backend"
+
+
+def obtain_token(base_url, redirect_uri, username, password):
+    """Authorization Code 플로우를 한 번 실행해 Access Token 발급 (Confidential Client)"""
+    http = requests.Session()
+    http.get(f"{base_url}/authorize", params={
+        'client_id': CLIENT_ID, 'redirect_uri': redirect_uri,
+        'response_type': 'code', 'scope': 'profile email'
+    }).raise_for_status()
+    http.post(f"{base_url}/authorize", data={'username': username, 'password': password}).raise_for_status()
+    response = http.post(f"{base_url}/consent", data={'action': 'approve'}, allow_redirects=False)
+    code = parse_qs(urlparse(response.headers['Location']).query)['code'][0]
+    response = http.post(f"{base_url}/token", data={
+        'grant_type': 'authorization_code', 'code': code, 'redirect_uri': redirect_uri,
+        'client_id': CLIENT_ID, 'client_secret': CLIENT_SECRET
+    })
+    response.raise_for_status()
+    return response.json()['access_token']
+
+
+async def read_response(reader):
+    """상태 코드만 확인하고 본문은 Content-Length만큼 버림"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    status = int(status_line.split()[1])
+    length = 0
+    close = False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name = name.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "connection" and value.strip().lower() == "close":
+            close = True
+    if length:
+        await reader.readexactly(length)
+    return status, close
+
+
+async def connection_worker(host, port, request_bytes, deadline, latencies, errors):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            start = time.perf_counter()
+            writer.write(request_bytes)
+            await writer.drain()
+            status, close = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors["status"] += 1
+            if close:
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+            errors["connection"] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.05)
+    if writer is not None:
+        writer.close()
+
+
+async def run_target(base_url, path, token, connections, duration):
+    url = urlparse(base_url)
+    host, port = url.hostname, url.port or 80
+    request_bytes = (
+        f"GET {path} HTTP/1.1\r\n"
+        f"Host: {host}:{port}\r\n"
+        f"Authorization: Bearer {token}\r\n"
+        f"Connection: keep-alive\r\n\r\n"
+    ).encode()
+
+    latencies = []
+    errors = {"status": 0, "connection": 0}
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        connection_worker(host, port, request_bytes, deadline, latencies, errors)
+        for _ in range(connections)
+    ])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    pick = lambda pct: latencies[min(len(latencies) - 1, int(len(latencies) * pct))] * 1000 if latencies else 0
+    return {
+        "requests": len(latencies),
+        "req_per_sec": len(latencies) / elapsed,
+        "p50_ms": pick(0.50),
+        "p99_ms": pick(0.99),
+        "status_errors": errors["status"],
+        "connection_errors": errors["connection"]
+    }
+
+
+def raise_fd_limit(connections):
+    """연결 수만큼 파일 디스크립터 확보"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = connections + 256
+    if soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--target', action='append', required=True, help='이름=URL (여러 번 지정)')
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--path', default='/userinfo')
+    parser.add_argument('--redirect-uri', default=REDIRECT_URI_BACKEND)
+    parser.add_argument('--username', default='user1')
+    parser.add_argument('--password', default='pass1')
+    args = parser.parse_args()
+
+    raise_fd_limit(args.connections)
+
+    results = {}
+    for target in args.target:
+        name, _, base_url = target.partition('=')
+        base_url = base_url.rstrip('/')
+        # 서버마다 토큰 저장소가 따로이므로 대상 서버에서 발급
+        token = obtain_token(base_url, args.redirect_uri, args.username, args.password)
+        print(f"{name}: {args.connections} connections x {args.duration}s → {base_url}{args.path}")
+        results[name] = asyncio.run(run_target(base_url, args.path, token, args.connections, args.duration))
+
+    print(f"\n{'server':<10}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'status err':>12}{'conn err':>10}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['requests']:>10}{r['req_per_sec']:>10.0f}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+              f"{r['status_errors']:>12}{r['connection_errors']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+/authorize 파라미터 검증 비용 - 등록된 클라이언트 수에 따른 변화
+
+동적 등록(register_client)으로 클라이언트 N개(기본 1천, 1만, 10만)를 만든 뒤 측정
+백엔드 x 개수 조합마다 별도 프로세스에서 실행
+
+- legacy:   이전 방식 (client dict 조회 2번 + redirect_uris 리스트 선형 검색)
+- lookup:   get_client + verify_redirect_uri (Client 레코드 한 번 조회 + 미리 만든 매처)
+- validate: endpoints.validate_authorization_request 전체 (scope 검사, PKCE 확인 포함)
+
+redirect URI는 클라이언트마다 --uris개, 검증에는 마지막 URI를 사용 (리스트 검색의 최악)
+사용법: python bench_clients.py [--counts 1000 10000 100000] [--uris 10] [--backends memory sqlite]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+AUTH_SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'auth-server')
+BACKENDS = ("memory", "sqlite")
+LOOKUPS = 20000
+
+
+def run_worker(count, uris):
+    sys.path.insert(0, AUTH_SERVER_DIR)
+    import database as db
+    from endpoints import validate_authorization_request
+
+    start = time.perf_counter()
+    clients = []
+    for i in range(count):
+        client = db.register_client({
+            "redirect_uris": [f"https://app{i}.example/cb{j}" for j in range(uris)],
+            "client_name": f"client {i}",
+            "token_endpoint_auth_method": "none",
+            "scope": "profile email"
+        })
+        clients.append((client.client_id, client.redirect_uris[-1]))
+    register_seconds = time.perf_counter() - start
+
+    sample = [random.choice(clients) for _ in range(LOOKUPS)]
+
+    # 이전 방식 재현: 메모리는 {client_id: dict}, SQLite는 매번 SELECT + JSON 파싱
+    # get_client와 verify_redirect_uri가 같은 클라이언트를 두 번 조회, redirect_uris는 리스트 검색
+    legacy_clients = {client.client_id: client.dump() for client in db.registered_clients.values()}
+    find = db.data_db.get_client if db.data_db else legacy_clients.get
+
+    def legacy(client_id, redirect_uri):
+        client = find(client_id)
+        return client and redirect_uri in find(client_id)["redirect_uris"]
+
+    def lookup(client_id, redirect_uri):
+        return db.verify_redirect_uri(db.get_client(client_id), redirect_uri)
+
+    def validate(client_id, redirect_uri):
+        return validate_authorization_request(client_id, redirect_uri, 'code', 'profile email', 's', 'challenge')
+
+    results = {"register_us": register_seconds / max(count, 1) * 1e6}
+    for name, fn in (("legacy", legacy), ("lookup", lookup), ("validate", validate)):
+        start = time.perf_counter()
+        for client_id, redirect_uri in sample:
+            fn(client_id, redirect_uri)
+        results[name] = (time.perf_counter() - start) / LOOKUPS * 1e6
+    assert validate(*sample[0])[1] is None
+
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--counts', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--uris', type=int, default=10, help='클라이언트당 redirect URI 수')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        run_worker(args.worker, args.uris)
+        return
+
+    print(f"{'clients':>10}  {'backend':<8}{'register us':>13}{'legacy us':>11}{'lookup us':>11}{'validate us':>13}")
+    print("-" * 68)
+    for backend in args.backends:
+        for count in args.counts:
+            with tempfile.TemporaryDirectory() as tmp:
+                env = dict(os.environ, HOST_IP='localhost', LOG_LEVEL='ERROR', RATE_LIMIT_ENABLED='0',
+                           AUTH_DB_BACKEND=backend, AUTH_TOKEN_BACKEND='memory',
+                           AUTH_DB_PATH=os.path.join(tmp, 'bench.db'), MAX_REGISTERED_CLIENTS=str(count))
+                out = subprocess.run(
+                    [sys.executable, __file__, '--worker', str(count), '--uris', str(args.uris)],
+                    env=env, capture_output=True, text=True
+                )
+            if out.returncode != 0:
+                print(f"{count:>10,}  {backend:<8}{'failed':>13}")
+                continue
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{count:>10,}  {backend:<8}{r['register_us']:>13.1f}{r['legacy']:>11.2f}"
+                  f"{r['lookup']:>11.2f}{r['validate']:>13.2f}")
+
+
+if __name__ == '__main__':
+    main()
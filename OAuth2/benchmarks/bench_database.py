@@ -0,0 +1,90 @@
+"""
+database.py 백엔드 처리량 비교 (memory vs sqlite)
+
+각 백엔드를 별도 프로세스에서 실행 (백엔드는 import 시점에 AUTH_DB_BACKEND로 결정)
+사용법: python bench_database.py [--ops 20000] [--threads 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+AUTH_SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'auth-server')
+
+
+def run_worker(ops, threads):
+    """현재 프로세스의 백엔드로 각 연산의 초당 처리량 측정"""
+    sys.path.insert(0, AUTH_SERVER_DIR)
+    import database as db
+
+    def timed(name, fn):
+        per_thread = ops // threads
+
+        def loop(_):
+            for i in range(per_thread):
+                fn(i)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(loop, range(threads)))
+        elapsed = time.perf_counter() - start
+        return name, round(per_thread * threads / elapsed)
+
+    tokens = [db.generate_access_token("user1", "client_backend", ["profile", "email"])
+              for _ in range(1000)]
+    redirect_uri = db.registry.clients["client_backend"]["redirect_uris"][0]
+
+    # 게시물이 많은 사용자에서도 페이지 조회 비용이 일정한지 확인
+    for i in range(5000):
+        db.add_user_post("user2", f"post {i}", "content")
+
+    def code_roundtrip(i):
+        code = db.generate_authorization_code("client_backend", "user1", redirect_uri, ["profile"])
+        db.verify_authorization_code(code, "client_backend", redirect_uri)
+
+    results = dict([
+        timed("generate_access_token", lambda i: db.generate_access_token("user1", "client_backend", ["profile"])),
+        timed("verify_access_token", lambda i: db.verify_access_token(tokens[i % len(tokens)])),
+        timed("authorization_code_roundtrip", code_roundtrip),
+        timed("get_user", lambda i: db.get_user("user1")),
+        timed("get_user_posts", lambda i: db.get_user_posts("user1")),
+        timed("get_user_posts_page", lambda i: db.get_user_posts_page("user2", 20, after=(i * 7) % 5000)),
+    ])
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ops', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.ops, args.threads)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in ('memory', 'sqlite'):
+            env = dict(os.environ, AUTH_DB_BACKEND=backend,
+                       AUTH_DB_PATH=os.path.join(tmp, 'bench.db'), HOST_IP='localhost')
+            out = subprocess.run(
+                [sys.executable, __file__, '--worker', '--ops', str(args.ops), '--threads', str(args.threads)],
+                env=env, capture_output=True, text=True, check=True
+            )
+            results[backend] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    print(f"\n{'operation':<32}{'memory ops/s':>14}{'sqlite ops/s':>14}{'ratio':>8}")
+    print("-" * 68)
+    for name, mem in results['memory'].items():
+        sql = results['sqlite'][name]
+        print(f"{name:<32}{mem:>14,}{sql:>14,}{mem / sql:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+client-backend → Authorization Server 호출 지연 시간: 매번 새 연결 vs 연결 풀(keep-alive)
+
+같은 프로세스에서 Authorization Server를 띄우고 /userinfo를 반복 호출
+- bare:   requests.get (호출마다 TCP 연결 생성)
+- pooled: AuthServerClient (client-backend의 공유 클라이언트)
+
+사용법: python bench_http_client.py [--calls 500] [--threads 1]
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# 두 디렉터리 모두 app.py가 있으므로 auth-server를 앞에 둔다
+sys.path.insert(0, os.path.join(BASE_DIR, 'client-backend'))
+sys.path.insert(0, os.path.join(BASE_DIR, 'auth-server'))
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+import requests
+from werkzeug.serving import make_server
+
+
+def measure(call, calls, threads):
+    latencies = []
+    lock = threading.Lock()
+
+    def one(_):
+        start = time.perf_counter()
+        response = call()
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200, response.status_code
+        with lock:
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(calls)))
+    total = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "avg_ms": sum(latencies) / len(latencies) * 1000,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "calls_per_sec": calls / total
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--port', type=int, default=5057)
+    args = parser.parse_args()
+
+    from app import app
+    from database import generate_access_token
+    from http_client import AuthServerClient
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', args.port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    base = f'http://127.0.0.1:{args.port}'
+    headers = {'Authorization': f"Bearer {generate_access_token('user1', 'client_backend', ['profile', 'email'])}"}
+    client = AuthServerClient(base)
+
+    # 워밍업
+    requests.get(f'{base}/userinfo', headers=headers)
+    client.get('/userinfo', headers=headers)
+
+    bare = measure(lambda: requests.get(f'{base}/userinfo', headers=headers), args.calls, args.threads)
+    pooled = measure(lambda: client.get('/userinfo', headers=headers), args.calls, args.threads)
+    server.shutdown()
+
+    print(f"\n/userinfo x {args.calls} (threads={args.threads})\n")
+    print(f"{'':<10}{'avg ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'calls/s':>10}")
+    for name, r in (("bare", bare), ("pooled", pooled)):
+        print(f"{name:<10}{r['avg_ms']:>10.2f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['calls_per_sec']:>10.0f}")
+    print(f"\n호출당 절약: {bare['avg_ms'] - pooled['avg_ms']:.2f} ms")
+
+    stats = client.stats()['pools'][0]
+    print(f"풀: 요청 {stats['requests']}회에 TCP 연결 {stats['connections_opened']}개")
+
+
+if __name__ == '__main__':
+    main()
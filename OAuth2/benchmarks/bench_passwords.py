@@ -0,0 +1,51 @@
+"""
+로그인(비밀번호 검증) 처리량 vs 검증 프로세스 풀 크기
+
+동시 로그인 요청 스레드 여러 개가 scrypt 해시를 검증할 때 초당 로그인 수를 측정
+풀 크기 0 = 요청 스레드에서 직접 계산 (풀 없음)
+
+사용법: python bench_passwords.py [--pool-sizes 0 1 2 4] [--threads 16] [--logins 200] [--n 16384]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'auth-server'))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[0, 1, 2, 4])
+    parser.add_argument('--threads', type=int, default=16, help='동시 로그인 요청 수')
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--n', type=int, default=2 ** 14, help='scrypt 작업량 N')
+    args = parser.parse_args()
+
+    os.environ['PASSWORD_SCRYPT_N'] = str(args.n)
+    import passwords
+
+    stored = passwords.hash_password('pass1')
+    single = time.perf_counter()
+    passwords.check_password('pass1', stored)
+    print(f"scrypt N={args.n}: 해시 1회 {(time.perf_counter() - single) * 1000:.1f} ms, CPU {os.cpu_count()}개\n")
+
+    print(f"{'pool size':>10}{'logins/s':>12}{'avg ms':>10}")
+    for size in args.pool_sizes:
+        passwords.configure_pool(size)
+        passwords.verify_password('pass1', stored)  # 풀 워커 기동 (측정에서 제외)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            results = list(pool.map(lambda _: passwords.verify_password('pass1', stored)[0],
+                                    range(args.logins)))
+        elapsed = time.perf_counter() - start
+        assert all(results)
+        print(f"{size:>10}{args.logins / elapsed:>12,.1f}{elapsed / args.logins * args.threads * 1000:>10.1f}")
+
+    passwords.configure_pool(0)
+
+
+if __name__ == '__main__':
+    main()
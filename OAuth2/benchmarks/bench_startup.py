@@ -0,0 +1,83 @@
+"""
+서비스 시작 시간 (모듈 import 시간) 측정
+
+대상마다 새 프로세스에서 import만 하고 걸린 시간을 측정 (인터프리터 기동 시간은 제외)
+HOST_IP는 설정하지 않음 → import 시점에 네트워크 IP 감지를 하는지가 그대로 드러남
+
+- config:            config 모듈
+- database:          auth-server database (토큰 저장소, 레지스트리)
+- auth-server:       auth-server app (Flask)
+- client-backend:    client-backend app
+- client-spa:        client-spa server (페이지 렌더링 포함)
+- registry (first):  database import + 레지스트리 파일 첫 로드 (첫 요청에서 생기는 비용)
+
+사용법: python bench_startup.py [--runs 15] [--tree ../]
+--tree로 다른 체크아웃의 OAuth2 디렉토리를 지정하면 변경 전/후를 비교할 수 있음
+    git worktree add /tmp/before <이전 커밋> && python bench_startup.py --tree /tmp/before/OAuth2
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+OAUTH2_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# {이름: (실행 디렉토리, import 후 실행할 코드)}
+TARGETS = {
+    "config": ("", "import config"),
+    "database": ("auth-server", "import database"),
+    "auth-server": ("auth-server", "import app"),
+    "client-backend": ("client-backend", "import app"),
+    "client-spa": ("client-spa", "import server"),
+    "registry (first)": ("auth-server", "import database; database.get_client('client_spa')"),
+}
+
+# 부모 프로세스에서 실행: 인터프리터 기동 이후 대상 코드 실행 시간만 출력
+TIMER = """
+import sys, time
+sys.path[:0] = [{cwd!r}, {root!r}]
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start)
+"""
+
+
+def measure(tree, cwd, code, runs):
+    root = os.path.abspath(tree)
+    cwd = os.path.join(root, cwd)
+    env = {k: v for k, v in os.environ.items() if k != 'HOST_IP'}
+    env.update(LOG_LEVEL='ERROR', RATE_LIMIT_ENABLED='0')
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, '-c', TIMER.format(cwd=cwd, root=root, code=code)],
+            cwd=cwd, env=env, capture_output=True, text=True
+        )
+        if out.returncode != 0:
+            return None
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=15)
+    parser.add_argument('--tree', default=OAUTH2_DIR, help='측정할 OAuth2 디렉토리')
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=list(TARGETS))
+    args = parser.parse_args()
+
+    print(f"{'target':<18}{'p50 ms':>10}{'min ms':>10}{'max ms':>10}")
+    print("-" * 48)
+    for name in args.targets:
+        cwd, code = TARGETS[name]
+        samples = measure(args.tree, cwd, code, args.runs)
+        if samples is None:
+            print(f"{name:<18}{'failed':>10}")
+            continue
+        print(f"{name:<18}{statistics.median(samples) * 1000:>10.1f}"
+              f"{min(samples) * 1000:>10.1f}{max(samples) * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
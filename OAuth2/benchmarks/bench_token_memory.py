@@ -0,0 +1,133 @@
+"""
+토큰 레코드 메모리 사용량 비교 (이전 dict 레코드 vs token_records의 __slots__ 레코드)
+
+살아있는 Access Token N개(기본 100만, 1000만)를 저장소에 채우고 프로세스 RSS 증가량을 측정
+레이아웃 x 개수 조합마다 별도 프로세스에서 실행 (이전 측정의 메모리가 섞이지 않도록)
+
+- dict:    {user_id, client_id, scopes(list), family_id, expires_at(datetime)} + dict 저장소
+- records: AccessToken(__slots__, interned id, scope 비트마스크, 정수 expires_at) + TokenStore (만료 인덱스 포함)
+
+사용법: python bench_token_memory.py [--counts 1000000 10000000] [--users 10000]
+1000만 개는 dict 레이아웃에서 7GB 이상 필요
+"""
+import argparse
+import json
+import os
+import secrets
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+AUTH_SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'auth-server')
+LAYOUTS = ("dict", "records")
+
+
+def rss_bytes():
+    """현재 RSS (Linux /proc, 그 외에는 최대 RSS)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_worker(layout, count, users):
+    sys.path.insert(0, AUTH_SERVER_DIR)
+    from scopes import SCOPES
+    from token_records import AccessToken
+    from token_store import TokenStore
+
+    # 요청마다 새로 만들어지는 문자열을 흉내 (폼 값 파싱 결과는 매번 다른 str 객체)
+    def user_id(i):
+        return "user" + str(i % users)
+
+    def client_id(i):
+        return "client_" + ("backend", "spa")[i % 2]
+
+    sample = []  # 검증 측정용 키 (양쪽 레이아웃에 같은 크기)
+
+    base = rss_bytes()
+    start = time.perf_counter()
+    now = time.time()
+
+    if layout == "dict":
+        store = {}
+        expires_at = datetime.now() + timedelta(hours=1)
+        for i in range(count):
+            token = secrets.token_urlsafe(32)
+            if i < 200000:
+                sample.append(token)
+            store[token] = {
+                "user_id": user_id(i),
+                "client_id": client_id(i),
+                "scopes": "profile email".split(),
+                "family_id": secrets.token_urlsafe(16),
+                "expires_at": expires_at + timedelta(microseconds=i)
+            }
+
+        def check(value):
+            return datetime.now() > value["expires_at"]
+    else:
+        store = TokenStore("access_tokens")
+        mask = SCOPES.mask("profile email".split())
+        for i in range(count):
+            token = secrets.token_urlsafe(32)
+            if i < 200000:
+                sample.append(token)
+            store[token] = AccessToken(
+                user_id(i), client_id(i), mask, secrets.token_urlsafe(16), now + 3600 + i % 3600
+            )
+
+        def check(value):
+            return time.time() > value.expires_at
+
+    fill_seconds = time.perf_counter() - start
+    used = rss_bytes() - base
+
+    # 검증 경로: 조회 + 만료 비교
+    start = time.perf_counter()
+    for key in sample:
+        check(store[key])
+    verify_ns = (time.perf_counter() - start) / len(sample) * 1e9
+
+    print(json.dumps({
+        "rss_bytes": used,
+        "bytes_per_token": used / count,
+        "fill_seconds": fill_seconds,
+        "verify_ns": verify_ns
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--counts', type=int, nargs='+', default=[1000000, 10000000])
+    parser.add_argument('--users', type=int, default=10000, help='서로 다른 사용자 수')
+    parser.add_argument('--layouts', nargs='+', choices=LAYOUTS, default=list(LAYOUTS))
+    parser.add_argument('--worker', nargs=2, metavar=('LAYOUT', 'COUNT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], int(args.worker[1]), args.users)
+        return
+
+    print(f"{'tokens':>12}  {'layout':<8}{'RSS MB':>10}{'B/token':>10}{'fill s':>9}{'verify ns':>11}")
+    print("-" * 60)
+    for count in args.counts:
+        for layout in args.layouts:
+            out = subprocess.run(
+                [sys.executable, __file__, '--worker', layout, str(count), '--users', str(args.users)],
+                env=dict(os.environ, HOST_IP='localhost'), capture_output=True, text=True
+            )
+            if out.returncode != 0:
+                # 메모리 부족 (OOM kill) 등
+                print(f"{count:>12,}  {layout:<8}{'failed (exit ' + str(out.returncode) + ')':>40}")
+                continue
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{count:>12,}  {layout:<8}{r['rss_bytes'] / 2**20:>10,.0f}{r['bytes_per_token']:>10.0f}"
+                  f"{r['fill_seconds']:>9.1f}{r['verify_ns']:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Prefork 멀티 워커 확장성 벤치마크 (1 → N 워커)
+
+워커 수별로 serve_prefork.py를 띄우고 클라이언트 프로세스들이 동시에
+/token(전체 PKCE 플로우), /userinfo, /introspect를 호출해 초당 요청 수를 측정
+토큰은 어느 워커가 발급했든 다른 워커에서 검증되어야 한다 (공유 토큰 테이블)
+
+사용법: python bench_workers.py [--max-workers 4] [--clients 4] [--threads 8] [--duration 5]
+"""
+import argparse
+import base64
+import hashlib
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+AUTH_SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'auth-server')
+HOST = '127.0.0.1'
+CLIENT_ID = 'client_spa'
+REDIRECT_URI = f'http://{HOST}:8081/callback.html'
+
+
+def obtain_token(http, base):
+    """PKCE Authorization Code 플로우로 Access Token 발급 (요청 4번)"""
+    verifier = secrets.token_urlsafe(48)
+    challenge = base64.urlsafe_b64encode(hashlib.sha256(verifier.encode()).digest()).decode().rstrip('=')
+    http.get(f'{base}/authorize', params={
+        'client_id': CLIENT_ID, 'redirect_uri': REDIRECT_URI, 'response_type': 'code',
+        'scope': 'profile email', 'state': 'bench',
+        'code_challenge': challenge, 'code_challenge_method': 'S256'
+    }).raise_for_status()
+    http.post(f'{base}/authorize', data={'username': 'user1', 'password': 'pass1'}).raise_for_status()
+    r = http.post(f'{base}/consent', data={'action': 'approve'}, allow_redirects=False)
+    code = parse_qs(urlparse(r.headers['Location']).query)['code'][0]
+    r = http.post(f'{base}/token', data={
+        'grant_type': 'authorization_code', 'code': code, 'redirect_uri': REDIRECT_URI,
+        'client_id': CLIENT_ID, 'code_verifier': verifier
+    })
+    r.raise_for_status()
+    return r.json()['access_token']
+
+
+def client_thread(base, deadline):
+    http = requests.Session()
+    requests_done = 0
+    errors = 0
+    token = obtain_token(http, base)
+    requests_done += 4
+    i = 0
+    while time.time() < deadline:
+        i += 1
+        if i % 10 == 0:
+            token = obtain_token(requests.Session(), base)
+            requests_done += 4
+        r1 = http.get(f'{base}/userinfo', headers={'Authorization': f'Bearer {token}'})
+        r2 = http.post(f'{base}/introspect', data={'token': token})
+        requests_done += 2
+        if r1.status_code != 200 or not r2.json().get('active'):
+            errors += 1
+    return requests_done, errors
+
+
+def client_process(job):
+    base, threads, deadline = job
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda _: client_thread(base, deadline), range(threads)))
+    return sum(r[0] for r in results), sum(r[1] for r in results)
+
+
+def wait_ready(base, timeout=15):
+    end = time.time() + timeout
+    while time.time() < end:
+        try:
+            requests.get(base, timeout=0.5)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--clients', type=int, default=4, help='클라이언트 프로세스 수')
+    parser.add_argument('--threads', type=int, default=8, help='클라이언트 프로세스당 스레드 수')
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    base = f'http://{HOST}:{args.port}'
+    rows = []
+    for workers in range(1, args.max_workers + 1):
+        with tempfile.TemporaryDirectory() as table_dir:
+            env = dict(os.environ, HOST_IP=HOST, AUTH_TOKEN_BACKEND='shared', SHARED_TABLE_DIR=table_dir,
+                       RATE_LIMIT_ENABLED='0')  # 처리량 측정이므로 요청 수 제한 끔
+            server = subprocess.Popen(
+                [sys.executable, 'serve_prefork.py', '--workers', str(workers),
+                 '--host', HOST, '--port', str(args.port)],
+                cwd=AUTH_SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                wait_ready(base)
+                deadline = time.time() + args.duration
+                start = time.time()
+                with Pool(args.clients) as pool:
+                    results = pool.map(client_process, [(base, args.threads, deadline)] * args.clients)
+                elapsed = time.time() - start
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait()
+
+        total = sum(r[0] for r in results)
+        errors = sum(r[1] for r in results)
+        rows.append((workers, total / elapsed, errors))
+        print(f"workers={workers}: {total / elapsed:,.0f} req/s (errors: {errors})")
+
+    print(f"\n{'workers':>8}{'req/s':>12}{'speedup':>10}{'errors':>8}")
+    for workers, rps, errors in rows:
+        print(f"{workers:>8}{rps:>12,.0f}{rps / rows[0][1]:>9.2f}x{errors:>8}")
+
+
+if __name__ == '__main__':
+    main()
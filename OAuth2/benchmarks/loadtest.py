@@ -0,0 +1,255 @@
+"""
+Authorization Code + PKCE 전체 플로우 부하 테스트
+
+플로우 1회:
+    authorize (GET) → login (POST /authorize) → consent → token (code_verifier)
+    → userinfo → api_posts → api_settings → api_stats
+
+- inproc: Flask test client로 같은 프로세스 안에서 실행 (네트워크 제외한 서버 비용)
+- http:   실행 중인 서버에 실제 HTTP 요청 (requests.Session, keep-alive)
+
+단계별 p50 / p95 / p99 지연 시간과 초당 처리량, 초당 플로우 수를 출력하고 JSON으로 저장
+--baseline을 주면 이전 결과와 비교해 p95가 --max-regression 이상 느려지면 종료 코드 1
+
+사용법:
+    python loadtest.py --mode inproc --concurrency 8 --flows 200 --output result.json
+    python loadtest.py --mode http --base-url http://localhost:5000 --duration 30
+    python loadtest.py --mode inproc --baseline result.json --max-regression 0.2
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+
+AUTH_SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'auth-server')
+
+STAGES = ("authorize", "login", "consent", "token", "userinfo", "api_posts", "api_settings", "api_stats")
+
+
+class InprocClient:
+    """Flask test client (클라이언트마다 쿠키 저장소가 따로)"""
+
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def request(self, method, path, params=None, data=None, headers=None):
+        response = self._client.open(path, method=method, query_string=params, data=data, headers=headers)
+        return response.status_code, response.headers, response.get_json(silent=True)
+
+
+class HttpClient:
+    """실제 HTTP 클라이언트 (연결 재사용)"""
+
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self._session = requests.Session()
+
+    def request(self, method, path, params=None, data=None, headers=None):
+        response = self._session.request(method, self.base_url + path, params=params, data=data,
+                                         headers=headers, allow_redirects=False)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return response.status_code, response.headers, body
+
+
+class Recorder:
+    """단계별 지연 시간 수집"""
+
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+        self.errors = {stage: 0 for stage in STAGES}
+        self.flows = 0
+        self._lock = threading.Lock()
+
+    def add_flow(self, timings, failed_stage=None):
+        with self._lock:
+            for stage, elapsed in timings.items():
+                self.samples[stage].append(elapsed)
+            if failed_stage:
+                self.errors[failed_stage] += 1
+            else:
+                self.flows += 1
+
+
+class FlowError(Exception):
+    def __init__(self, stage, status, timings):
+        super().__init__(f"{stage} failed with HTTP {status}")
+        self.stage = stage
+        self.timings = timings
+
+
+def run_flow(client, client_id, redirect_uri, username, password):
+    """PKCE 플로우 1회 실행, 단계별 소요 시간(초) 반환"""
+    timings = {}
+
+    def step(stage, expected, method, path, **kwargs):
+        start = time.perf_counter()
+        status, headers, body = client.request(method, path, **kwargs)
+        timings[stage] = time.perf_counter() - start
+        if status != expected:
+            raise FlowError(stage, status, timings)
+        return headers, body
+
+    verifier = secrets.token_urlsafe(48)
+    challenge = base64.urlsafe_b64encode(hashlib.sha256(verifier.encode()).digest()).decode().rstrip('=')
+
+    step("authorize", 200, 'GET', '/authorize', params={
+        'client_id': client_id, 'redirect_uri': redirect_uri, 'response_type': 'code',
+        'scope': 'profile email', 'state': secrets.token_urlsafe(8),
+        'code_challenge': challenge, 'code_challenge_method': 'S256'
+    })
+    step("login", 200, 'POST', '/authorize', data={'username': username, 'password': password})
+    headers, _ = step("consent", 302, 'POST', '/consent', data={'action': 'approve'})
+    code = parse_qs(urlparse(headers['Location']).query)['code'][0]
+
+    _, body = step("token", 200, 'POST', '/token', data={
+        'grant_type': 'authorization_code', 'code': code, 'redirect_uri': redirect_uri,
+        'client_id': client_id, 'code_verifier': verifier
+    })
+    auth = {'Authorization': f"Bearer {body['access_token']}"}
+
+    step("userinfo", 200, 'GET', '/userinfo', headers=auth)
+    step("api_posts", 200, 'GET', '/api/posts', headers=auth)
+    step("api_settings", 200, 'GET', '/api/settings', headers=auth)
+    step("api_stats", 200, 'GET', '/api/stats', headers=auth)
+    return timings
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder, elapsed, args):
+    stages = {}
+    for stage in STAGES:
+        values = sorted(recorder.samples[stage])
+        stages[stage] = {
+            "count": len(values),
+            "errors": recorder.errors[stage],
+            "per_sec": round(len(values) / elapsed, 1),
+            "p50_ms": round(percentile(values, 50) * 1000, 2) if values else None,
+            "p95_ms": round(percentile(values, 95) * 1000, 2) if values else None,
+            "p99_ms": round(percentile(values, 99) * 1000, 2) if values else None,
+        }
+    return {
+        "mode": args.mode,
+        "concurrency": args.concurrency,
+        "elapsed_sec": round(elapsed, 2),
+        "flows": recorder.flows,
+        "flows_per_sec": round(recorder.flows / elapsed, 2),
+        "stages": stages
+    }
+
+
+def print_report(result):
+    print(f"\n{result['mode']} | concurrency={result['concurrency']} | "
+          f"{result['flows']} flows in {result['elapsed_sec']}s = {result['flows_per_sec']} flows/s\n")
+    print(f"{'stage':<14}{'count':>8}{'err':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    print("-" * 68)
+    for stage, s in result['stages'].items():
+        fmt = lambda v: f"{v:>10.2f}" if v is not None else f"{'-':>10}"
+        print(f"{stage:<14}{s['count']:>8}{s['errors']:>6}{s['per_sec']:>10.1f}"
+              f"{fmt(s['p50_ms'])}{fmt(s['p95_ms'])}{fmt(s['p99_ms'])}")
+
+
+def compare(result, baseline_path, max_regression):
+    """p95가 기준보다 max_regression 비율 이상 느려진 단계 목록"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = []
+    for stage, s in result['stages'].items():
+        base = baseline['stages'].get(stage, {}).get('p95_ms')
+        if base and s['p95_ms'] and s['p95_ms'] > base * (1 + max_regression):
+            regressions.append(f"{stage}: p95 {base}ms → {s['p95_ms']}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mode', choices=('inproc', 'http'), default='inproc')
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--flows', type=int, default=200, help='실행할 전체 플로우 수')
+    parser.add_argument('--duration', type=float, help='지정하면 플로우 수 대신 시간(초)만큼 실행')
+    parser.add_argument('--client-id', default='client_spa')
+    parser.add_argument('--redirect-uri', help='기본: config의 REDIRECT_URI_SPA')
+    parser.add_argument('--username', default='user1')
+    parser.add_argument('--password', default='pass1')
+    parser.add_argument('--output', help='결과 JSON 파일')
+    parser.add_argument('--baseline', help='비교할 이전 결과 JSON')
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.join(AUTH_SERVER_DIR, '..'))
+    from config import REDIRECT_URI_SPA
+    redirect_uri = args.redirect_uri or REDIRECT_URI_SPA
+
+    if args.mode == 'inproc':
+        os.environ.setdefault('LOG_LEVEL', 'WARNING')
+        # 같은 IP / 사용자로 플로우를 반복하므로 요청 수 제한은 끔
+        os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+        sys.path.insert(0, AUTH_SERVER_DIR)
+        from app import app
+        make_client = lambda: InprocClient(app)
+    else:
+        make_client = lambda: HttpClient(args.base_url)
+
+    recorder = Recorder()
+    deadline = time.time() + args.duration if args.duration else None
+    remaining = [args.flows]
+    remaining_lock = threading.Lock()
+
+    def take_flow():
+        if deadline:
+            return time.time() < deadline
+        with remaining_lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def worker(_):
+        client = make_client()
+        while take_flow():
+            try:
+                recorder.add_flow(run_flow(client, args.client_id, redirect_uri, args.username, args.password))
+            except FlowError as e:
+                recorder.add_flow(e.timings, failed_stage=e.stage)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(worker, range(args.concurrency)))
+    result = summarize(recorder, time.perf_counter() - start, args)
+
+    print_report(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"\n결과 저장: {args.output}")
+
+    if args.baseline:
+        regressions = compare(result, args.baseline, args.max_regression)
+        if regressions:
+            print("\n❌ 성능 회귀:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print("\n✅ 기준 대비 회귀 없음")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
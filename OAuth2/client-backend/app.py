@@ -3,15 +3,22 @@ Confidential Client - 백엔드 웹 애플리케이션
 client_secret을 안전하게 보관할 수 있는 서버 사이드 애플리케이션
 """
 from flask import Flask, request, redirect, render_template, session, url_for, jsonify
-import requests
+import math
 import secrets
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from urllib.parse import urlencode
 
 # config 모듈 import
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from config import HOST_IP, AUTHORIZATION_SERVER, REDIRECT_URI_BACKEND
+from jsonlog import get_logger
+from http_client import AuthServerClient
+from token_manager import TokenManager, TokenRefreshError, TokenRefreshUnavailable, parse_retry_after
+
+log = get_logger("client-backend")
 
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(32)
@@ -28,17 +35,72 @@ CLIENT_SECRET = "secret_backend"  # 백엔드에서 안전하게 보관
 REDIRECT_URI = REDIRECT_URI_BACKEND
 SCOPE = "profile email"
 
+# Authorization Server 호출용 공유 클라이언트 (연결 풀 / 재시도 / 서킷 브레이커)
+auth_server = AuthServerClient(AUTHORIZATION_SERVER)
+
+# /profile 리소스 API 동시 호출 (페이지 지연 = 가장 느린 호출 1개)
+PROFILE_FANOUT_WORKERS = int(os.environ.get('PROFILE_FANOUT_WORKERS', '16'))
+PROFILE_FANOUT_TIMEOUT = float(os.environ.get('PROFILE_FANOUT_TIMEOUT', '5'))
+PROFILE_RESOURCES = {
+    'posts': '/api/posts',
+    'settings': '/api/settings',
+    'stats': '/api/stats'
+}
+profile_pool = ThreadPoolExecutor(max_workers=PROFILE_FANOUT_WORKERS, thread_name_prefix="profile-fanout")
+
 # 임시 state 저장소 (세션이 작동하지 않을 때 대안)
 # 실제 운영에서는 Redis 등을 사용
 from datetime import datetime, timedelta
 state_storage = {}  # {state: {'created_at': datetime, 'session_id': str}}
 
 
+def refresh_access_token(refresh_token):
+    """grant_type=refresh_token으로 새 토큰 발급 (Refresh Token 회전)"""
+    response = auth_server.post("/token", data={
+        'grant_type': 'refresh_token',
+        'refresh_token': refresh_token,
+        'client_id': CLIENT_ID,
+        'client_secret': CLIENT_SECRET
+    })
+    data = json_body(response)
+    if response.status_code == 200 and 'access_token' in data:
+        log.info("token_refreshed")
+        return data
+    
+    error = data.get('error', 'refresh_failed')
+    log.warning("token_refresh_failed", status=response.status_code, error=error)
+    # Refresh Token / 클라이언트 인증이 거부된 경우만 토큰을 버림 (다시 로그인 필요)
+    if response.status_code in (400, 401) and error in ('invalid_grant', 'invalid_client'):
+        raise TokenRefreshError(error, data.get('error_description'))
+    # 429 / 5xx / 예상하지 못한 응답: 토큰은 유지하고 Retry-After 뒤에 다시 갱신
+    raise TokenRefreshUnavailable(error, data.get('error_description'),
+                                  retry_after=parse_retry_after(response.headers.get('Retry-After')))
+
+
+def json_body(response):
+    """응답 JSON 객체 (JSON이 아니거나 객체가 아니면 빈 dict, 프록시 에러 페이지 등)"""
+    try:
+        data = response.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+# 세션별 토큰 저장 + 만료 전 자동 갱신 (같은 세션의 동시 갱신은 /token 호출 1번)
+token_manager = TokenManager(refresh_access_token)
+
+
+def current_access_token():
+    """화면 표시용 Access Token (없으면 None)"""
+    tokens = token_manager.get(session.get('sid'))
+    return tokens.access_token if tokens else None
+
+
 @app.route('/')
 def index():
     """메인 페이지"""
     user = session.get('user')
-    access_token = session.get('access_token')
+    access_token = current_access_token()
     
     return render_template('index.html', 
                          user=user, 
@@ -77,18 +139,33 @@ def login():
         'state': state
     }
     
+    # PAR (RFC 9126): 파라미터를 서버 간 POST로 먼저 보내고 짧은 request_uri로 리다이렉트
+    # 실패하면 파라미터를 URL에 담는 기존 방식으로 진행
+    request_uri = push_authorization_request(params)
+    if request_uri:
+        params = {'client_id': CLIENT_ID, 'request_uri': request_uri}
+    
     # Authorization Server의 /authorize 엔드포인트로 리다이렉트
     auth_url = f"{AUTHORIZATION_SERVER}/authorize?{urlencode(params)}"
     
-    print(f"\n🚀 사용자를 Authorization Server로 리다이렉트")
-    print(f"   State 생성: {state}")
-    print(f"   세션에 저장됨")
-    print(f"   메모리에도 저장됨")
-    print(f"   URL: {auth_url}\n")
+    log.info("login_redirect", state=state[:8], authorization_server=AUTHORIZATION_SERVER,
+             par=bool(request_uri))
     
     return redirect(auth_url)
 
 
+def push_authorization_request(params):
+    """Authorization 요청을 /par로 전송, request_uri 반환 (실패하면 None)"""
+    try:
+        response = auth_server.post("/par", data=dict(params, client_secret=CLIENT_SECRET))
+        if response.status_code == 201:
+            return response.json()['request_uri']
+        log.warning("par_failed", status=response.status_code)
+    except Exception as e:
+        log.warning("par_failed", error=str(e))
+    return None
+
+
 def cleanup_old_states():
     """10분 이상 된 state 삭제"""
     now = datetime.now()
@@ -112,8 +189,7 @@ def callback():
     # 에러 처리
     if error:
         error_description = request.args.get('error_description', 'Unknown error')
-        print(f"\n❌ Authorization 실패: {error}")
-        print(f"   설명: {error_description}\n")
+        log.warning("authorization_failed", error=error, description=error_description)
         return render_template('error.html', 
                              error=error, 
                              error_description=error_description)
@@ -124,30 +200,28 @@ def callback():
     # 세션이 없으면 메모리에서 확인
     stored_state_memory = state in state_storage
     
-    print(f"\n🔍 State 검증:")
-    print(f"   받은 state: {state}")
-    print(f"   세션에서 찾은 state: {stored_state_session}")
-    print(f"   메모리에서 찾음: {stored_state_memory}")
-    print(f"   세션 내용: {dict(session)}")
+    log.debug("state_check",
+              state=(state or "")[:8],
+              in_session=bool(stored_state_session),
+              in_memory=stored_state_memory)
     
     # 세션 또는 메모리 중 하나라도 일치하면 OK
     if not state:
-        print(f"\n❌ State가 없습니다")
+        log.warning("state_missing")
         return render_template('error.html', 
                              error="invalid_request", 
                              error_description="State parameter is missing")
     
     # 세션 확인
     if stored_state_session and state == stored_state_session:
-        print(f"✅ 세션에서 State 검증 성공")
+        log.debug("state_verified", source="session")
         session.pop('oauth_state', None)
     # 메모리 확인
     elif stored_state_memory:
-        print(f"✅ 메모리에서 State 검증 성공")
+        log.debug("state_verified", source="memory")
         del state_storage[state]
     else:
-        print(f"\n❌ State 불일치! CSRF 공격 가능성")
-        print(f"   사용 가능한 states: {list(state_storage.keys())}")
+        log.warning("state_mismatch", state=state[:8], pending_states=len(state_storage))
         return render_template('error.html', 
                              error="invalid_state", 
                              error_description=f"State parameter mismatch or expired. Received: {state}")
@@ -157,31 +231,29 @@ def callback():
                              error="missing_code", 
                              error_description="Authorization code not received")
     
-    print(f"\n✅ Authorization Code 받음: {code[:20]}...")
+    log.info("authorization_code_received", code=code[:8])
     
     # Authorization Code를 Access Token으로 교환
     try:
         token_data = exchange_code_for_token(code)
         
-        # 세션에 저장
-        session['access_token'] = token_data['access_token']
-        session['refresh_token'] = token_data.get('refresh_token')
-        session['token_type'] = token_data.get('token_type', 'Bearer')
+        # 토큰은 서버 메모리에, 세션 쿠키에는 sid만 저장 (이전 로그인의 토큰은 버림)
+        token_manager.discard(session.get('sid'))
+        session['sid'] = secrets.token_urlsafe(16)
+        token_manager.store(session['sid'], token_data)
         
-        print(f"\n✅ Access Token 받음: {token_data['access_token'][:20]}...")
+        log.info("access_token_received", scope=token_data.get('scope'))
         
         # 사용자 정보 가져오기
         user_info = get_user_info(token_data['access_token'])
         session['user'] = user_info
         
-        print(f"\n✅ 사용자 정보 받음:")
-        print(f"   이름: {user_info.get('name')}")
-        print(f"   이메일: {user_info.get('email')}\n")
+        log.info("userinfo_received", sub=user_info.get('sub'))
         
         return redirect(url_for('profile'))
         
     except Exception as e:
-        print(f"\n❌ 토큰 교환 실패: {str(e)}\n")
+        log.error("token_exchange_failed", error=str(e))
         return render_template('error.html', 
                              error="token_exchange_failed", 
                              error_description=str(e))
@@ -192,7 +264,7 @@ def exchange_code_for_token(code):
     Authorization Code를 Access Token으로 교환
     Confidential Client이므로 client_secret 사용
     """
-    token_url = f"{AUTHORIZATION_SERVER}/token"
+    token_url = "/token"
     
     # Token 요청 파라미터
     data = {
@@ -203,14 +275,10 @@ def exchange_code_for_token(code):
         'client_secret': CLIENT_SECRET  # ⭐ Confidential Client의 핵심
     }
     
-    print(f"\n🔄 Token 교환 요청:")
-    print(f"   URL: {token_url}")
-    print(f"   Code: {code[:20]}...")
-    print(f"   Client ID: {CLIENT_ID}")
-    print(f"   Client Secret: {CLIENT_SECRET[:10]}... (백엔드에서 안전하게 사용)")
+    log.debug("token_request", url=token_url, code=code[:8], client=CLIENT_ID)
     
     # POST 요청
-    response = requests.post(token_url, data=data)
+    response = auth_server.post(token_url, data=data)
     
     if response.status_code != 200:
         error_data = response.json()
@@ -224,17 +292,15 @@ def get_user_info(access_token):
     Access Token으로 사용자 정보 가져오기
     Resource Server의 /userinfo 엔드포인트 호출
     """
-    userinfo_url = f"{AUTHORIZATION_SERVER}/userinfo"
+    userinfo_url = "/userinfo"
     
     headers = {
         'Authorization': f'Bearer {access_token}'
     }
     
-    print(f"\n🔄 사용자 정보 요청:")
-    print(f"   URL: {userinfo_url}")
-    print(f"   Token: {access_token[:20]}...")
+    log.debug("userinfo_request", url=userinfo_url)
     
-    response = requests.get(userinfo_url, headers=headers)
+    response = auth_server.get(userinfo_url, headers=headers)
     
     if response.status_code != 200:
         error_data = response.json()
@@ -247,48 +313,86 @@ def get_user_info(access_token):
 def profile():
     """사용자 프로필 페이지"""
     user = session.get('user')
-    access_token = session.get('access_token')
+    sid = session.get('sid')
     
-    if not user:
+    if not user or not token_manager.get(sid):
         return redirect(url_for('index'))
     
-    # 사용자 게시물 조회
-    posts = []
-    settings = {}
-    stats = {}
+    # 게시물 / 설정 / 통계를 동시에 조회 (일부가 실패해도 나머지는 표시)
+    results, errors, timings = fetch_profile_resources(sid)
     
-    try:
-        posts = call_api('GET', '/api/posts', access_token)
-        settings = call_api('GET', '/api/settings', access_token)
-        stats = call_api('GET', '/api/stats', access_token)
-    except Exception as e:
-        print(f"⚠️ API 호출 오류: {e}")
+    # 갱신 실패로 토큰이 삭제되었으면 (Refresh Token 만료 / 폐기) 다시 로그인
+    if not token_manager.get(sid):
+        session.clear()
+        return redirect(url_for('index'))
     
     return render_template('profile.html', 
                          user=user, 
-                         access_token=access_token,
-                         posts=posts,
-                         settings=settings,
-                         stats=stats)
+                         access_token=current_access_token(),
+                         posts=results.get('posts') or [],
+                         settings=results.get('settings') or {},
+                         stats=results.get('stats') or {},
+                         errors=errors,
+                         timings=timings)
 
 
-def call_api(method, endpoint, access_token, data=None):
+def fetch_profile_resources(sid):
+    """
+    PROFILE_RESOURCES를 스레드 풀에서 동시에 호출
+    토큰이 만료 직전이면 호출들이 동시에 갱신을 시도하지만 token_manager가 /token 호출 1번으로 합침
+    반환: (결과 {이름: JSON}, 실패 {이름: 에러 메시지}, 호출별 소요 시간 {이름: ms})
     """
-    Access Token으로 보호된 API 호출
+    def timed_call(endpoint):
+        start = time.perf_counter()
+        try:
+            result, error = call_api('GET', endpoint, sid), None
+        except Exception as e:
+            result, error = None, str(e)
+        return result, error, (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    futures = {name: profile_pool.submit(timed_call, endpoint)
+               for name, endpoint in PROFILE_RESOURCES.items()}
+    done, _ = wait(futures.values(), timeout=PROFILE_FANOUT_TIMEOUT)
+
+    results, errors, timings = {}, {}, {}
+    for name, future in futures.items():
+        if future not in done:
+            # 늦은 호출은 기다리지 않음 (결과는 버려짐)
+            future.cancel()
+            errors[name] = f"timed out after {PROFILE_FANOUT_TIMEOUT}s"
+            timings[name] = PROFILE_FANOUT_TIMEOUT * 1000
+            continue
+        result, error, elapsed_ms = future.result()
+        timings[name] = round(elapsed_ms, 1)
+        if error:
+            errors[name] = error
+        else:
+            results[name] = result
+
+    timings['total'] = round((time.perf_counter() - start) * 1000, 1)
+    if errors:
+        log.warning("api_call_failed", failed=sorted(errors), errors=errors)
+    log.info("profile_fanout", timings_ms=timings, failed=len(errors))
+    return results, errors, timings
+
+
+def call_api(method, endpoint, sid, data=None):
     """
-    url = f"{AUTHORIZATION_SERVER}{endpoint}"
-    headers = {'Authorization': f'Bearer {access_token}'}
+    세션(sid)의 Access Token으로 보호된 API 호출
+    만료가 가까우면 먼저 갱신, 401이면 한 번 갱신 후 재시도 (갱신 실패 시 TokenRefreshError)
+    """
+    if method not in ('GET', 'POST', 'PUT'):
+        raise ValueError(f"Unsupported method: {method}")
     
-    if method == 'GET':
-        response = requests.get(url, headers=headers)
-    elif method == 'POST':
-        headers['Content-Type'] = 'application/json'
-        response = requests.post(url, headers=headers, json=data)
-    elif method == 'PUT':
+    def send(access_token):
+        headers = {'Authorization': f'Bearer {access_token}'}
+        if method == 'GET':
+            return auth_server.get(endpoint, headers=headers)
         headers['Content-Type'] = 'application/json'
-        response = requests.put(url, headers=headers, json=data)
-    else:
-        raise ValueError(f"Unsupported method: {method}")
+        return auth_server.request(method, endpoint, headers=headers, json=data)
+    
+    response = token_manager.call(sid, send)
     
     if response.status_code not in [200, 201]:
         raise Exception(f"API call failed: {response.status_code} - {response.text}")
@@ -299,61 +403,113 @@ def call_api(method, endpoint, access_token, data=None):
 @app.route('/api/create_post', methods=['POST'])
 def create_post():
     """게시물 작성 API 호출"""
-    access_token = session.get('access_token')
-    if not access_token:
-        print("❌ Access token not found in session")
+    sid = session.get('sid')
+    if not token_manager.get(sid):
+        log.warning("access_token_missing", endpoint="create_post")
         return jsonify({"error": "unauthorized"}), 401
     
     data = request.get_json()
-    print(f"\n📝 게시물 작성 요청:")
-    print(f"   Title: {data.get('title')}")
-    print(f"   Content: {data.get('content')}")
+    log.debug("create_post_request", title=data.get('title'))
     
     try:
-        result = call_api('POST', '/api/posts', access_token, data)
-        print(f"✅ 게시물 작성 성공: {result}")
+        result = call_api('POST', '/api/posts', sid, data)
+        log.info("post_created", post_id=result.get('id'))
         return jsonify(result)
+    except TokenRefreshError as e:
+        return jsonify({"error": "unauthorized", "message": str(e)}), 401
+    except TokenRefreshUnavailable as e:
+        return refresh_unavailable(e)
     except Exception as e:
-        print(f"❌ 게시물 작성 실패: {str(e)}")
+        log.warning("create_post_failed", error=str(e))
         return jsonify({"error": str(e)}), 400
 
 
 @app.route('/api/update_settings', methods=['POST'])
 def update_settings():
     """설정 업데이트 API 호출"""
-    access_token = session.get('access_token')
-    if not access_token:
+    sid = session.get('sid')
+    if not token_manager.get(sid):
         return jsonify({"error": "unauthorized"}), 401
     
     data = request.get_json()
     try:
-        result = call_api('PUT', '/api/settings', access_token, data)
+        result = call_api('PUT', '/api/settings', sid, data)
         return jsonify(result)
+    except TokenRefreshError as e:
+        return jsonify({"error": "unauthorized", "message": str(e)}), 401
+    except TokenRefreshUnavailable as e:
+        return refresh_unavailable(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
 
+def refresh_unavailable(e):
+    """일시적 갱신 실패 → 503 + Retry-After (로그인은 유지)"""
+    headers = {}
+    if e.retry_after is not None:
+        headers['Retry-After'] = str(math.ceil(e.retry_after))
+    return jsonify({"error": "temporarily_unavailable", "message": str(e)}), 503, headers
+
+
 @app.route('/logout')
 def logout():
-    """로그아웃"""
+    """로그아웃: Authorization Server에서 토큰 폐기 후 세션 삭제"""
+    revoke_tokens()
     session.clear()
-    print(f"\n🚪 로그아웃 완료\n")
+    log.info("logout")
     return redirect(url_for('index'))
 
 
+def revoke_tokens():
+    """
+    Refresh Token 폐기 (RFC 7009) → 같은 grant의 Access Token도 함께 무효
+    실패해도 로그아웃은 진행 (토큰은 어차피 만료됨)
+    """
+    tokens = token_manager.discard(session.get('sid'))
+    if not tokens:
+        return
+    token, hint = tokens.refresh_token, 'refresh_token'
+    if not token:
+        token, hint = tokens.access_token, 'access_token'
+    
+    try:
+        response = auth_server.post("/revoke", data={
+            'token': token,
+            'token_type_hint': hint,
+            'client_id': CLIENT_ID,
+            'client_secret': CLIENT_SECRET
+        })
+        if response.status_code != 200:
+            log.warning("token_revoke_failed", status=response.status_code)
+    except Exception as e:
+        log.warning("token_revoke_failed", error=str(e))
+
+
+@app.route('/debug/http_pool')
+def http_pool_stats():
+    """Authorization Server 연결 풀 / 서킷 브레이커 상태"""
+    return jsonify(auth_server.stats())
+
+
+@app.route('/debug/tokens')
+def token_stats():
+    """토큰 관리자 상태 (저장된 세션 수, 실제 갱신 / 합쳐진 갱신 / 401 재시도 횟수)"""
+    return jsonify(token_manager.stats())
+
+
 @app.route('/api/test')
 def api_test():
     """
     API 테스트 엔드포인트
     Access Token으로 보호된 API 호출 예시
     """
-    access_token = session.get('access_token')
+    sid = session.get('sid')
     
-    if not access_token:
+    if not token_manager.get(sid):
         return jsonify({"error": "Not authenticated"}), 401
     
     try:
-        user_info = get_user_info(access_token)
+        user_info = call_api('GET', '/userinfo', sid)
         return jsonify({
             "message": "API 호출 성공!",
             "user": user_info
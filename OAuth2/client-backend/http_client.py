@@ -0,0 +1,148 @@
+"""
+Authorization Server 호출용 공유 HTTP 클라이언트
+
+- 연결 풀 + keep-alive: 호출마다 TCP 연결을 새로 만들지 않음
+- 호출별 타임아웃 (connect, read)
+- 멱등 요청(GET/PUT)만 backoff 재시도. POST(/token 등)는 연결 자체가 실패한 경우만 재시도
+- 서킷 브레이커: 연속 실패가 쌓이면 일정 시간 바로 실패시켜 장애가 난 서버를 두드리지 않음
+"""
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+AUTH_HTTP_POOL_SIZE = int(os.environ.get('AUTH_HTTP_POOL_SIZE', '20'))
+AUTH_HTTP_CONNECT_TIMEOUT = float(os.environ.get('AUTH_HTTP_CONNECT_TIMEOUT', '2'))
+AUTH_HTTP_READ_TIMEOUT = float(os.environ.get('AUTH_HTTP_READ_TIMEOUT', '5'))
+AUTH_HTTP_RETRIES = int(os.environ.get('AUTH_HTTP_RETRIES', '2'))
+AUTH_HTTP_BACKOFF = float(os.environ.get('AUTH_HTTP_BACKOFF', '0.2'))
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_TIMEOUT = float(os.environ.get('CIRCUIT_RESET_TIMEOUT', '30'))
+
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 있어 요청을 보내지 않음"""
+
+
+class CircuitBreaker:
+    """
+    closed    → 정상, 실패가 failure_threshold번 연속되면 open
+    open      → reset_timeout 동안 모든 요청 즉시 실패
+    half_open → reset_timeout 후 요청 1개만 시험, 성공하면 closed / 실패하면 다시 open
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class AuthServerClient:
+    """Authorization Server 전용 HTTP 클라이언트 (스레드 간 공유)"""
+
+    def __init__(self, base_url, pool_size=AUTH_HTTP_POOL_SIZE,
+                 timeout=(AUTH_HTTP_CONNECT_TIMEOUT, AUTH_HTTP_READ_TIMEOUT),
+                 retries=AUTH_HTTP_RETRIES, backoff=AUTH_HTTP_BACKOFF, breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.requests = 0
+        self.failures = 0
+        self.rejected = 0  # 서킷이 열려서 보내지 않은 요청
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}),
+            raise_on_status=False
+        )
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                                    pool_block=False, max_retries=retry)
+        self._session = requests.Session()
+        self._session.mount('http://', self._adapter)
+        self._session.mount('https://', self._adapter)
+
+    def request(self, method, path, timeout=None, **kwargs):
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError(f"Authorization server circuit open ({self.base_url})")
+
+        self.requests += 1
+        try:
+            response = self._session.request(method, self.base_url + path,
+                                             timeout=timeout or self.timeout, **kwargs)
+        except requests.RequestException:
+            self.failures += 1
+            self.breaker.record_failure()
+            raise
+
+        # 4xx는 클라이언트 쪽 문제 (서버는 정상)
+        if response.status_code >= 500:
+            self.failures += 1
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request('PUT', path, **kwargs)
+
+    def stats(self):
+        """연결 풀 상태"""
+        pools = []
+        for key in list(self._adapter.poolmanager.pools.keys()):
+            pool = self._adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            pools.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "connections_opened": pool.num_connections,  # 지금까지 새로 연 TCP 연결 수
+                "requests": pool.num_requests,
+                # 큐에는 빈 자리(None)도 들어 있으므로 실제 연결만 센다
+                "idle": sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0,
+                "maxsize": pool.pool.maxsize if pool.pool else 0
+            })
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "circuit": self.breaker.state,
+            "pools": pools
+        }
@@ -0,0 +1,230 @@
+"""
+세션별 토큰 관리자 (Access Token 자동 갱신)
+
+- 토큰은 서버 메모리에 세션 id(sid)별로 저장, 세션 쿠키에는 sid만 들어감
+  (Flask 세션 쿠키는 서명만 되고 암호화되지 않으므로 Refresh Token을 넣지 않음)
+- 만료 TOKEN_REFRESH_SKEW초 전부터는 API 호출 전에 미리 갱신 (만료된 토큰으로 호출 → 401 → 재호출 왕복을 피함)
+- single-flight: 같은 세션의 동시 갱신은 /token 호출 1번으로 합침
+  (/profile 동시 호출 등). Refresh Token은 회전되므로 같은 토큰으로 두 번 갱신하면 재사용으로 간주되어 폐기됨
+- API가 401을 반환하면 (서버에서 폐기 / 시계 차이) 한 번만 갱신 후 새 토큰으로 재시도
+- 갱신 실패 중 토큰을 버리는 것은 invalid_grant / invalid_client (TokenRefreshError)뿐
+  429 / 5xx 등 일시적 실패(TokenRefreshUnavailable)는 토큰을 유지하고 Retry-After 동안 /token을 다시 부르지 않음
+"""
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from email.utils import parsedate_to_datetime
+
+TOKEN_REFRESH_SKEW = float(os.environ.get('TOKEN_REFRESH_SKEW', '60'))
+TOKEN_REFRESH_WAIT = float(os.environ.get('TOKEN_REFRESH_WAIT', '10'))
+# 마지막 사용 후 이 시간이 지난 세션의 토큰은 정리 (세션 쿠키 수명과 같게)
+TOKEN_SESSION_IDLE = float(os.environ.get('TOKEN_SESSION_IDLE', '3600'))
+# 일시적 갱신 실패 후 Retry-After가 없을 때 다시 시도하기까지 기다리는 시간
+TOKEN_REFRESH_RETRY = float(os.environ.get('TOKEN_REFRESH_RETRY', '5'))
+
+
+class TokenRefreshError(Exception):
+    """토큰 갱신 실패 (Refresh Token 만료 / 폐기 등) → 다시 로그인 필요"""
+
+    def __init__(self, error, description=None):
+        super().__init__(f"{error}: {description}" if description else error)
+        self.error = error
+
+
+class TokenRefreshUnavailable(Exception):
+    """일시적 갱신 실패 (429 / 5xx 등) → 토큰은 유지, retry_after초 뒤 다시 갱신"""
+
+    def __init__(self, error, description=None, retry_after=None):
+        super().__init__(f"{error}: {description}" if description else error)
+        self.error = error
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value):
+    """Retry-After 헤더 (초 또는 HTTP 날짜) → 초 (없거나 잘못된 값이면 None)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenSet:
+    __slots__ = ("access_token", "refresh_token", "expires_at", "scope", "last_used", "retry_at")
+
+    def __init__(self, access_token, refresh_token, expires_at, scope=None):
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = expires_at
+        self.scope = scope
+        self.last_used = time.monotonic()
+        self.retry_at = 0.0  # 일시적 갱신 실패 후 이 시각(monotonic)까지 /token 호출 보류
+
+    @classmethod
+    def from_response(cls, token_response, previous=None):
+        """/token 응답 → TokenSet (새 Refresh Token이 없으면 이전 것 유지)"""
+        expires_in = token_response.get('expires_in')
+        return cls(
+            token_response['access_token'],
+            token_response.get('refresh_token') or (previous.refresh_token if previous else None),
+            time.monotonic() + expires_in if expires_in else math.inf,
+            token_response.get('scope') or (previous.scope if previous else None)
+        )
+
+    def expires_within(self, seconds):
+        return self.expires_at - time.monotonic() <= seconds
+
+
+class TokenManager:
+    """
+    {sid: TokenSet} 저장소 + 세션별 single-flight 갱신 (스레드 간 공유)
+    refresh_fn(refresh_token) → /token 응답 dict
+    실패하면 TokenRefreshError (토큰 폐기) 또는 TokenRefreshUnavailable (토큰 유지, 나중에 재시도)
+    """
+
+    def __init__(self, refresh_fn, skew=TOKEN_REFRESH_SKEW, wait_timeout=TOKEN_REFRESH_WAIT,
+                 idle_timeout=TOKEN_SESSION_IDLE, retry_delay=TOKEN_REFRESH_RETRY):
+        self._refresh_fn = refresh_fn
+        self.skew = skew
+        self.wait_timeout = wait_timeout
+        self.idle_timeout = idle_timeout
+        self.retry_delay = retry_delay
+        self._tokens = {}
+        self._inflight = {}  # {sid: Future} 진행 중인 갱신
+        self._lock = threading.Lock()
+        self.refreshes = 0   # 실제 /token 호출 수
+        self.coalesced = 0   # 진행 중인 갱신을 기다려 결과를 받은 호출 수
+        self.retries = 0     # 401 후 새 토큰으로 재시도한 호출 수
+        self.failures = 0
+        self.deferred = 0    # Retry-After 대기 중이라 /token을 부르지 않은 갱신 수
+
+    def store(self, sid, token_response):
+        """로그인 직후 토큰 저장"""
+        tokens = TokenSet.from_response(token_response)
+        with self._lock:
+            self._tokens[sid] = tokens
+        self._cleanup()
+        return tokens
+
+    def get(self, sid):
+        return self._tokens.get(sid) if sid else None
+
+    def discard(self, sid):
+        """로그아웃: 저장된 토큰 삭제, 삭제된 TokenSet 반환"""
+        with self._lock:
+            return self._tokens.pop(sid, None)
+
+    def access_token(self, sid):
+        """
+        유효한 Access Token (만료가 가까우면 먼저 갱신)
+        로그인 정보가 없으면 TokenRefreshError
+        """
+        tokens = self._tokens.get(sid)
+        if tokens is None:
+            raise TokenRefreshError("login_required", "No tokens for this session")
+        tokens.last_used = time.monotonic()
+        if not tokens.expires_within(self.skew):
+            return tokens.access_token
+        try:
+            return self.refresh(sid, tokens.access_token).access_token
+        except TokenRefreshError:
+            raise
+        except Exception:
+            # 일시적 장애 (429 / 5xx / 연결 실패 / 서킷 open): 아직 만료 전이면 기존 토큰 사용
+            if not tokens.expires_within(0):
+                return tokens.access_token
+            raise
+
+    def refresh(self, sid, stale_access_token=None):
+        """
+        세션 토큰 갱신 (single-flight)
+        stale_access_token: 호출자가 가진 토큰. 이미 다른 요청이 갱신했다면 /token을 다시 부르지 않고 최신 토큰 반환
+        """
+        with self._lock:
+            tokens = self._tokens.get(sid)
+            if tokens is None:
+                raise TokenRefreshError("login_required", "No tokens for this session")
+            if stale_access_token is not None and tokens.access_token != stale_access_token:
+                return tokens
+            wait = tokens.retry_at - time.monotonic()
+            if wait > 0:
+                self.deferred += 1
+                raise TokenRefreshUnavailable("temporarily_unavailable", "Refresh deferred", retry_after=wait)
+            future = self._inflight.get(sid)
+            leader = future is None
+            if leader:
+                future = self._inflight[sid] = Future()
+
+        if not leader:
+            self.coalesced += 1
+            try:
+                return future.result(timeout=self.wait_timeout)
+            except FutureTimeoutError:
+                # 앞선 갱신이 아직 끝나지 않음 → 토큰은 그대로 두고 잠시 뒤 다시 시도하도록 (503)
+                raise TokenRefreshUnavailable("temporarily_unavailable", "Token refresh still in progress",
+                                              retry_after=self.retry_delay) from None
+
+        try:
+            self.refreshes += 1
+            if not tokens.refresh_token:
+                raise TokenRefreshError("login_required", "No refresh token")
+            new_tokens = TokenSet.from_response(self._refresh_fn(tokens.refresh_token), previous=tokens)
+        except BaseException as e:
+            self.failures += 1
+            if isinstance(e, TokenRefreshError):
+                # Refresh Token이 더 이상 유효하지 않음 → 저장된 토큰도 버림
+                self.discard(sid)
+            elif isinstance(e, TokenRefreshUnavailable):
+                # 토큰은 유지, Retry-After 동안은 /token을 다시 부르지 않음
+                delay = e.retry_after if e.retry_after is not None else self.retry_delay
+                tokens.retry_at = time.monotonic() + delay
+            with self._lock:
+                del self._inflight[sid]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            # 갱신 중에 로그아웃했다면 되살리지 않음
+            if sid in self._tokens:
+                self._tokens[sid] = new_tokens
+            del self._inflight[sid]
+        future.set_result(new_tokens)
+        return new_tokens
+
+    def call(self, sid, send):
+        """
+        send(access_token) → requests.Response
+        401이면 한 번만 갱신해서 재시도
+        """
+        access_token = self.access_token(sid)
+        response = send(access_token)
+        if response.status_code == 401:
+            self.retries += 1
+            response = send(self.refresh(sid, access_token).access_token)
+        return response
+
+    def _cleanup(self):
+        """오래 사용하지 않은 세션의 토큰 삭제"""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            expired = [sid for sid, tokens in self._tokens.items() if tokens.last_used < cutoff]
+            for sid in expired:
+                del self._tokens[sid]
+
+    def stats(self):
+        return {
+            "sessions": len(self._tokens),
+            "inflight": len(self._inflight),
+            "refreshes": self.refreshes,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "failures": self.failures,
+            "deferred": self.deferred
+        }
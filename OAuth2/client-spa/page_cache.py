@@ -0,0 +1,112 @@
+"""
+미리 렌더링한 페이지 캐시
+
+- 시작할 때 HTML을 한 번 렌더링(설정 주입)하고 메모리에 보관
+- 본문마다 gzip / brotli 압축본, ETag, 응답 헤더를 미리 계산 → 요청 처리는 dict 조회
+- 백그라운드 스레드가 파일 mtime을 감시해 바뀐 페이지만 다시 렌더링 (교체는 dict 항목 하나 대입)
+
+brotli는 선택 사항 (pip install Brotli), 없으면 gzip만 제공
+"""
+import gzip
+import hashlib
+import os
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 설정이 바뀌면 페이지가 다시 렌더링되므로 캐시는 하되 매번 ETag로 재검증
+CACHE_CONTROL = "no-cache"
+
+
+class Page:
+    """렌더링된 페이지 하나 (인코딩별 본문과 응답 헤더)"""
+
+    def __init__(self, html, mtime):
+        self.mtime = mtime
+        body = html.encode('utf-8')
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+
+        # {content-coding: (본문, 헤더)}  ETag는 인코딩마다 달라야 함 (strong ETag)
+        self.variants = {"identity": (body, self._headers(body, None))}
+        compressed = gzip.compress(body, compresslevel=9)
+        self.variants["gzip"] = (compressed, self._headers(compressed, "gzip"))
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=11, mode=brotli.MODE_TEXT)
+            self.variants["br"] = (compressed, self._headers(compressed, "br"))
+
+    def _headers(self, body, encoding):
+        headers = {
+            'Content-Type': 'text/html; charset=utf-8',
+            'Content-Length': str(len(body)),
+            'ETag': f'"{self.etag}-{encoding}"' if encoding else f'"{self.etag}"',
+            'Cache-Control': CACHE_CONTROL,
+            'Vary': 'Accept-Encoding'
+        }
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return headers
+
+    def matches(self, if_none_match):
+        """If-None-Match에 이 페이지의 ETag(어느 인코딩이든)가 있는지"""
+        return any(tag == self.etag or tag.startswith(self.etag + "-") for tag in if_none_match)
+
+
+class PageCache:
+    """
+    파일 이름 → Page
+    render(path) 함수로 파일을 HTML 문자열로 렌더링
+    """
+
+    def __init__(self, directory, filenames, render, watch_interval=1.0):
+        self.directory = directory
+        self.render = render
+        self.watch_interval = watch_interval
+        self.reloads = 0
+        self._pages = {}
+        for filename in filenames:
+            self._load(filename)
+        self._watcher = None
+        self._stop_event = threading.Event()
+
+    def _load(self, filename):
+        path = os.path.join(self.directory, filename)
+        mtime = os.stat(path).st_mtime_ns
+        self._pages[filename] = Page(self.render(path), mtime)
+
+    def get(self, filename):
+        return self._pages.get(filename)
+
+    def refresh(self):
+        """mtime이 바뀐 페이지만 다시 렌더링, 반환값: 다시 렌더링한 파일 목록"""
+        changed = []
+        for filename, page in list(self._pages.items()):
+            try:
+                mtime = os.stat(os.path.join(self.directory, filename)).st_mtime_ns
+                if mtime != page.mtime:
+                    self._load(filename)
+                    changed.append(filename)
+            except (OSError, UnicodeDecodeError):
+                continue  # 편집기가 파일을 저장하는 중 → 이전 페이지를 유지하고 다음 주기에 다시 확인
+        self.reloads += len(changed)
+        return changed
+
+    def start_watcher(self, on_change=None):
+        """파일 변경 감시 스레드 시작 (daemon)"""
+        if self._watcher is None:
+            self._watcher = threading.Thread(
+                target=self._watch, args=(on_change,), name="page-watcher", daemon=True
+            )
+            self._watcher.start()
+        return self._watcher
+
+    def _watch(self, on_change):
+        while not self._stop_event.wait(self.watch_interval):
+            changed = self.refresh()
+            if changed and on_change:
+                on_change(changed)
+
+    def stop_watcher(self):
+        self._stop_event.set()
@@ -2,50 +2,79 @@
 Public Client (SPA) - 간단한 Flask 서버
 HTML 파일에 HOST IP 설정을 주입
 """
-from flask import Flask, render_template_string
+from flask import Flask, request
 import os
+import re
 import sys
 
 # config 모듈 import
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from config import HOST_IP, AUTHORIZATION_SERVER, REDIRECT_URI_SPA
+from jsonlog import get_logger
+from page_cache import PageCache
+
+# 파일 변경 감시 주기 (초)
+PAGE_WATCH_INTERVAL = float(os.environ.get('SPA_PAGE_WATCH_INTERVAL', '1'))
+
+log = get_logger("client-spa")
 
 app = Flask(__name__)
 
+# 페이지에 주입할 설정 (const 이름 → 값)
+PAGE_CONFIG = {
+    'AUTHORIZATION_SERVER': AUTHORIZATION_SERVER,
+    'CLIENT_ID': 'client_spa',
+    'REDIRECT_URI': REDIRECT_URI_SPA,
+    'SCOPE': 'profile email',
+}
+CONFIG_PATTERN = re.compile(r"const (%s) = '[^']*';" % "|".join(PAGE_CONFIG))
+
+
 # HTML 파일 읽기 및 설정 주입
-def load_html_with_config(filename):
-    """HTML 파일을 읽어서 설정 값을 주입"""
-    filepath = os.path.join(os.path.dirname(__file__), filename)
+def load_html_with_config(filepath):
+    """HTML 파일을 읽어서 설정 값을 주입 (JavaScript const 선언의 값 교체)"""
     with open(filepath, 'r', encoding='utf-8') as f:
         content = f.read()
     
-    # JavaScript 설정 부분 교체
-    config_js = f"""
-        // OAuth2 설정 (서버에서 주입됨)
-        const AUTHORIZATION_SERVER = '{AUTHORIZATION_SERVER}';
-        const CLIENT_ID = 'client_spa';
-        // const CLIENT_SECRET = null;  // ⚠️ Public Client는 secret 없음!
-        const REDIRECT_URI = '{REDIRECT_URI_SPA}';
-        const SCOPE = 'profile email';
-"""
+    content = CONFIG_PATTERN.sub(lambda m: f"const {m.group(1)} = '{PAGE_CONFIG[m.group(1)]}';", content)
+    # 기존 render_template_string과 같은 Jinja 렌더링 (시작할 때 / 파일이 바뀔 때 한 번)
+    return app.jinja_env.from_string(content).render()
+
+
+# 시작할 때 한 번 렌더링, 이후에는 파일이 바뀐 페이지만 다시 렌더링
+pages = PageCache(os.path.dirname(os.path.abspath(__file__)), ['index.html', 'callback.html'],
+                  load_html_with_config, watch_interval=PAGE_WATCH_INTERVAL)
+pages.start_watcher(on_change=lambda changed: log.info("pages_reloaded", pages=changed))
+
+
+def serve_page(filename):
+    """미리 계산한 본문/헤더 반환 (If-None-Match가 맞으면 304)"""
+    page = pages.get(filename)
     
-    # 기존 설정 부분을 찾아서 교체
-    import re
-    pattern = r"// OAuth2 설정.*?const SCOPE = '[^']+';"
-    content = re.sub(pattern, config_js.strip(), content, flags=re.DOTALL)
+    accept = request.accept_encodings
+    for encoding in ('br', 'gzip'):
+        if encoding in page.variants and accept[encoding]:
+            break
+    else:
+        encoding = 'identity'
     
-    return content
+    body, headers = page.variants[encoding]
+    if page.matches(request.if_none_match):
+        return '', 304, {k: v for k, v in headers.items() if k in ('ETag', 'Cache-Control', 'Vary')}
+    
+    return app.response_class(body, headers=headers)
+
 
 @app.route('/')
 @app.route('/index.html')
 def index():
     """메인 페이지"""
-    return render_template_string(load_html_with_config('index.html'))
+    return serve_page('index.html')
 
 @app.route('/callback.html')
 def callback():
     """콜백 페이지"""
-    return render_template_string(load_html_with_config('callback.html'))
+    return serve_page('callback.html')
 
 if __name__ == '__main__':
     print("\n" + "="*60)
@@ -1,13 +1,23 @@
 """
 OAuth2 프로젝트 공통 설정
 환경 변수를 통해 HOST IP를 동적으로 설정
+
+값은 처음 사용할 때 계산하고 캐시 (import만으로는 네트워크 IP 감지를 하지 않음)
+    import config
+    config.AUTHORIZATION_SERVER   # 이 시점에 HOST_IP 결정
+`from config import HOST_IP`도 동작하지만 그 import 시점에 값이 결정됨
 """
+import functools
 import os
-import socket
 
+# IP 자동 감지 소켓 타임아웃 (초) - 네트워크가 막힌 환경에서 오래 기다리지 않도록
+HOST_IP_DETECT_TIMEOUT = 0.5
+
+
+@functools.lru_cache(maxsize=None)
 def get_host_ip():
     """
-    HOST IP 가져오기
+    HOST IP 가져오기 (프로세스당 한 번만 계산)
     1. 환경 변수 HOST_IP 확인
     2. 없으면 자동으로 네트워크 IP 감지
     3. 실패하면 localhost 사용
@@ -18,27 +28,44 @@ def get_host_ip():
     if host_ip:
         return host_ip
     
-    # 자동 감지 시도
+    # 자동 감지 시도 (socket 모듈 import도 이때만)
+    import socket
     try:
-        # 외부 연결을 시도하여 로컬 IP 얻기
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        host_ip = s.getsockname()[0]
-        s.close()
-        return host_ip
+        # 외부 연결을 시도하여 로컬 IP 얻기 (UDP라 실제 패킷은 보내지 않음)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.settimeout(HOST_IP_DETECT_TIMEOUT)
+            s.connect(("8.8.8.8", 80))
+            return s.getsockname()[0]
     except Exception:
         # 실패 시 localhost 사용
         return "localhost"
 
-# 전역 설정
-HOST_IP = get_host_ip()
 
-# 서버 URL들
-AUTHORIZATION_SERVER = f"http://{HOST_IP}:5000"
-CLIENT_BACKEND_URL = f"http://{HOST_IP}:8080"
-CLIENT_SPA_URL = f"http://{HOST_IP}:8081"
+# 지연 계산되는 설정 {이름: 계산 함수}
+_LAZY_SETTINGS = {
+    # 전역 설정
+    "HOST_IP": get_host_ip,
+
+    # 서버 URL들
+    "AUTHORIZATION_SERVER": lambda: f"http://{get_host_ip()}:5000",
+    "CLIENT_BACKEND_URL": lambda: f"http://{get_host_ip()}:8080",
+    "CLIENT_SPA_URL": lambda: f"http://{get_host_ip()}:8081",
+
+    # Redirect URI들
+    "REDIRECT_URI_BACKEND": lambda: f"http://{get_host_ip()}:8080/callback",
+    "REDIRECT_URI_SPA": lambda: f"http://{get_host_ip()}:8081/callback.html",
+}
+
+
+def __getattr__(name):
+    """모듈 속성 조회 (PEP 562) - 처음 접근할 때 계산해서 모듈 전역에 캐시"""
+    try:
+        factory = _LAZY_SETTINGS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = globals()[name] = factory()
+    return value
 
-# Redirect URI들
-REDIRECT_URI_BACKEND = f"http://{HOST_IP}:8080/callback"
-REDIRECT_URI_SPA = f"http://{HOST_IP}:8081/callback.html"
 
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_SETTINGS))
@@ -0,0 +1,134 @@
+"""
+비동기 구조화 로깅 (JSON Lines)
+Authorization Server, Client Backend 공통
+
+요청 스레드는 레코드를 bounded queue에 넣기만 하고, 직렬화와 출력은 백그라운드 스레드가 담당
+- 큐가 가득 차면 기다리지 않고 버림 (dropped 카운트) → 느린 로그 소비자가 서버를 막지 않음
+- LOG_LEVEL: DEBUG / INFO / WARNING / ERROR
+- LOG_SAMPLING: 이벤트별 샘플링 비율 (예: "userinfo_request=0.1,posts_listed=0.01")
+- LOG_FILE: 지정하면 파일에, 없으면 stdout에 출력
+
+사용법:
+    log = get_logger("auth-server")
+    log.info("access_token_issued", user="user1", client="client_backend")
+"""
+import atexit
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_SAMPLING = os.environ.get('LOG_SAMPLING', '')
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+LOG_FILE = os.environ.get('LOG_FILE')
+
+
+def parse_sampling(spec):
+    """'event=rate,event=rate' → {event: rate}"""
+    rates = {}
+    for item in spec.split(','):
+        if '=' in item:
+            event, rate = item.split('=', 1)
+            rates[event.strip()] = float(rate)
+    return rates
+
+
+class AsyncJsonLogger:
+    """백그라운드 스레드로 JSON Lines를 출력하는 로거"""
+
+    def __init__(self, service, level=LOG_LEVEL, sampling=None, queue_size=LOG_QUEUE_SIZE, stream=None):
+        self.service = service
+        self.level = LEVELS[level]
+        self.sampling = parse_sampling(LOG_SAMPLING) if sampling is None else sampling
+        self.queue_size = queue_size
+        self.stream = stream
+        self.dropped = 0  # 큐가 가득 차서 버린 레코드 수
+        self._start()
+
+    def _start(self):
+        # fork된 워커에서는 스레드가 없으므로 프로세스마다 새로 시작
+        self._pid = os.getpid()
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._thread = threading.Thread(target=self._run, name=f"jsonlog-{self.service}", daemon=True)
+        self._thread.start()
+
+    def log(self, level, event, **fields):
+        if LEVELS[level] < self.level:
+            return
+
+        rate = self.sampling.get(event)
+        if rate is not None and random.random() >= rate:
+            return
+
+        if self._pid != os.getpid():
+            self._start()
+
+        # 직렬화는 백그라운드 스레드에서 (요청 스레드는 튜플만 넣음)
+        try:
+            self._queue.put_nowait((time.time(), level, event, fields))
+        except queue.Full:
+            self.dropped += 1
+
+    def debug(self, event, **fields):
+        self.log("DEBUG", event, **fields)
+
+    def info(self, event, **fields):
+        self.log("INFO", event, **fields)
+
+    def warning(self, event, **fields):
+        self.log("WARNING", event, **fields)
+
+    def error(self, event, **fields):
+        self.log("ERROR", event, **fields)
+
+    def _format(self, record):
+        ts, level, event, fields = record
+        line = {
+            "ts": datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": level,
+            "service": self.service,
+            "event": event
+        }
+        line.update(fields)
+        return json.dumps(line, ensure_ascii=False, default=str)
+
+    def _run(self):
+        stream = self.stream or (open(LOG_FILE, 'a', encoding='utf-8') if LOG_FILE else sys.stdout)
+        while True:
+            records = [self._queue.get()]
+            # 쌓여 있는 레코드를 한 번에 모아서 쓰고 flush는 한 번만
+            try:
+                while len(records) < 1000:
+                    records.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            stream.write("".join(self._format(r) + "\n" for r in records))
+            stream.flush()
+            for _ in records:
+                self._queue.task_done()
+
+    def flush(self, timeout=2.0):
+        """큐에 남은 레코드가 출력될 때까지 대기 (종료 시)"""
+        end = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < end:
+            time.sleep(0.01)
+
+
+_loggers = {}
+
+
+def get_logger(service):
+    """서비스별 로거 (프로세스당 하나)"""
+    logger = _loggers.get(service)
+    if logger is None:
+        logger = _loggers[service] = AsyncJsonLogger(service)
+        atexit.register(logger.flush)
+    return logger